@@ -1,25 +1,63 @@
 import requests
 import time
+from requests.adapters import HTTPAdapter
 from config import (
     LOCAL_AI_URL, 
     LOCAL_AI_TIMEOUT, 
     LOCAL_AI_HEALTH_CHECK_TIMEOUT,
     REQUEST_MAX_RETRIES,
     REQUEST_RETRY_DELAY,
+    AI_MODEL,
+    AI_POOL_MAXSIZE,
+    AI_BREAKER_FAILURE_THRESHOLD,
+    AI_BREAKER_RESET_SECONDS,
     get_logger
 )
+from ai_cache import get_prompt_cache
+from context_builder import fit_prompt
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from tagger import get_tagger
 
 logger = get_logger("ai")
 
+# --- CONNECTION POOL ---
+# One keep-alive session for every call to the AI server
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=2, pool_maxsize=AI_POOL_MAXSIZE)
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+
+def _probe_health() -> bool:
+    """Single un-retried health probe used by the breaker while half-open."""
+    r = _session.get(f"{LOCAL_AI_URL}/health", timeout=LOCAL_AI_HEALTH_CHECK_TIMEOUT)
+    return r.status_code == 200
+
+_breaker = CircuitBreaker(
+    "ai_server",
+    failure_threshold=AI_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=AI_BREAKER_RESET_SECONDS,
+    probe=_probe_health
+)
+
 def _retry_request(func, *args, **kwargs):
-    """Helper function to retry requests with exponential backoff."""
+    """
+    Helper function to retry requests with exponential backoff.
+    Fails fast with CircuitOpenError while the AI server breaker is open.
+    """
     last_exception = None
     
     for attempt in range(REQUEST_MAX_RETRIES):
+        _breaker.before_call()
         try:
-            return func(*args, **kwargs)
+            result = func(*args, **kwargs)
+            _breaker.record_success()
+            return result
         except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
             last_exception = e
+            _breaker.record_failure(e)
+            if _breaker.state != "closed":
+                logger.error(f"Request failed, circuit opened; not retrying: {str(e)}")
+                break
             if attempt < REQUEST_MAX_RETRIES - 1:
                 wait_time = REQUEST_RETRY_DELAY * (2 ** attempt)
                 logger.warning(f"Request failed (attempt {attempt + 1}/{REQUEST_MAX_RETRIES}), retrying in {wait_time}s: {str(e)}")
@@ -37,7 +75,7 @@ def ai_health_check():
     """Check health of AI server with retry logic."""
     try:
         def make_request():
-            return requests.get(
+            return _session.get(
                 f"{LOCAL_AI_URL}/health",
                 timeout=LOCAL_AI_HEALTH_CHECK_TIMEOUT
             )
@@ -59,6 +97,12 @@ def ai_health_check():
                 "model": "unknown", 
                 "message": f"HTTP {r.status_code}"
             }
+    except CircuitOpenError as e:
+        return {
+            "status": "offline",
+            "model": "unknown",
+            "message": f"Circuit open, next probe in {e.retry_in:.0f}s"
+        }
     except requests.exceptions.ConnectionError as e:
         logger.warning(f"AI server connection refused: {str(e)}")
         return {
@@ -91,20 +135,38 @@ def ai_analyze(text: str):
                 "details": "Input text is empty"
             }
         
+        prompt = fit_prompt(text)
+        cache = get_prompt_cache()
+        cached = cache.get(AI_MODEL, prompt)
+        if cached is not None:
+            return {
+                "summary": "Local AI",
+                "details": cached
+            }
+        
         def make_request():
-            return requests.post(
+            return _session.post(
                 f"{LOCAL_AI_URL}/analyze",
-                json={"prompt": text[:6000]},
+                json={"prompt": prompt},
                 timeout=LOCAL_AI_TIMEOUT
             )
         
         r = _retry_request(make_request)
         data = r.json()
+        content = data.get("content", "")
+        if r.status_code == 200:
+            cache.set(AI_MODEL, prompt, content)
         
         logger.info(f"AI analysis completed successfully ({len(text)} chars input)")
         return {
             "summary": "Local AI",
-            "details": data.get("content", "")
+            "details": content
+        }
+    except CircuitOpenError as e:
+        logger.warning(f"AI analysis skipped: {str(e)}")
+        return {
+            "summary": "AI Error",
+            "details": f"AI server unavailable (circuit open, next probe in {e.retry_in:.0f}s)."
         }
     except requests.exceptions.Timeout:
         logger.error(f"AI analysis timed out ({LOCAL_AI_TIMEOUT}s)")
@@ -128,8 +190,22 @@ def ai_analyze(text: str):
 # --- Helpers required by app.py (preserved to prevent crashes) ---
 
 def ai_generate_tags(text_summary: str) -> str:
-    """Fallback stub for tags."""
-    return "#3dprinting #scraped"
+    """Keyword tags from the local TF-IDF tagger (no extra LLM call)."""
+    try:
+        return get_tagger().tag(text_summary)
+    except Exception as e:
+        logger.error(f"Tag generation failed: {str(e)}")
+        return "#3dprinting"
 
 def ai_debug_connection():
+    # A manual deep test should always reach the server, so clear the breaker first
+    _breaker.reset()
     return [str(ai_health_check())]
+
+def ai_breaker_state() -> dict:
+    """Circuit breaker state of the AI server client."""
+    return _breaker.snapshot()
+
+def ai_cache_stats() -> dict:
+    """Hit/miss counters of the analysis cache."""
+    return get_prompt_cache().stats()
@@ -0,0 +1,165 @@
+"""
+Persistent prompt/result cache for AI analysis.
+Entries are keyed by model name + normalized prompt hash, expire after
+CACHE_TTL_SECONDS and are evicted least-recently-used beyond CACHE_MAX_ENTRIES.
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from config import (
+    ENABLE_CACHE,
+    CACHE_TTL_SECONDS,
+    CACHE_DB_PATH,
+    CACHE_MAX_ENTRIES,
+    get_logger
+)
+
+logger = get_logger("ai_cache")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so cosmetic differences map to the same key."""
+    return _WHITESPACE_RE.sub(" ", prompt or "").strip()
+
+
+def make_cache_key(model: str, prompt: str) -> str:
+    """Stable key: model name plus SHA-256 of the normalized prompt."""
+    digest = hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+    return f"{model}:{digest}"
+
+
+class PromptCache:
+    """SQLite-backed TTL + LRU cache of AI responses."""
+
+    def __init__(self, path=CACHE_DB_PATH, ttl_seconds=CACHE_TTL_SECONDS,
+                 max_entries=CACHE_MAX_ENTRIES, enabled=ENABLE_CACHE):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if self.enabled:
+            try:
+                self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS ai_cache (
+                    key         TEXT PRIMARY KEY,
+                    model       TEXT NOT NULL,
+                    content     TEXT NOT NULL,
+                    created_at  REAL NOT NULL,
+                    last_access REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_ai_cache_last_access ON ai_cache(last_access);
+                """)
+                self._conn.commit()
+                logger.info(f"AI cache ready at '{self.path}' (ttl={self.ttl_seconds}s, max={self.max_entries})")
+            except Exception as e:
+                logger.warning(f"AI cache disabled, could not open '{self.path}': {str(e)}")
+                self._conn = None
+                self.enabled = False
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        """Return cached content or None on miss/expiry."""
+        if not self.enabled:
+            return None
+
+        key = make_cache_key(model, prompt)
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT content, created_at FROM ai_cache WHERE key = ?", (key,)
+                ).fetchone()
+
+                if row and now - row[1] <= self.ttl_seconds:
+                    self._conn.execute("UPDATE ai_cache SET last_access = ? WHERE key = ?", (now, key))
+                    self._conn.commit()
+                    self.hits += 1
+                    logger.info(f"AI cache hit ({model})")
+                    return row[0]
+
+                if row:
+                    self._conn.execute("DELETE FROM ai_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+        except Exception as e:
+            logger.warning(f"AI cache read failed: {str(e)}")
+            return None
+
+    def set(self, model: str, prompt: str, content: str):
+        """Store content and evict least-recently-used entries beyond the size bound."""
+        if not self.enabled or not content:
+            return
+
+        key = make_cache_key(model, prompt)
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO ai_cache (key, model, content, created_at, last_access) VALUES (?,?,?,?,?)",
+                    (key, model, content, now, now)
+                )
+                self._conn.execute("""
+                    DELETE FROM ai_cache WHERE key IN (
+                        SELECT key FROM ai_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_entries,))
+                self._conn.commit()
+        except Exception as e:
+            logger.warning(f"AI cache write failed: {str(e)}")
+
+    def clear(self):
+        """Drop all cached entries and reset counters."""
+        with self._lock:
+            if self._conn:
+                self._conn.execute("DELETE FROM ai_cache")
+                self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        entries = 0
+        if self.enabled:
+            try:
+                with self._lock:
+                    entries = self._conn.execute("SELECT COUNT(*) FROM ai_cache").fetchone()[0]
+            except Exception:
+                pass
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_prompt_cache() -> PromptCache:
+    """Process-wide cache instance."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PromptCache()
+    return _cache
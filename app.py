@@ -4,24 +4,121 @@ import streamlit as st
 import pandas as pd
 import time
 import os
+import tempfile
+import uuid
 
 if sys.platform == 'win32':
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
 # --- IMPORTS ---
-from database import add_entry, load_history, get_db_stats, check_connection, init_db
-from scraper import scrape_model_page
-from ai import ai_analyze, ai_generate_tags, ai_health_check, ai_debug_connection
-from app_utils import analyze_single_file_content 
+from database import (
+    add_entry, load_history, get_db_stats, check_connection, init_db, db_request_stats,
+    spool_stats, history_mirror_stats, replica_status, sheets_in_use
+)
+from scraper import get_browser_pool, SAFE_MODE
+from scrape_cache import get_scrape_cache
+from scrape_metrics import get_scrape_metrics
+from ai import ai_health_check, ai_debug_connection, ai_cache_stats, ai_breaker_state
+from app_utils import mesh_volume_cm3, slicer_volume_adjustment, quote_matrix, quote_comparison
+from job_queue import get_job_queue
+from kb_export import EXPORT_FORMATS, available_formats, iter_frame_chunks, iter_store_frames, write_export
+from kb_search import get_search_index
+from worker import start_embedded_workers
+from health_monitor import HealthMonitor
+from config import (
+    SHEET_NAME, JOB_EMBEDDED_WORKERS, PRINTER_PROFILES, MATERIAL_DENSITIES,
+    QUOTE_COST_PER_KG, QUOTE_ELECTRICITY_RATE, QUOTE_LABOR_RATE, QUOTE_PROFIT_MARGIN,
+    QUOTE_GST_PERCENT, QUOTE_DELIVERY_FEE,
+)
+from tagger import sync_with_history, retag_placeholders
 
 # --- CONFIGURATION ---
-PRINTER_PROFILES = {
-    "Ender 3 / V2": {"speed": 50, "nozzle": 0.4, "watts": 350},
-    "Bambu P1/X1": {"speed": 120, "nozzle": 0.4, "watts": 1000},
-    "Prusa MK3/4": {"speed": 70, "nozzle": 0.4, "watts": 200}
-}
+GST_RATES = [0, 5, 12, 18, 28]
+EXPORT_LABELS = {"csv": "CSV", "csv.gz": "CSV (gzip)", "parquet": "Parquet"}
 
-MATERIAL_DENSITIES = {"PLA": 1.24, "PETG": 1.27, "ABS": 1.04, "TPU": 1.21}
+@st.cache_resource
+def get_health_monitor():
+    """One background monitor per server process, shared by all sessions."""
+    monitor = HealthMonitor({
+        "ai": ai_health_check, "db": check_connection, "replica": replica_status, "stats": get_db_stats
+    })
+    monitor.start()
+    return monitor
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def cached_mesh_volume(content: bytes) -> float:
+    """Mesh volume per uploaded file, parsed once instead of on every rerun."""
+    return mesh_volume_cm3(content)
+
+@st.cache_resource
+def warm_scraper():
+    """Start the browser pool once per process so the first scrape skips Chromium startup."""
+    if SAFE_MODE: return None
+    pool = get_browser_pool()
+    pool.warm_up()
+    return pool
+
+@st.cache_resource
+def start_job_workers():
+    """Embedded queue workers, once per server process (JOB_EMBEDDED_WORKERS=0 to rely on worker.py)."""
+    if JOB_EMBEDDED_WORKERS <= 0: return []
+    return start_embedded_workers(JOB_EMBEDDED_WORKERS)
+
+JOB_STATUS_ICONS = {"queued": "⏳", "running": "⚙️", "done": "✅", "failed": "❌"}
+
+@st.fragment(run_every=2)
+def render_jobs(bulk=False):
+    """Poll this session's jobs; a finished job becomes the displayed scan. Bulk imports show as one table."""
+    if bulk:
+        ids = st.session_state["bulk_job_ids"]
+        jobs = get_job_queue().list_jobs(ids, limit=len(ids))
+        finished = sum(job["status"] in ("done", "failed") for job in jobs)
+        st.progress(finished / len(ids), text=f"{finished}/{len(ids)} pages")
+        st.dataframe(pd.DataFrame([{
+            "url": job["payload"]["url"],
+            "status": f"{JOB_STATUS_ICONS.get(job['status'], '')} "
+                      + ("Saved" if (job["result"] or {}).get("saved") else (job["error"] or job["progress"] or job["status"])[:120]),
+            "tags": (job["result"] or {}).get("tags", ""),
+            "attempts": f"{job['attempts']}/{job['max_attempts']}",
+        } for job in reversed(jobs)]), use_container_width=True, hide_index=True)
+        return
+
+    jobs = get_job_queue().list_jobs(st.session_state["job_ids"], limit=10)
+    loaded = st.session_state.setdefault("loaded_jobs", set())
+    for job in jobs:
+        label = f"{JOB_STATUS_ICONS.get(job['status'], '')} #{job['id']} {job['payload']['url']}"
+        with st.status(label, state="error" if job["status"] == "failed" else "complete" if job["status"] == "done" else "running",
+                       expanded=job["status"] in ("queued", "running")):
+            for msg in job["log"][-8:]:
+                st.write(f"_{msg}_")
+            st.caption(f"{job['progress']} · attempt {job['attempts']}/{job['max_attempts']}")
+            if job["error"] and job["status"] != "done":
+                st.error(job["error"])
+            if job["status"] == "done" and st.button("Show result", key=f"show_job_{job['id']}"):
+                st.session_state["last_scan"] = job["result"]
+                st.rerun()
+
+        # Newest finished job is shown automatically once
+        if job["status"] == "done" and job["id"] not in loaded:
+            loaded.add(job["id"])
+            if job["id"] == st.session_state["job_ids"][0]:
+                st.session_state["last_scan"] = job["result"]
+                st.rerun()
+
+def parse_url_list(url_text, csv_file=None):
+    """URLs from pasted text (one per line) and/or a CSV with a 'url' column, de-duplicated in order."""
+    candidates = (url_text or "").splitlines()
+    if csv_file is not None:
+        csv_df = pd.read_csv(csv_file)
+        col = "url" if "url" in csv_df.columns else csv_df.columns[0]
+        candidates += csv_df[col].dropna().astype(str).tolist()
+    urls = [u.strip().strip(",") for u in candidates]
+    return list(dict.fromkeys(u for u in urls if u.startswith("http")))
+
+def format_age(seconds):
+    if seconds is None: return "never"
+    if seconds < 60: return f"{int(seconds)}s ago"
+    return f"{int(seconds // 60)}m ago"
 
 def main():
     st.set_page_config(page_title="3D Business Brain", page_icon="🧠", layout="wide")
@@ -29,22 +126,31 @@ def main():
     if "printers" not in st.session_state: 
         st.session_state["printers"] = PRINTER_PROFILES.copy()
 
+    db_calls_before = db_request_stats()
+
     # Initialize DB (Safe init)
     init_db()
+    warm_scraper()
+    start_job_workers()
 
     # --- SIDEBAR ---
     with st.sidebar:
         st.title("🧠 3D Business Brain")
         
-        # Quick Health Status
-        ai_status = ai_health_check()
-        db_status = check_connection()
+        # Quick Health Status (cached by the background monitor)
+        monitor = get_health_monitor()
+        ai_status = monitor.get("ai") or {"status": "unknown", "model": "unknown", "message": monitor.probe_error("ai") or "Not checked yet"}
+        db_status = monitor.get("db") or {"status": False, "error": monitor.probe_error("db") or "Not checked yet"}
         
         if ai_status["status"] == "online" and db_status["status"]:
             st.success("System: ONLINE")
         else:
             if not db_status["status"]: st.warning("DB: Offline")
             if ai_status["status"] != "online": st.warning(f"AI: {ai_status['status']}")
+        
+        c_age, c_recheck = st.columns([2, 1])
+        c_age.caption(f"Checked {format_age(monitor.age_seconds('ai'))}")
+        c_recheck.button("🔄", help="Re-check now", on_click=monitor.refresh, key="recheck_sidebar")
                 
         st.divider()
         st.subheader("🤖 AI Control")
@@ -82,12 +188,12 @@ def main():
 
         st.divider()
         st.subheader("💰 Business Economics")
-        cost_kg = st.number_input("Filament Cost (₹/kg)", 500, 5000, 1200)
-        electricity_rate = st.number_input("Electricity (₹/kWh)", 0.0, 50.0, 10.0)
-        labor_rate = st.number_input("Labor Rate (₹/hr)", 0, 5000, 200)
-        profit_margin = st.slider("Profit Margin (%)", 0, 300, 50)
-        gst_percent = st.selectbox("GST (%)", [0, 5, 12, 18, 28], index=3)
-        delivery_fee = st.number_input("Delivery Fee (₹)", 0, 2000, 100)
+        cost_kg = st.number_input("Filament Cost (₹/kg)", 500, 5000, int(QUOTE_COST_PER_KG))
+        electricity_rate = st.number_input("Electricity (₹/kWh)", 0.0, 50.0, QUOTE_ELECTRICITY_RATE)
+        labor_rate = st.number_input("Labor Rate (₹/hr)", 0, 5000, int(QUOTE_LABOR_RATE))
+        profit_margin = st.slider("Profit Margin (%)", 0, 300, int(QUOTE_PROFIT_MARGIN))
+        gst_percent = st.selectbox("GST (%)", GST_RATES, index=GST_RATES.index(QUOTE_GST_PERCENT) if QUOTE_GST_PERCENT in GST_RATES else 3)
+        delivery_fee = st.number_input("Delivery Fee (₹)", 0, 2000, int(QUOTE_DELIVERY_FEE))
 
     # --- TABS ---
     tab_intelli, tab_calc, tab_health = st.tabs(
@@ -106,43 +212,23 @@ def main():
             
             c_url, c_btn = st.columns([4, 1])
             url = c_url.text_input("Model URL", placeholder="https://...")
+            refresh = st.checkbox("Re-scrape (ignore cached copy)", value=False)
             
             if c_btn.button("🚀 Analyze", type="primary"):
                 if not url:
                     st.toast("Please enter a URL first.")
                 else:
-                    with st.status("Deploying Agents...", expanded=True) as status:
-                        def update_ui(msg): st.write(f"_{msg}_")
-                        data = scrape_model_page(url, status_callback=update_ui)
-                        
-                        if "error" in data:
-                            status.update(label="❌ Extraction Failed", state="error")
-                            st.error(data["error"])
-                            # Don't stop, let them try again
-                        else:
-                            st.write("🧠 Reading geometry...")
-                            prompt = f"Analyze this 3D model for printing risks, commercial viability, and optimal settings. Summary: {data['text'][:6000]}"
-                            
-                            # --- AI LOGIC ---
-                            if st.session_state.get("ai_enabled"):
-                                res = ai_analyze(prompt)
-                            else:
-                                res = {
-                                    "summary": "AI Disabled",
-                                    "details": "Enable AI in sidebar for full analysis.\n\nExtracted Text Sample:\n" + data['text'][:500] + "..."
-                                }
-                            
-                            tags = ai_generate_tags(res['details'])
-                            
-                            # Store in session state for display/saving
-                            st.session_state['last_scan'] = {
-                                "url": url,
-                                "summary": res['summary'],
-                                "details": res['details'],
-                                "tags": tags,
-                                "images": data.get("images", [])
-                            }
-                            status.update(label="✅ Analysis Complete", state="complete", expanded=False)
+                    # Queued for a background worker; this session only polls
+                    job_id = get_job_queue().enqueue("scrape_analyze", {
+                        "url": url,
+                        "refresh": refresh,
+                        "ai_enabled": bool(st.session_state.get("ai_enabled"))
+                    })
+                    st.session_state.setdefault("job_ids", []).insert(0, job_id)
+                    st.toast(f"Job #{job_id} queued")
+
+            if st.session_state.get("job_ids"):
+                render_jobs()
 
             # Display Result & Save
             if 'last_scan' in st.session_state:
@@ -173,19 +259,52 @@ def main():
                             else:
                                 st.error("Database Error.")
 
+        # --- SECTION A2: BULK IMPORT ---
+        with st.expander("📥 Bulk Import (CSV or URL list)"):
+            st.caption("One URL per line, or a CSV with a 'url' column. Each page is queued as a background job, so the import keeps running if you navigate away.")
+            url_text = st.text_area("URLs", height=120, placeholder="https://www.printables.com/model/...")
+            url_csv = st.file_uploader("...or upload a CSV", type=["csv"], key="bulk_csv")
+            save_bulk = st.checkbox("Save results to Knowledge Base", value=bool(db_status["status"]), disabled=not db_status["status"])
+            
+            if st.button("📥 Import All"):
+                urls = parse_url_list(url_text, url_csv)
+                if not urls:
+                    st.toast("No valid URLs found.")
+                else:
+                    queue = get_job_queue()
+                    st.session_state["bulk_job_ids"] = [queue.enqueue("scrape_analyze", {
+                        "url": page_url,
+                        "refresh": False,
+                        "ai_enabled": bool(st.session_state.get("ai_enabled")),
+                        "save": save_bulk
+                    }) for page_url in urls]
+                    st.toast(f"{len(urls)} pages queued")
+
+            if st.session_state.get("bulk_job_ids"):
+                render_jobs(bulk=True)
+
         st.divider()
         
         # --- SECTION B: KNOWLEDGE BASE (DB View) ---
-        st.subheader("📚 Knowledge Base")
+        kb_hdr_1, kb_hdr_2 = st.columns([3, 1])
+        kb_hdr_1.subheader("📚 Knowledge Base")
+        resync = kb_hdr_2.button("🔄 Full reload", help="Reload the whole knowledge base (re-downloads the sheet when Sheets is the primary store)")
         
         if not db_status["status"]:
             st.error(f"⚠️ Database Offline: {db_status['error']}")
             st.info("Check the Health tab for diagnosis.")
         else:
-            df = load_history()
+            df = load_history(refresh=resync)
+            if db_status.get("backend") == "sheets":
+                mirror = history_mirror_stats()
+                st.caption(f"Local mirror: {mirror['rows']} rows · last sync fetched {mirror['last_fetched']}")
             if df.empty:
                 st.info("Database is empty. Add some intelligence above!")
             else:
+                # Keep the local tagger's statistics current and tag legacy stub rows
+                sync_with_history(df)
+                df = retag_placeholders(df)
+
                 # --- Filters ---
                 c1, c2, c3 = st.columns(3)
                 with c1:
@@ -194,22 +313,29 @@ def main():
                     else: type_options = ["All"]
                     type_filter = st.selectbox("Filter by Type", type_options)
                 with c2:
-                    search = st.text_input("Search (URL, tags)")
+                    search = st.text_input("Search (URL, summary, details, tags)")
                 with c3:
-                    sort_by = st.selectbox("Sort", ["Newest", "Oldest"])
+                    sort_by = st.selectbox("Sort", ["Relevance", "Newest", "Oldest"])
 
-                # --- Apply Filters ---
-                filtered_df = df.copy()
-                if type_filter != "All":
-                    filtered_df = filtered_df[filtered_df["type"] == type_filter]
+                # --- Apply Filters (incremental index; only new rows are tokenized) ---
+                index = get_search_index()
+                index.sync(df)
+                search_started = time.perf_counter()
+                positions = index.search(search, types=None if type_filter == "All" else [type_filter])
+                filtered_df = df.iloc[positions].copy()
                 if search:
-                    filtered_df = filtered_df[filtered_df.apply(lambda row: search.lower() in str(row).lower(), axis=1)]
+                    st.caption(f"{len(filtered_df)} matches in {(time.perf_counter() - search_started) * 1000:.1f} ms")
+                else:
+                    # Nothing to rank by without a query
+                    sort_by = "Newest" if sort_by == "Relevance" else sort_by
                 
                 if sort_by == "Newest" and "created_at" in filtered_df.columns:
                     filtered_df = filtered_df.sort_values("created_at", ascending=False)
                 elif sort_by == "Oldest" and "created_at" in filtered_df.columns:
                     filtered_df = filtered_df.sort_values("created_at", ascending=True)
 
+                export_df = filtered_df
+
                 # Format Date for Display
                 if "created_at" in filtered_df.columns:
                      filtered_df["Date"] = pd.to_datetime(filtered_df["created_at"]).dt.strftime("%Y-%m-%d %H:%M")
@@ -219,7 +345,30 @@ def main():
 
                 st.dataframe(filtered_df, use_container_width=True, hide_index=True)
                 
-                st.download_button("⬇️ Download CSV", filtered_df.to_csv(index=False), "brain_dump.csv", "text/csv")
+                # Exports are only built on request, chunk by chunk, from the local store
+                with st.expander("⬇️ Export"):
+                    e_c1, e_c2, e_c3 = st.columns([2, 2, 1])
+                    scope = e_c1.radio("Rows", ["Current view", "Entire knowledge base"], horizontal=True)
+                    fmt = e_c2.selectbox("Format", available_formats(), format_func=EXPORT_LABELS.get)
+                    if e_c3.button("Prepare", use_container_width=True):
+                        # One scratch file per session, reused by every Prepare and removed once handed over
+                        path = st.session_state.setdefault(
+                            "kb_export_path", os.path.join(tempfile.gettempdir(), f"kb_export_{uuid.uuid4().hex}")
+                        )
+                        frames = iter_frame_chunks(export_df) if scope == "Current view" else iter_store_frames()
+                        try:
+                            with st.spinner("Writing export..."):
+                                write_export(frames, fmt, path)
+                            mime, ext = EXPORT_FORMATS[fmt]
+                            size_kb = os.path.getsize(path) / 1024
+                            # The button is only rendered on this run, so the file is read once
+                            with open(path, "rb") as f:
+                                st.download_button(
+                                    f"Download {EXPORT_LABELS[fmt]} ({size_kb:.0f} KB)", f.read(), f"brain_dump{ext}", mime
+                                )
+                        finally:
+                            if os.path.exists(path):
+                                os.remove(path)
 
     # --- TAB 2: QUOTE CALCULATOR ---
     with tab_calc:
@@ -227,33 +376,44 @@ def main():
         uploaded_files = st.file_uploader("Upload STL Files", type=["stl"], accept_multiple_files=True)
         
         if uploaded_files:
-            total_invoice = 0
+            names, volumes = [], []
             for stl in uploaded_files:
-                stl.seek(0)
-                stats = analyze_single_file_content(
-                    stl.read(), stl.name, density, cost_kg, infill, walls,
-                    current_printer['speed'], current_printer['nozzle']
-                )
-                
-                if "error" in stats:
-                    st.error(f"Error {stl.name}: {stats['error']}")
-                    continue
-
-                p_time = stats['Print Time (hr)']
-                mat_cost = stats['Cost (₹)']
-                elec_cost = (current_printer['watts']/1000) * p_time * electricity_rate
-                labor_cost = p_time * labor_rate
-                base_cost = mat_cost + elec_cost + labor_cost
-                profit_amt = base_cost * (profit_margin/100)
-                final_item_price = base_cost + profit_amt
-                
-                total_invoice += final_item_price
+                try:
+                    volumes.append(cached_mesh_volume(stl.getvalue()))
+                    names.append(stl.name)
+                except Exception as e:
+                    st.error(f"Error {stl.name}: {str(e)}")
+
+            # Every file x printer x material priced at once; the sidebar picks one cell
+            printers = st.session_state["printers"]
+            matrix = quote_matrix(
+                volumes, printers, MATERIAL_DENSITIES, cost_kg, infill, walls,
+                electricity_rate, labor_rate, profit_margin
+            )
+            p_idx, m_idx = list(printers).index(printer_name), list(MATERIAL_DENSITIES).index(mat_type)
+            prices = matrix["price"][:, p_idx, m_idx]
+            total_invoice = float(prices.sum())
 
-                with st.expander(f"{stl.name} - ₹{round(final_item_price, 2)}"):
-                    c_a, c_b = st.columns(2)
-                    c_a.metric("Print Time", f"{round(p_time, 2)} hr")
-                    c_b.metric("Material", f"{round(stats['Weight (g)'], 1)}g")
-                    st.json(stats)
+            if len(names) > 20:
+                st.dataframe(pd.DataFrame({
+                    "File Name": names,
+                    "Print Time (hr)": matrix["hours"][:, p_idx, m_idx],
+                    "Weight (g)": matrix["weight_g"][:, p_idx, m_idx].round(2),
+                    "Price (₹)": prices.round(2),
+                }), use_container_width=True, hide_index=True)
+            else:
+                for i, name in enumerate(names):
+                    with st.expander(f"{name} - ₹{round(float(prices[i]), 2)}"):
+                        c_a, c_b = st.columns(2)
+                        c_a.metric("Print Time", f"{round(float(matrix['hours'][i, p_idx, m_idx]), 2)} hr")
+                        c_b.metric("Material", f"{round(float(matrix['weight_g'][i, p_idx, m_idx]), 1)}g")
+                        st.json({
+                            "File Name": name,
+                            "Effective Volume (cm3)": round(slicer_volume_adjustment(volumes[i], infill, walls), 2),
+                            "Weight (g)": round(float(matrix["weight_g"][i, p_idx, m_idx]), 2),
+                            "Cost (₹)": round(float(matrix["material"][i, p_idx, m_idx]), 2),
+                            "Print Time (hr)": float(matrix["hours"][i, p_idx, m_idx])
+                        })
 
             gst_amt = total_invoice * (gst_percent/100)
             grand_total = total_invoice + gst_amt + delivery_fee
@@ -264,29 +424,83 @@ def main():
             c2.metric(f"GST ({gst_percent}%)", f"₹{round(gst_amt, 2)}")
             c3.metric("GRAND TOTAL", f"₹{round(grand_total, 2)}")
             
+            if names:
+                st.subheader("📊 Printer × Material Comparison")
+                comparison = quote_comparison(matrix, gst_percent, delivery_fee)
+                comparison.insert(0, "Selected", (comparison["Printer"] == printer_name) & (comparison["Material"] == mat_type))
+                cheapest = comparison.iloc[0]
+                fastest = comparison.sort_values(["Print Time (hr)", "Grand Total (₹)"]).iloc[0]
+                c_cheap, c_fast = st.columns(2)
+                c_cheap.metric("Cheapest", f"₹{cheapest['Grand Total (₹)']:,.2f}")
+                c_cheap.caption(f"{cheapest['Printer']} · {cheapest['Material']}")
+                c_fast.metric("Fastest", f"{fastest['Print Time (hr)']:,.2f} hr")
+                c_fast.caption(f"{fastest['Printer']} · {fastest['Material']}")
+                st.dataframe(comparison, use_container_width=True, hide_index=True)
+
             if st.button("💾 Save Quote to DB"):
                  if not db_status["status"]:
                      st.error("Cannot save: Database Offline")
                  else:
-                     details_str = f"Files: {[f.name for f in uploaded_files]}, Subtotal: {total_invoice}"
+                     details_str = f"Files: {names}, Subtotal: {total_invoice}"
                      if add_entry("Quote", "Batch File Upload", details_str, grand_total, "Customer Quote", "#quote"):
                         st.success("✅ Quote Saved!")
 
     # --- TAB 3: HEALTH DASHBOARD ---
     with tab_health:
         st.header("🩺 System Diagnostics")
+        c_hdr_1, c_hdr_2 = st.columns([3, 1])
+        c_hdr_1.caption(
+            f"Database checked {format_age(monitor.age_seconds('db'))}, "
+            f"AI checked {format_age(monitor.age_seconds('ai'))} "
+            f"(background interval {monitor.interval}s)"
+        )
+        c_hdr_2.button("🔄 Re-check now", on_click=monitor.refresh, key="recheck_health")
         
         # 1. Database Check
         st.subheader("1. Database Connection")
-        if db_status["status"]:
+        if db_status.get("backend") == "sqlite":
+            if db_status["status"]:
+                st.success("✅ Local SQLite store: OK")
+            else:
+                st.error("❌ Local SQLite store: Unavailable")
+                st.code(f"Error: {db_status['error']}")
+            sheets_status = monitor.get("replica")
+            st.caption("Google Sheets replica:")
+        else:
+            sheets_status = db_status
+
+        if sheets_status is None:
+            st.info("Google Sheets replication is off (no [gsheets] secrets or KB_SHEETS_REPLICA=false)")
+        elif sheets_status["status"]:
             st.success("✅ Google Sheets API: Connected")
-            st.caption(f"Target Sheet: {SHEET_NAME}") # Placeholder, real check was inside
+            st.caption(f"Target Sheet: {SHEET_NAME}")
         else:
             st.error("❌ Google Sheets API: Disconnected")
-            st.code(f"Error: {db_status['error']}")
-            if "Missing" in str(db_status["error"]):
+            st.code(f"Error: {sheets_status['error']}")
+            if "Missing" in str(sheets_status["error"]):
                 st.info("💡 Action: Add your service account JSON to secrets.toml under [gsheets]")
 
+        kb_stats = monitor.get("stats")
+        if kb_stats:
+            k_c1, k_c2, k_c3 = st.columns(3)
+            k_c1.metric("Entries", kb_stats["total"])
+            k_c2.metric("Latest Entry", str(kb_stats["latest"] or "—")[:16])
+            if kb_stats.get("size_bytes") is not None:
+                k_c3.metric("Store Size", f"{kb_stats['size_bytes'] / 1024 / 1024:.1f} MB")
+            elif kb_stats.get("sheet_cells") is not None:
+                k_c3.metric("Sheet Size", f"{kb_stats['sheet_cells']:,} cells", help="Google Sheets allows 10M cells per spreadsheet")
+            if kb_stats["by_type"]:
+                st.caption(" · ".join(f"{t or '(none)'}: {n}" for t, n in sorted(kb_stats["by_type"].items(), key=lambda x: -x[1])))
+
+        if sheets_in_use():
+            spool = spool_stats()
+            s_c1, s_c2, s_c3 = st.columns(3)
+            s_c1.metric("Writes Pending", spool["pending"])
+            s_c2.metric("Rows Written", spool["flushed"], help=f"{spool['batches']} batch(es) this process")
+            s_c3.metric("Parked Rows", spool["dead"])
+            if spool["last_error"]:
+                st.warning(f"Last write failed (retry in {spool['retry_in']}s): {spool['last_error']}")
+
         st.divider()
 
         # 2. AI Check
@@ -300,13 +514,74 @@ def main():
             st.metric("Model", ai_status["model"])
             
         st.caption(f"Message: {ai_status['message']}")
+
+        breaker = ai_breaker_state()
+        breaker_labels = {"closed": "🟢 Closed", "half_open": "🟡 Half-open (probing)", "open": "🔴 Open"}
+        c_br_1, c_br_2, c_br_3 = st.columns(3)
+        c_br_1.metric("Circuit Breaker", breaker_labels.get(breaker["state"], breaker["state"]))
+        c_br_2.metric("Consecutive Failures", f"{breaker['consecutive_failures']}/{breaker['failure_threshold']}")
+        c_br_3.metric("Short-circuited Calls", breaker["short_circuited_calls"])
+        if breaker["state"] == "open":
+            st.caption(f"Next background probe in {breaker['next_probe_in']}s. Last error: {breaker['last_error']}")
         
         if ai_status["status"] != "online":
             st.warning("To fix: Run 'start_ai.bat' or ensure Ollama is serving.")
             if st.button("🛠️ Run Deep Connection Test"):
                 logs = ai_debug_connection()
+                monitor.refresh("ai")
                 st.write(logs)
 
+        st.divider()
+
+        # 3. Analysis Cache
+        st.subheader("3. Analysis Cache")
+        cache_stats = ai_cache_stats()
+        if not cache_stats["enabled"]:
+            st.info("Cache disabled (ENABLE_CACHE=false)")
+        else:
+            c_h, c_m, c_e = st.columns(3)
+            c_h.metric("Hits", cache_stats["hits"], delta=f"{round(cache_stats['hit_rate'] * 100)}% hit rate", delta_color="off")
+            c_m.metric("Misses", cache_stats["misses"])
+            c_e.metric("Entries", f"{cache_stats['entries']}/{cache_stats['max_entries']}")
+            st.caption(f"TTL: {cache_stats['ttl_seconds']}s")
+
+            scrape_stats = get_scrape_cache().stats()
+            c_h, c_r, c_e = st.columns(3)
+            c_h.metric("Scrape Hits", scrape_stats["hits"], delta=f"{round(scrape_stats['hit_rate'] * 100)}% hit rate", delta_color="off")
+            c_r.metric("Revalidated (304)", scrape_stats["revalidated"])
+            c_e.metric("Cached Pages", f"{scrape_stats['entries']}/{scrape_stats['max_entries']}")
+            st.caption(f"Pages are fresh for {scrape_stats['fresh_seconds']}s, then revalidated with ETag/Last-Modified")
+
+        # 4. Scraper Metrics
+        st.subheader("4. Scraper Metrics (24h)")
+        domains = get_scrape_metrics().summary()["domains"]
+        if not domains:
+            st.caption("No scrapes recorded yet.")
+        else:
+            st.dataframe(pd.DataFrame([
+                {
+                    "domain": d,
+                    "scrapes": m["scrapes"],
+                    "ok": m["ok"],
+                    "degraded": m["degraded"],
+                    "errors": m["errors"],
+                    "failures": ", ".join(f"{k}: {v}" for k, v in m["failure_categories"].items()),
+                    "p50 ms": m["p50_ms"],
+                    "p95 ms": m["p95_ms"],
+                    "avg KB": m["avg_kb"],
+                    "phases (avg ms)": ", ".join(f"{k} {v}" for k, v in m["phase_avg_ms"].items()),
+                }
+                for d, m in domains.items()
+            ]), use_container_width=True, hide_index=True)
+            st.caption("Also served to admins by the API at /metrics (Prometheus) and /metrics/scraper (JSON).")
+
+    # Round-trips are counted process-wide, so concurrent sessions and the health monitor show up here too
+    db_calls = db_request_stats()
+    st.sidebar.caption(
+        f"Sheets API: {db_calls['requests'] - db_calls_before['requests']} requests this rerun · "
+        f"{db_calls['authorizations']} auth(s), {db_calls['reconnects']} reconnect(s) since start"
+    )
+
 
 if __name__ == "__main__":
     main()
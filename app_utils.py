@@ -1,4 +1,5 @@
 import io
+import numpy as np
 import trimesh
 import pandas as pd
 from reportlab.pdfgen import canvas
@@ -16,18 +17,21 @@ def estimate_print_time(effective_volume_cm3, layer_height=0.2, printer_speed_mm
     if extrusion_rate == 0: return 0
     return round((total_mm3 / extrusion_rate) / 3600, 2)
 
+def load_mesh(file_content):
+    """STL bytes as a solid mesh (convex hull if the mesh is not watertight)."""
+    mesh = trimesh.load(io.BytesIO(file_content), file_type='stl', force="mesh")
+    if not mesh.is_watertight:
+        mesh = mesh.convex_hull
+    if mesh.is_empty: raise ValueError("Empty mesh")
+    return mesh
+
+def mesh_volume_cm3(file_content):
+    """Solid volume of an STL in cm3."""
+    return load_mesh(file_content).volume / 1000.0
+
 def analyze_single_file_content(file_content, file_name, density, cost_per_kg, infill, walls, speed_mm_s, nozzle_mm):
     try:
-        # Load directly from bytes (memory)
-        file_obj = io.BytesIO(file_content)
-        mesh = trimesh.load(file_obj, file_type='stl', force="mesh")
-        
-        if not mesh.is_watertight:
-            mesh = mesh.convex_hull
-        
-        if mesh.is_empty: raise ValueError("Empty mesh")
-        
-        volume_cm3 = mesh.volume / 1000.0
+        volume_cm3 = mesh_volume_cm3(file_content)
         effective_vol = slicer_volume_adjustment(volume_cm3, infill, walls)
         weight_g = effective_vol * density
         cost = (weight_g / 1000) * cost_per_kg
@@ -42,3 +46,56 @@ def analyze_single_file_content(file_content, file_name, density, cost_per_kg, i
         }
     except Exception as e:
         return {"error": str(e), "File Name": file_name}
+
+def quote_matrix(volumes_cm3, printers, materials, cost_per_kg, infill, walls,
+                 electricity_rate, labor_rate, profit_margin, layer_height=0.2):
+    """
+    Prices every file on every printer in every material in one broadcast.
+    `printers` is {name: {"speed", "nozzle", "watts"}}, `materials` is
+    {name: density}. Returns arrays of shape (files, printers, materials)
+    plus the printer/material names along the last two axes. Rounding
+    matches analyze_single_file_content, so one cell equals the scalar quote.
+    """
+    vol = np.asarray(volumes_cm3, dtype=np.float64)[:, None, None]
+    speed = np.array([p["speed"] for p in printers.values()], dtype=np.float64)[None, :, None]
+    nozzle = np.array([p["nozzle"] for p in printers.values()], dtype=np.float64)[None, :, None]
+    watts = np.array([p["watts"] for p in printers.values()], dtype=np.float64)[None, :, None]
+    density = np.array(list(materials.values()), dtype=np.float64)[None, None, :]
+
+    effective = slicer_volume_adjustment(vol, infill, walls)
+    weight_g = effective * density
+    material = np.round(weight_g / 1000 * cost_per_kg, 2)
+    extrusion_rate = speed * layer_height * nozzle
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hours = np.where(extrusion_rate > 0, np.round(effective * 1000 / extrusion_rate / 3600, 2), 0.0)
+    # Weight depends on the material, time on the printer: expand both to the full grid
+    shape = np.broadcast_shapes(weight_g.shape, hours.shape)
+    weight_g = np.broadcast_to(weight_g, shape)
+    material = np.broadcast_to(material, shape)
+    hours = np.broadcast_to(hours, shape)
+    electricity = watts / 1000 * hours * electricity_rate
+    labor = hours * labor_rate
+    base = material + electricity + labor
+    price = base * (1 + profit_margin / 100)
+    return {
+        "printers": list(printers), "materials": list(materials),
+        "weight_g": weight_g, "hours": hours, "material": material, "electricity": electricity,
+        "labor": labor, "base": base, "price": price,
+    }
+
+def quote_comparison(matrix, gst_percent, delivery_fee):
+    """One row per printer x material with batch totals, cheapest first."""
+    n_printers, n_materials = len(matrix["printers"]), len(matrix["materials"])
+    subtotal = matrix["price"].sum(axis=0)
+    hours = matrix["hours"].sum(axis=0)
+    grand_total = subtotal * (1 + gst_percent / 100) + delivery_fee
+    df = pd.DataFrame({
+        "Printer": np.repeat(matrix["printers"], n_materials),
+        "Material": np.tile(matrix["materials"], n_printers),
+        "Print Time (hr)": hours.ravel().round(2),
+        "Weight (g)": matrix["weight_g"].sum(axis=0).ravel().round(1),
+        "Material (₹)": matrix["material"].sum(axis=0).ravel().round(2),
+        "Subtotal (₹)": subtotal.ravel().round(2),
+        "Grand Total (₹)": grand_total.ravel().round(2),
+    })
+    return df.sort_values(["Grand Total (₹)", "Print Time (hr)"], kind="stable").reset_index(drop=True)
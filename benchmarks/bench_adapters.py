@@ -0,0 +1,100 @@
+"""
+Latency comparison: browserless site adapters vs the Playwright scraper.
+
+Serves the recorded-style fixture pages in benchmarks/fixtures/ from a
+local HTTP server, then times each adapter (fetch + parse on the pooled
+HTTP client), parse-only, and, unless --skip-browser, the full
+Playwright path on the same pages. Works offline.
+
+Usage:
+    python benchmarks/bench_adapters.py --rounds 20 --latency-ms 100
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+sys.path.insert(0, ROOT)
+
+from site_adapters import MakerWorldAdapter, PrintablesAdapter, ThingiverseAdapter  # noqa: E402
+
+CASES = [
+    (MakerWorldAdapter(), "makerworld_model.html"),
+    (PrintablesAdapter(), "printables_model.html"),
+    (ThingiverseAdapter(), "thingiverse_thing.html"),
+]
+
+
+def start_fixture_server(latency_ms):
+    class Handler(SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(latency_ms / 1000)
+            super().do_GET()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(Handler, directory=FIXTURES))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def timed(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--latency-ms", type=int, default=100)
+    parser.add_argument("--skip-browser", action="store_true")
+    args = parser.parse_args()
+
+    server = start_fixture_server(args.latency_ms)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    if not args.skip_browser:
+        from scraper import _scrape_page, get_browser_pool
+        pool = get_browser_pool()
+        pool.warm_up().result()
+
+        def browser_scrape(url):
+            result = pool.submit(lambda b: _scrape_page(b, url, lambda msg: None)).result()
+            if "error" in result:
+                raise RuntimeError(result["error"])
+            return result
+
+    rows = []
+    for adapter, name in CASES:
+        url = f"{base}/{name}"
+        with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+            page_html = f.read()
+        chars = len(adapter.scrape(url, page_html)["text"])
+        rows.append((adapter.name, "parse only", *timed(lambda: adapter.scrape(url, page_html), args.rounds), chars))
+        rows.append((adapter.name, "adapter (http)", *timed(lambda: adapter.scrape(url), args.rounds), chars))
+        if not args.skip_browser:
+            browser_chars = len(browser_scrape(url)["text"])
+            rows.append((adapter.name, "playwright", *timed(lambda: browser_scrape(url), args.rounds), browser_chars))
+
+    print(f"\n{args.rounds} rounds per case, {args.latency_ms} ms server latency")
+    print(f"{'site':<14}{'path':<18}{'median ms':>12}{'max ms':>10}{'chars':>8}")
+    for site, path, median, worst, chars in rows:
+        print(f"{site:<14}{path:<18}{median:>12.1f}{worst:>10.1f}{chars:>8}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Read/write latency of the knowledge-base backends.
+
+Always runs the local SQLite backend on a temporary database seeded with
+--rows entries. With --sheets it also runs Google Sheets (needs [gsheets]
+in .streamlit/secrets.toml) against a scratch worksheet that is deleted
+afterwards, so the real history is never touched.
+
+Usage:
+    python benchmarks/bench_kb_backends.py --rows 5000 --rounds 20
+    python benchmarks/bench_kb_backends.py --rows 500 --rounds 5 --sheets
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from kb_store import HISTORY_COLUMNS, SQLiteBackend  # noqa: E402
+
+
+def make_row(i):
+    return [
+        "Web Scrape", f"https://example.com/model/{i}", "Walls 1.2 mm, supports under the chin. " * 8,
+        0, f"Model {i}: printable without supports", "#pla #miniature", "[]",
+        datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    ]
+
+
+def timed(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def bench_sqlite(rows, rounds):
+    path = os.path.join(tempfile.mkdtemp(), "kb_bench.db")
+    backend = SQLiteBackend(path)
+    seed = timed(lambda: backend.add_many([make_row(i) for i in range(rows)]), 1)
+    counter = iter(range(rows, rows + 10 * rounds))
+    results = [
+        ("seed (add_many)", *seed),
+        ("add one", *timed(lambda: backend.add(make_row(next(counter))), rounds)),
+        ("load (cold)", *timed(lambda: backend.load(refresh=True), rounds)),
+        ("load (warm)", *timed(lambda: backend.load(), rounds)),
+    ]
+
+    def add_then_load():
+        backend.add(make_row(next(counter)))
+        backend.load()
+    results.append(("add + load", *timed(add_then_load, rounds)))
+    results.append(("stats", *timed(backend.stats, rounds)))
+    return results
+
+
+def bench_sheets(rows, rounds):
+    from database import get_gspread_client
+    from history_mirror import HistoryMirror
+
+    client = get_gspread_client()
+    if client is None:
+        raise SystemExit("No Google Sheets client; add [gsheets] to .streamlit/secrets.toml")
+    from config import SHEET_NAME
+    sh = client.open(SHEET_NAME)
+    wks = sh.add_worksheet(title=f"kb_bench_{uuid.uuid4().hex[:8]}", rows=rows + 10 * rounds + 10, cols=len(HISTORY_COLUMNS))
+    try:
+        seed = timed(lambda: wks.append_rows([HISTORY_COLUMNS] + [make_row(i) for i in range(rows)]), 1)
+        counter = iter(range(rows, rows + 10 * rounds))
+        mirror = HistoryMirror(os.path.join(tempfile.mkdtemp(), "mirror_bench.db"), sync_interval=0)
+        results = [
+            ("seed (append_rows)", *seed),
+            ("add one (append_row)", *timed(lambda: wks.append_row(make_row(next(counter))), rounds)),
+            ("get_all_records", *timed(wks.get_all_records, rounds)),
+            ("load (full resync)", *timed(lambda: (mirror.sync(wks, full=True), mirror.frame()), rounds)),
+            ("load (incremental)", *timed(lambda: (mirror.sync(wks), mirror.frame()), rounds)),
+        ]
+
+        def add_then_load():
+            wks.append_row(make_row(next(counter)))
+            mirror.mark_stale()
+            mirror.sync(wks)
+            mirror.frame()
+        results.append(("add + load", *timed(add_then_load, rounds)))
+        return results
+    finally:
+        sh.del_worksheet(wks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000, help="Entries to seed before timing")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--sheets", action="store_true", help="Also benchmark Google Sheets (network)")
+    args = parser.parse_args()
+
+    table = [("sqlite", *r) for r in bench_sqlite(args.rows, args.rounds)]
+    if args.sheets:
+        table += [("sheets", *r) for r in bench_sheets(args.rows, args.rounds)]
+
+    print(f"\n{args.rows} seeded rows, {args.rounds} rounds per case")
+    print(f"{'backend':<10}{'operation':<24}{'median ms':>12}{'max ms':>10}")
+    for backend, op, median, worst in table:
+        print(f"{backend:<10}{op:<24}{median:>12.2f}{worst:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Print-farm scheduler on synthetic backlogs.
+
+Builds a farm of --printers printers (the PRINTER_PROFILES mix, some with
+0.6 mm nozzles, each loaded with a subset of materials) and backlogs of
+--jobs print jobs with long-tailed print times, then compares:
+
+  arrival   jobs in order onto the compatible printer free first
+            (roughly what a spreadsheet plan does)
+  lpt       longest job first onto the printer that finishes it earliest
+  lpt+ls    lpt followed by the move/swap local search
+
+Makespans are reported against the lower bound, so 1.00 is optimal.
+
+Usage:
+    python benchmarks/bench_scheduler.py --jobs 1000 5000 10000 --printers 40
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import MATERIAL_DENSITIES, PRINTER_PROFILES, SCHEDULER_IMPROVE_SECONDS  # noqa: E402
+from print_scheduler import schedule  # noqa: E402
+
+MATERIALS = list(MATERIAL_DENSITIES)
+
+
+def make_farm(n, rng):
+    profiles = list(PRINTER_PROFILES.items())
+    farm = []
+    for i in range(n):
+        name, profile = profiles[i % len(profiles)]
+        farm.append({
+            "id": i, "name": f"{name} #{i}", "speed": profile["speed"],
+            "nozzle": 0.6 if i % 5 == 4 else profile["nozzle"],
+            # Every printer runs PLA; the rest of the spool rack varies
+            "materials": ["PLA"] + rng.sample(MATERIALS[1:], rng.randint(0, len(MATERIALS) - 1)),
+        })
+    return farm
+
+
+def make_backlog(n, rng):
+    return [{
+        "id": i,
+        "hours": round(min(rng.lognormvariate(1.2, 0.8), 72), 2),
+        "material": rng.choices(MATERIALS, weights=[60, 25, 10, 5])[0],
+        "nozzle": 0.6 if rng.random() < 0.1 else None,
+    } for i in range(n)]
+
+
+def arrival_order(jobs, farm):
+    """Baseline: each job in arrival order onto the compatible printer free first."""
+    loads = np.zeros(len(farm))
+    for job in jobs:
+        cand = [i for i, p in enumerate(farm)
+                if job["material"] in p["materials"] and (job["nozzle"] is None or job["nozzle"] == p["nozzle"])]
+        if cand:
+            k = min(cand, key=lambda i: loads[i])
+            loads[k] += job["hours"] * 60 / farm[k]["speed"]
+    return float(loads.max())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--printers", type=int, default=40)
+    parser.add_argument("--improve-seconds", type=float, default=SCHEDULER_IMPROVE_SECONDS)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    farm = make_farm(args.printers, rng)
+    print(f"\n{args.printers} printers, reference speed 60 mm/s, local search budget {args.improve_seconds}s")
+    print(f"{'jobs':>7}{'method':>10}{'makespan h':>13}{'/ bound':>9}{'ms':>9}{'moves':>7}")
+    for n in args.jobs:
+        jobs = make_backlog(n, rng)
+        started = time.perf_counter()
+        baseline = arrival_order(jobs, farm)
+        baseline_ms = (time.perf_counter() - started) * 1000
+        lpt = schedule(jobs, farm, improve_seconds=0)
+        ls = schedule(jobs, farm, improve_seconds=args.improve_seconds)
+        bound = ls["lower_bound_hours"]
+        rows = [
+            ("arrival", baseline, baseline_ms, 0),
+            ("lpt", lpt["makespan_hours"], lpt["elapsed_ms"], 0),
+            ("lpt+ls", ls["makespan_hours"], ls["elapsed_ms"], ls["moves"]),
+        ]
+        for method, makespan, ms, moves in rows:
+            print(f"{n:>7}{method:>10}{makespan:>13.1f}{makespan / bound:>9.3f}{ms:>9.1f}{moves:>7}")
+        if ls["unscheduled"]:
+            print(f"{'':>7}{len(ls['unscheduled'])} jobs had no compatible printer")
+
+
+if __name__ == "__main__":
+    main()
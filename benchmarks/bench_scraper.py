@@ -0,0 +1,115 @@
+"""
+Scraper throughput benchmark against a local fixture HTTP server.
+
+Serves synthetic model pages (text, gallery images, artificial latency) on
+127.0.0.1 and compares sequential scrape_model_page calls with scrape_many
+at several concurrency levels. Every run bypasses the scrape cache
+(refresh=True), so each mode times real page loads, not cache hits.
+
+Usage:
+    python benchmarks/bench_scraper.py --pages 40 --latency-ms 300
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper import scrape_model_page, scrape_many, get_browser_pool  # noqa: E402
+
+PAGE_TEMPLATE = """<!doctype html>
+<html><head><title>Fixture model {n}</title></head>
+<body>
+<nav>Home | Models | Sign in to follow creators | Accept cookies to continue</nav>
+<main>
+<h1>Articulated fixture dragon #{n} - print in place</h1>
+<p>Printed in PLA at 0.2 mm layer height with 15% infill, no supports required for the body parts.</p>
+<p>Recommended nozzle temperature 210 C and bed temperature 60 C; total print time about 4 h 30 min.</p>
+{gallery}
+{comments}
+</main>
+</body></html>"""
+
+# 1x1 transparent GIF; served for every gallery image
+PIXEL = bytes.fromhex("47494638396101000100800000000000ffffff21f90401000000002c00000000010001000002024401003b")
+
+
+def make_handler(latency_s):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(latency_s)
+            if self.path.startswith("/img/"):
+                self.send_response(200)
+                self.send_header("Content-Type", "image/gif")
+                self.send_header("Content-Length", str(len(PIXEL)))
+                self.end_headers()
+                self.wfile.write(PIXEL)
+                return
+            n = self.path.rsplit("/", 1)[-1]
+            gallery = "\n".join(f'<img src="/img/{n}-{i}.gif" width="640" height="480">' for i in range(12))
+            comments = "\n".join(f"<p>User{i} commented 3 days ago: great model, thanks for sharing it with everyone!</p>" for i in range(40))
+            body = PAGE_TEMPLATE.format(n=n, gallery=gallery, comments=comments).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return FixtureHandler
+
+
+def start_fixture_server(latency_ms):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(latency_ms / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--latency-ms", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--skip-sequential", action="store_true")
+    args = parser.parse_args()
+
+    server = start_fixture_server(args.latency_ms)
+    # Several hostnames for the same server so per-domain limits are exercised
+    hosts = ["127.0.0.1", "localhost"]
+    port = server.server_address[1]
+    urls = [f"http://{hosts[i % len(hosts)]}:{port}/model/{i}" for i in range(args.pages)]
+
+    get_browser_pool().warm_up().result()
+
+    def summarize(mode, results, elapsed):
+        errors = sum("error" in r for r in results)
+        kb = sum(r.get("stats", {}).get("bytes", 0) for r in results) / 1024
+        rows.append((mode, elapsed, errors, kb / max(1, len(results))))
+
+    rows = []
+    if not args.skip_sequential:
+        started = time.perf_counter()
+        results = [scrape_model_page(u, refresh=True) for u in urls]
+        summarize("sequential", results, time.perf_counter() - started)
+
+    for c in args.concurrency:
+        started = time.perf_counter()
+        results = [r for _, r in scrape_many(urls, concurrency=c, per_domain=c, domain_delay_ms=0, refresh=True)]
+        summarize(f"scrape_many c={c}", results, time.perf_counter() - started)
+
+    print(f"\n{args.pages} pages, {args.latency_ms} ms server latency")
+    print(f"{'mode':<22}{'seconds':>10}{'pages/s':>10}{'KB/page':>10}{'errors':>8}")
+    for mode, elapsed, errors, kb in rows:
+        print(f"{mode:<22}{elapsed:>10.2f}{args.pages / elapsed:>10.2f}{kb:>10.1f}{errors:>8}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Minimal thread-safe circuit breaker.
+Opens after repeated failures so callers fail fast instead of waiting on
+timeouts and retries; recovery is detected by a background probe.
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+from config import get_logger
+
+logger = get_logger("circuit_breaker")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is short-circuited by an open breaker."""
+
+    def __init__(self, name: str, retry_in: float):
+        self.name = name
+        self.retry_in = retry_in
+        super().__init__(f"Circuit '{name}' is open (next probe in {retry_in:.0f}s)")
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures.
+    open -> half_open after `reset_timeout` seconds; if a `probe` is given it
+    runs in a background thread while calls keep short-circuiting, otherwise
+    a single trial call is let through.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 probe: Optional[Callable[[], bool]] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe = probe
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._short_circuits = 0
+        self._trial_in_flight = False
+        self._probing = False
+        self._last_error = None
+        self._lock = threading.Lock()
+
+    # --- STATE ---
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._advance()
+            return self._state
+
+    def _advance(self):
+        """Move open -> half_open once the reset timeout elapsed (lock held)."""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._trial_in_flight = False
+            logger.info(f"Circuit '{self.name}' half-open")
+            if self.probe and not self._probing:
+                self._probing = True
+                threading.Thread(target=self._run_probe, name=f"{self.name}-probe", daemon=True).start()
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def _run_probe(self):
+        try:
+            ok = bool(self.probe())
+        except Exception as e:
+            ok = False
+            self._last_error = str(e)
+        with self._lock:
+            self._probing = False
+            if self._state != HALF_OPEN:
+                return
+            if ok:
+                self._state = CLOSED
+                self._failures = 0
+                logger.info(f"Circuit '{self.name}' closed (probe succeeded)")
+            else:
+                self._open()
+                logger.warning(f"Circuit '{self.name}' re-opened (probe failed)")
+
+    # --- CALL GATING ---
+    def before_call(self):
+        """Raise CircuitOpenError if the call must be short-circuited."""
+        with self._lock:
+            self._advance()
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and not self.probe and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self._short_circuits += 1
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError(self.name, retry_in)
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"Circuit '{self.name}' closed")
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self, error: Optional[Exception] = None):
+        with self._lock:
+            self._failures += 1
+            if error is not None:
+                self._last_error = str(error)
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._open()
+                logger.warning(f"Circuit '{self.name}' opened after {self._failures} failures")
+
+    def reset(self):
+        """Force the breaker closed (e.g. from a manual re-check)."""
+        self.record_success()
+
+    def snapshot(self) -> dict:
+        """Serializable view of the breaker for dashboards."""
+        with self._lock:
+            self._advance()
+            retry_in = 0.0
+            if self._state == OPEN:
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+            return {
+                "name": self.name,
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "short_circuited_calls": self._short_circuits,
+                "next_probe_in": round(retry_in, 1),
+                "probing": self._probing,
+                "last_error": self._last_error,
+            }
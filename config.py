@@ -16,10 +16,29 @@ LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 LOCAL_AI_URL = os.getenv("LOCAL_AI_URL", "http://127.0.0.1:8000")
 LOCAL_AI_TIMEOUT = int(os.getenv("LOCAL_AI_TIMEOUT", "60"))
 LOCAL_AI_HEALTH_CHECK_TIMEOUT = int(os.getenv("LOCAL_AI_HEALTH_CHECK_TIMEOUT", "2"))
+AI_MODEL = os.getenv("AI_MODEL", "phi3:mini")
+AI_PROMPT_MAX_CHARS = int(os.getenv("AI_PROMPT_MAX_CHARS", "4000"))
+AI_POOL_MAXSIZE = int(os.getenv("AI_POOL_MAXSIZE", "10"))
+AI_BREAKER_FAILURE_THRESHOLD = int(os.getenv("AI_BREAKER_FAILURE_THRESHOLD", "3"))
+AI_BREAKER_RESET_SECONDS = int(os.getenv("AI_BREAKER_RESET_SECONDS", "30"))
 
 # ===== Database Configuration =====
+# Primary knowledge-base store: "sqlite" (local) or "sheets" (Google Sheets)
+KB_BACKEND = os.getenv("KB_BACKEND", "sqlite").lower()
+KB_DB_PATH = os.getenv("KB_DB_PATH", "knowledge.db")
+# With the SQLite primary, also replicate entries to Google Sheets when configured
+KB_SHEETS_REPLICA = os.getenv("KB_SHEETS_REPLICA", "true").lower() == "true"
 SHEET_NAME = os.getenv("SHEET_NAME", "printer_brain")
 WORKSHEET_NAME = os.getenv("WORKSHEET_NAME", "history")
+KB_SPOOL_PATH = os.getenv("KB_SPOOL_PATH", "kb_spool.db")
+KB_BATCH_SIZE = int(os.getenv("KB_BATCH_SIZE", "50"))
+KB_FLUSH_INTERVAL_SECONDS = float(os.getenv("KB_FLUSH_INTERVAL_SECONDS", "2"))
+KB_RETRY_MAX_SECONDS = float(os.getenv("KB_RETRY_MAX_SECONDS", "60"))
+KB_SPOOL_MAX_ATTEMPTS = int(os.getenv("KB_SPOOL_MAX_ATTEMPTS", "8"))
+HISTORY_MIRROR_PATH = os.getenv("HISTORY_MIRROR_PATH", "history_mirror.db")
+HISTORY_SYNC_INTERVAL_SECONDS = float(os.getenv("HISTORY_SYNC_INTERVAL_SECONDS", "15"))
+# Rows read and encoded per step when exporting the knowledge base
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "5000"))
 
 # ===== Logging Configuration =====
 LOG_FILE = os.getenv("LOG_FILE", "app.log")
@@ -27,12 +46,76 @@ ENABLE_FILE_LOGGING = os.getenv("ENABLE_FILE_LOGGING", "true").lower() == "true"
 
 # ===== API & Scraper Configuration =====
 SCRAPER_TIMEOUT = int(os.getenv("SCRAPER_TIMEOUT", "45000"))
+SCRAPER_CONCURRENCY = int(os.getenv("SCRAPER_CONCURRENCY", "4"))
+SCRAPER_PER_DOMAIN_CONCURRENCY = int(os.getenv("SCRAPER_PER_DOMAIN_CONCURRENCY", "2"))
+SCRAPER_DOMAIN_DELAY_MS = int(os.getenv("SCRAPER_DOMAIN_DELAY_MS", "500"))
+SCRAPER_PAGE_BUDGET_MS = int(os.getenv("SCRAPER_PAGE_BUDGET_MS", "30000"))
+SCRAPER_SETTLE_MS = int(os.getenv("SCRAPER_SETTLE_MS", "2000"))
+SCRAPER_SCROLL_MAX_MS = int(os.getenv("SCRAPER_SCROLL_MAX_MS", "4000"))
+SCRAPER_SCROLL_IDLE_MS = int(os.getenv("SCRAPER_SCROLL_IDLE_MS", "400"))
+SCRAPER_BLOCK_RESOURCE_TYPES = os.getenv("SCRAPER_BLOCK_RESOURCE_TYPES", "image,media,font,stylesheet").split(",")
+SCRAPER_BLOCK_HOSTS = os.getenv(
+    "SCRAPER_BLOCK_HOSTS",
+    "google-analytics.com,googletagmanager.com,doubleclick.net,googlesyndication.com,facebook.net,"
+    "connect.facebook.net,hotjar.com,segment.io,segment.com,mixpanel.com,clarity.ms,sentry.io,"
+    "intercom.io,amplitude.com,tiktok.com,criteo.com"
+).split(",")
+SCRAPER_RECYCLE_AFTER = int(os.getenv("SCRAPER_RECYCLE_AFTER", "50"))
+SCRAPER_USE_ADAPTERS = os.getenv("SCRAPER_USE_ADAPTERS", "true").lower() == "true"
+SCRAPER_HTTP_TIMEOUT = int(os.getenv("SCRAPER_HTTP_TIMEOUT", "15"))
+SCRAPER_ADAPTER_MIN_TEXT = int(os.getenv("SCRAPER_ADAPTER_MIN_TEXT", "200"))
+THINGIVERSE_API_TOKEN = os.getenv("THINGIVERSE_API_TOKEN", "")
+IMAGE_KEEP_MAX = int(os.getenv("IMAGE_KEEP_MAX", "24"))
+IMAGE_FETCH_CONCURRENCY = int(os.getenv("IMAGE_FETCH_CONCURRENCY", "8"))
+IMAGE_FETCH_MAX_BYTES = int(os.getenv("IMAGE_FETCH_MAX_BYTES", str(4 * 1024 * 1024)))
+IMAGE_HASH_DISTANCE = int(os.getenv("IMAGE_HASH_DISTANCE", "10"))
 REQUEST_MAX_RETRIES = int(os.getenv("REQUEST_MAX_RETRIES", "3"))
 REQUEST_RETRY_DELAY = int(os.getenv("REQUEST_RETRY_DELAY", "2"))
 
+# ===== Health Monitor =====
+HEALTH_CHECK_INTERVAL_SECONDS = int(os.getenv("HEALTH_CHECK_INTERVAL_SECONDS", "30"))
+
+# ===== Scraper Metrics =====
+METRICS_DB_PATH = os.getenv("METRICS_DB_PATH", "metrics.db")
+METRICS_RETENTION_SECONDS = int(os.getenv("METRICS_RETENTION_SECONDS", str(7 * 86400)))
+
+# ===== Job Queue =====
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", "jobs.db")
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "600"))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1"))
+JOB_EMBEDDED_WORKERS = int(os.getenv("JOB_EMBEDDED_WORKERS", "2"))
+
+# ===== Quote Pricing =====
+PRINTER_PROFILES = {
+    "Ender 3 / V2": {"speed": 50, "nozzle": 0.4, "watts": 350},
+    "Bambu P1/X1": {"speed": 120, "nozzle": 0.4, "watts": 1000},
+    "Prusa MK3/4": {"speed": 70, "nozzle": 0.4, "watts": 200}
+}
+MATERIAL_DENSITIES = {"PLA": 1.24, "PETG": 1.27, "ABS": 1.04, "TPU": 1.21}
+# Defaults for server-computed quotes; admins can override them via /admin/pricing
+QUOTE_COST_PER_KG = float(os.getenv("QUOTE_COST_PER_KG", "1200"))
+QUOTE_ELECTRICITY_RATE = float(os.getenv("QUOTE_ELECTRICITY_RATE", "10"))
+QUOTE_LABOR_RATE = float(os.getenv("QUOTE_LABOR_RATE", "200"))
+QUOTE_PROFIT_MARGIN = float(os.getenv("QUOTE_PROFIT_MARGIN", "50"))
+QUOTE_GST_PERCENT = float(os.getenv("QUOTE_GST_PERCENT", "18"))
+QUOTE_DELIVERY_FEE = float(os.getenv("QUOTE_DELIVERY_FEE", "100"))
+QUOTE_BULK_MAX = int(os.getenv("QUOTE_BULK_MAX", "1000"))
+QUOTE_MAX_UPLOAD_MB = int(os.getenv("QUOTE_MAX_UPLOAD_MB", "50"))
+
+# ===== Print-Farm Scheduler =====
+# Product print times are hours on a printer running at this speed (mm/s)
+SCHEDULER_REFERENCE_SPEED = float(os.getenv("SCHEDULER_REFERENCE_SPEED", "60"))
+SCHEDULER_IMPROVE_SECONDS = float(os.getenv("SCHEDULER_IMPROVE_SECONDS", "0.2"))
+
 # ===== Cache Configuration =====
 ENABLE_CACHE = os.getenv("ENABLE_CACHE", "true").lower() == "true"
 CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "3600"))
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", "ai_cache.db")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "500"))
+SCRAPE_CACHE_FRESH_SECONDS = int(os.getenv("SCRAPE_CACHE_FRESH_SECONDS", "21600"))
+SCRAPE_CACHE_MAX_ENTRIES = int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", "2000"))
 
 # ===== CORS Configuration =====
 ENABLE_CORS = os.getenv("ENABLE_CORS", "true").lower() == "true"
@@ -0,0 +1,145 @@
+"""
+Relevance-ranked context builder for LLM prompts.
+Scores scraped page lines with vectorized features (print-setting keywords,
+numbers with units, boilerplate, duplicates) and packs the best ones into
+the prompt budget instead of blindly slicing the first N characters.
+"""
+
+import re
+import numpy as np
+from config import AI_PROMPT_MAX_CHARS, get_logger
+
+logger = get_logger("context_builder")
+
+# --- FEATURES ---
+PRINT_KEYWORDS = [
+    "layer height", "layer", "infill", "support", "supports", "tree support", "brim", "raft",
+    "skirt", "nozzle", "temperature", "temp", "bed", "hotend", "perimeter", "perimeters",
+    "wall", "walls", "top layers", "bottom layers", "speed", "retraction", "cooling", "fan",
+    "overhang", "bridging", "bridge", "orientation", "print time", "filament", "material",
+    "pla", "petg", "abs", "asa", "tpu", "nylon", "resin", "multicolor", "ams", "scale",
+    "tolerance", "clearance", "print-in-place", "assembly", "screws", "magnets", "glue",
+    "post-processing", "sanding", "printer", "slicer", "cura", "prusaslicer", "bambu studio",
+    "orca", "3mf", "stl", "step", "license", "dimensions", "size", "weight",
+]
+
+BOILERPLATE_PATTERNS = [
+    r"cookie", r"sign (?:in|up)", r"log ?in", r"privacy", r"terms of", r"newsletter",
+    r"subscribe", r"follow(?:ers|ing)?\b", r"share\b", r"report\b", r"download (?:the )?app",
+    r"all rights reserved", r"copyright", r"\b\d+\s+(?:minutes?|hours?|days?|weeks?|months?|years?)\s+ago\b",
+    r"\breply\b", r"\blikes?\b", r"@\w+",
+]
+
+_KEYWORD_RE = re.compile(r"\b(?:" + "|".join(re.escape(k) for k in sorted(PRINT_KEYWORDS, key=len, reverse=True)) + r")\b")
+_UNIT_RE = re.compile(r"\d+(?:[.,]\d+)?\s?(?:mm/s|mm|cm|°c|c\b|%|g\b|kg|h\b|hr|hrs|hours?|min|minutes?|w\b)")
+_BOILERPLATE_RE = re.compile("|".join(BOILERPLATE_PATTERNS))
+_NORMALIZE_RE = re.compile(r"[^a-z0-9]+")
+
+KEYWORD_WEIGHT = 2.0
+UNIT_WEIGHT = 1.5
+BOILERPLATE_WEIGHT = 3.0
+MAX_FEATURE_HITS = 4
+LONG_LINE_CHARS = 600
+
+
+def _count_per_line(pattern, blob, line_starts, n_lines):
+    """Count regex matches per line in a single pass over the joined text."""
+    positions = np.fromiter((m.start() for m in pattern.finditer(blob)), dtype=np.int64)
+    if positions.size == 0:
+        return np.zeros(n_lines, dtype=np.float32)
+    line_ids = np.searchsorted(line_starts, positions, side="right") - 1
+    return np.bincount(line_ids, minlength=n_lines).astype(np.float32)
+
+
+def score_lines(lines):
+    """
+    Score each line for relevance to a print analysis.
+    Duplicate lines (after normalization) score -inf so they are never packed twice.
+    """
+    n = len(lines)
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    lowered = [l.lower() for l in lines]
+    lengths = np.fromiter((len(l) for l in lowered), dtype=np.int64, count=n)
+    line_starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+    blob = "\n".join(lowered)
+
+    keywords = np.minimum(_count_per_line(_KEYWORD_RE, blob, line_starts, n), MAX_FEATURE_HITS)
+    units = np.minimum(_count_per_line(_UNIT_RE, blob, line_starts, n), MAX_FEATURE_HITS)
+    boilerplate = np.minimum(_count_per_line(_BOILERPLATE_RE, blob, line_starts, n), MAX_FEATURE_HITS)
+
+    # Early lines carry the title and description; decay slowly with position
+    position = 1.0 / (1.0 + np.arange(n, dtype=np.float32) / 50.0)
+    # Very long lines are usually concatenated chrome or comment walls
+    length_penalty = np.clip((lengths - LONG_LINE_CHARS) / LONG_LINE_CHARS, 0, 2).astype(np.float32)
+
+    scores = (
+        KEYWORD_WEIGHT * keywords
+        + UNIT_WEIGHT * units
+        - BOILERPLATE_WEIGHT * boilerplate
+        + position
+        - length_penalty
+    )
+
+    hashes = np.fromiter((hash(_NORMALIZE_RE.sub(" ", l).strip()) for l in lowered), dtype=np.int64, count=n)
+    _, first_idx = np.unique(hashes, return_index=True)
+    is_duplicate = np.ones(n, dtype=bool)
+    is_duplicate[first_idx] = False
+    scores[is_duplicate] = -np.inf
+
+    return scores
+
+
+def build_context(text: str, max_chars: int = AI_PROMPT_MAX_CHARS) -> str:
+    """Pack the highest-scoring lines of `text` into `max_chars`, preserving page order."""
+    if not text or max_chars <= 0:
+        return ""
+    if len(text) <= max_chars:
+        return text
+
+    lines = [l.strip() for l in text.splitlines() if l.strip()]
+    scores = score_lines(lines)
+    lengths = np.fromiter((len(l) + 1 for l in lines), dtype=np.int64, count=len(lines))
+
+    order = np.argsort(-scores, kind="stable")
+    order = order[scores[order] > 0]
+
+    # Take the best prefix in one shot, then fill remaining room greedily
+    cumulative = np.cumsum(lengths[order])
+    n_prefix = int(np.searchsorted(cumulative, max_chars, side="right"))
+    selected = list(order[:n_prefix])
+    remaining = max_chars - (int(cumulative[n_prefix - 1]) if n_prefix else 0)
+    for idx in order[n_prefix:]:
+        if lengths[idx] <= remaining:
+            selected.append(idx)
+            remaining -= lengths[idx]
+        if remaining < 32:
+            break
+
+    if not selected:
+        return text[:max_chars]
+
+    selected.sort()
+    context = "\n".join(lines[i] for i in selected)
+    logger.info(f"Context built: kept {len(selected)}/{len(lines)} lines, {len(text)} -> {len(context)} chars")
+    return context
+
+
+def build_prompt(instruction: str, text: str, max_chars: int = AI_PROMPT_MAX_CHARS) -> str:
+    """Instruction followed by the relevance-packed context, within `max_chars` overall."""
+    budget = max_chars - len(instruction) - 2
+    return f"{instruction}\n\n{build_context(text, budget)}"
+
+
+def fit_prompt(prompt: str, max_chars: int = AI_PROMPT_MAX_CHARS) -> str:
+    """
+    Shrink an oversized prompt. The first paragraph is treated as the
+    instruction and kept verbatim; the rest is relevance-packed.
+    """
+    if not prompt or len(prompt) <= max_chars:
+        return prompt
+    instruction, _, body = prompt.partition("\n\n")
+    if not body or len(instruction) >= max_chars // 2:
+        return build_context(prompt, max_chars)
+    return build_prompt(instruction, body, max_chars)
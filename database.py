@@ -1,9 +1,15 @@
+import threading
+import time
 import streamlit as st
 import gspread
 import pandas as pd
 from datetime import datetime
+from google.auth.exceptions import RefreshError
 from google.oauth2.service_account import Credentials
-from config import get_logger, SHEET_NAME, WORKSHEET_NAME
+from config import get_logger, SHEET_NAME, WORKSHEET_NAME, KB_BACKEND, KB_SHEETS_REPLICA, KB_RETRY_MAX_SECONDS
+from history_mirror import get_history_mirror
+from kb_spool import KBSpool
+from kb_store import HISTORY_COLUMNS, KBBackend, SQLiteBackend
 
 logger = get_logger("database")
 
@@ -14,103 +20,374 @@ SCOPES = [
 ]
 
 # --- AUTHENTICATION ---
+# Process-wide client and handles: credentials are built and authorized once,
+# the spreadsheet/worksheet metadata is fetched once, and google-auth refreshes
+# the access token on its own. Auth failures drop the cache and reconnect.
+_conn_lock = threading.RLock()
+_client = None
+_worksheet = None
+_initialized = False
+_request_stats = {"requests": 0, "authorizations": 0, "reconnects": 0}
+
+def _count_request(response, *args, **kwargs):
+    _request_stats["requests"] += 1
+
+def _http_session(client):
+    """The client's requests session (gspread >= 6: http_client.session, 5.x: session)."""
+    http_client = getattr(client, "http_client", None)
+    return getattr(http_client, "session", None) or getattr(client, "session", None)
+
 def get_gspread_client():
     """
-    Authenticate using Streamlit Secrets.
+    Authenticate using Streamlit Secrets (cached for the process).
     Expected secret structure:
     [gsheets]
     type = "service_account"
     project_id = "..."
     ...
     """
+    global _client
+    if _client is not None:
+        return _client
+
     if "gsheets" not in st.secrets:
         error_msg = "Missing '[gsheets]' section in secrets.toml"
         logger.error(error_msg)
         st.error(f"❌ {error_msg}")
         return None
 
-    try:
-        creds_dict = dict(st.secrets["gsheets"])
-        creds = Credentials.from_service_account_info(creds_dict, scopes=SCOPES)
-        client = gspread.authorize(creds)
-        logger.info("gspread client authenticated successfully")
-        return client
-    except Exception as e:
-        error_msg = f"Authentication failed: {str(e)}"
-        logger.error(error_msg)
-        st.error(f"❌ {error_msg}")
-        return None
+    with _conn_lock:
+        if _client is not None:
+            return _client
+        try:
+            creds_dict = dict(st.secrets["gsheets"])
+            creds = Credentials.from_service_account_info(creds_dict, scopes=SCOPES)
+            client = gspread.authorize(creds)
+            session = _http_session(client)
+            if session is not None:
+                session.hooks["response"].append(_count_request)
+            _request_stats["authorizations"] += 1
+            _client = client
+            logger.info("gspread client authenticated successfully")
+            return client
+        except Exception as e:
+            error_msg = f"Authentication failed: {str(e)}"
+            logger.error(error_msg)
+            st.error(f"❌ {error_msg}")
+            return None
 
-# --- CORE FUNCTIONS ---
-def check_connection():
-    """Checks if we can access the Google Sheet."""
-    if "gsheets" not in st.secrets:
-        return {"status": False, "error": "Configuration Missing"}
-        
-    try:
-        client = get_gspread_client()
-        if not client: 
-            return {"status": False, "error": "Auth Failed"}
-        
-        # Try to open the sheet
-        sh = client.open(SHEET_NAME)
-        logger.info(f"Database connection verified for sheet '{SHEET_NAME}'")
-        return {"status": True, "error": None}
-    except gspread.SpreadsheetNotFound as e:
-        error_msg = f"Sheet '{SHEET_NAME}' not found"
-        logger.error(error_msg)
-        return {"status": False, "error": error_msg}
-    except Exception as e:
-        error_msg = f"DB CONNECTION ERROR: {str(e)}"
-        logger.error(error_msg)
-        return {"status": False, "error": str(e)}
+def get_worksheet():
+    """Cached handle to the history worksheet; None if there is no client."""
+    global _worksheet
+    if _worksheet is not None:
+        return _worksheet
+    with _conn_lock:
+        if _worksheet is None:
+            client = get_gspread_client()
+            if not client:
+                return None
+            _worksheet = client.open(SHEET_NAME).worksheet(WORKSHEET_NAME)
+        return _worksheet
 
-def init_db():
+def reset_connection():
+    """Drop the cached client and handles; the next call re-authorizes."""
+    global _client, _worksheet
+    with _conn_lock:
+        _client = None
+        _worksheet = None
+
+def _is_auth_error(e):
+    if isinstance(e, RefreshError):
+        return True
+    if isinstance(e, gspread.exceptions.APIError):
+        code = getattr(e, "code", None) or getattr(getattr(e, "response", None), "status_code", None)
+        return code == 401 or "UNAUTHENTICATED" in str(e)
+    return False
+
+def with_worksheet(fn):
     """
-    Ensures the target Sheet and Worksheet exist with correct headers.
+    Run `fn(worksheet)` on the cached handle. On an auth error (revoked or
+    expired token) reconnect once and retry; other errors propagate.
     """
+    for attempt in (1, 2):
+        wks = get_worksheet()
+        if wks is None:
+            raise ConnectionError("No Google Sheets client")
+        try:
+            return fn(wks)
+        except Exception as e:
+            if attempt == 2 or not _is_auth_error(e):
+                raise
+            logger.warning(f"Google Sheets auth error, reconnecting: {str(e)}")
+            _request_stats["reconnects"] += 1
+            reset_connection()
+
+# --- WRITE-BEHIND ---
+_spool = None
+
+def _write_rows(rows):
+    with_worksheet(lambda wks: wks.append_rows(rows))
+    # Pick the new rows up on the next load instead of waiting for the interval
+    get_history_mirror().mark_stale()
+
+def get_spool():
+    """Process-wide KB spool; batches go to the sheet via append_rows on the cached handle."""
+    global _spool
+    if _spool is None:
+        with _conn_lock:
+            if _spool is None:
+                _spool = KBSpool(_write_rows)
+                # Drain rows left over from a previous run
+                _spool.start()
+    return _spool
+
+def flush_entries(timeout=30.0):
+    """Block until spooled entries are written (or `timeout`); True if none are left."""
+    return get_spool().flush(timeout)
+
+def spool_stats() -> dict:
+    return get_spool().stats()
+
+def db_request_stats() -> dict:
+    """Cumulative Sheets API requests, authorizations and reconnects in this process."""
+    return dict(_request_stats)
+
+def sheets_configured() -> bool:
     try:
-        client = get_gspread_client()
-        if not client: 
-            logger.error("Failed to initialize DB: No client")
-            return
+        return "gsheets" in st.secrets
+    except Exception:
+        return False
+
+# --- SHEETS BACKEND ---
+class SheetsBackend(KBBackend):
+    """
+    Google Sheets store: writes go through the write-behind spool, reads are
+    served from the incrementally synced local mirror.
+    """
 
+    name = "sheets"
+
+    def init(self):
+        """
+        Ensures the target Sheet and Worksheet exist with correct headers.
+        Returns True once they do; later calls are free.
+        """
+        global _initialized, _worksheet
+        if _initialized:
+            return True
         try:
-            sh = client.open(SHEET_NAME)
-            logger.info(f"Sheet '{SHEET_NAME}' opened")
-        except gspread.SpreadsheetNotFound:
-            error_msg = f"Google Sheet '{SHEET_NAME}' not found. Please create it and share with the service account email."
+            client = get_gspread_client()
+            if not client: 
+                logger.error("Failed to initialize DB: No client")
+                return False
+
+            try:
+                sh = client.open(SHEET_NAME)
+                logger.info(f"Sheet '{SHEET_NAME}' opened")
+            except gspread.SpreadsheetNotFound:
+                error_msg = f"Google Sheet '{SHEET_NAME}' not found. Please create it and share with the service account email."
+                logger.error(error_msg)
+                st.error(f"❌ {error_msg}")
+                return False
+
+            try:
+                wks = sh.worksheet(WORKSHEET_NAME)
+                logger.info(f"Worksheet '{WORKSHEET_NAME}' found")
+            except gspread.WorksheetNotFound:
+                logger.info(f"Creating new worksheet '{WORKSHEET_NAME}'")
+                wks = sh.add_worksheet(title=WORKSHEET_NAME, rows=100, cols=10)
+                wks.append_row(HISTORY_COLUMNS)
+                logger.info("Worksheet initialized with headers")
+
+            _worksheet = wks
+            _initialized = True
+            return True
+                
+        except Exception as e:
+            error_msg = f"DB INIT ERROR: {str(e)}"
             logger.error(error_msg)
             st.error(f"❌ {error_msg}")
-            return
+            return False
+
+    def add(self, row):
+        if not get_gspread_client():
+            raise ConnectionError("No Google Sheets client")
+        get_spool().append(row)
+
+    def add_many(self, rows):
+        for row in rows:
+            self.add(row)
+
+    def load(self, refresh=False, include_pending=True):
+        if not get_gspread_client():
+            logger.warning("Cannot load history: No client")
+            return pd.DataFrame()
+
+        mirror = get_history_mirror()
+        try:
+            sync = with_worksheet(lambda wks: mirror.sync(wks, full=refresh))
+            if not sync.get("skipped"):
+                logger.info(f"History sync: {sync['fetched']} rows fetched ({'full' if sync['full'] else 'incremental'})")
+        except Exception as e:
+            # Serve the last mirrored state while the sheet is unreachable
+            logger.warning(f"History sync failed, serving local mirror: {str(e)}")
+        df = mirror.frame()
 
+        # Entries still waiting in the write-behind spool show up immediately
+        pending = get_spool().pending_rows() if include_pending else []
+        if pending:
+            pending_df = pd.DataFrame(pending, columns=HISTORY_COLUMNS)
+            pending_df["created_at"] = pd.to_datetime(pending_df["created_at"], errors='coerce')
+            df = pending_df if df.empty else pd.concat([df, pending_df], ignore_index=True)
+
+        if df.empty:
+            return pd.DataFrame()
+
+        # Ensure consistent columns even if empty
+        for col in HISTORY_COLUMNS:
+            if col not in df.columns:
+                df[col] = ""
+        return df
+
+    def stats(self):
+        """
+        Counts from the local mirror plus spooled rows; the sheet size comes
+        from the cached worksheet properties. No records are transferred.
+        """
+        stats = get_history_mirror().summary()
+        for row in get_spool().pending_rows():
+            stats["total"] += 1
+            stats["by_type"][row[0]] = stats["by_type"].get(row[0], 0) + 1
+            stats["latest"] = max(stats["latest"] or "", str(row[7])) or None
+        stats["size_bytes"] = None
+        wks = _worksheet
+        if wks is not None:
+            stats["sheet_cells"] = wks.row_count * wks.col_count
+        return stats
+
+    def check(self):
+        """Checks if we can access the Google Sheet."""
+        if not sheets_configured():
+            return {"status": False, "error": "Configuration Missing"}
         try:
-            wks = sh.worksheet(WORKSHEET_NAME)
-            logger.info(f"Worksheet '{WORKSHEET_NAME}' found")
-        except gspread.WorksheetNotFound:
-            logger.info(f"Creating new worksheet '{WORKSHEET_NAME}'")
-            wks = sh.add_worksheet(title=WORKSHEET_NAME, rows=100, cols=10)
-            wks.append_row(["type", "source", "details", "amount", "summary", "tags", "images", "created_at"])
-            logger.info("Worksheet initialized with headers")
+            client = get_gspread_client()
+            if not client: 
+                return {"status": False, "error": "Auth Failed"}
             
+            # One cheap metadata read on the cached handle proves the token and sheet are usable
+            with_worksheet(lambda wks: wks.spreadsheet.fetch_sheet_metadata({"fields": "spreadsheetId"}))
+            logger.info(f"Database connection verified for sheet '{SHEET_NAME}'")
+            return {"status": True, "error": None}
+        except (gspread.SpreadsheetNotFound, gspread.WorksheetNotFound) as e:
+            error_msg = f"Sheet '{SHEET_NAME}' (worksheet '{WORKSHEET_NAME}') not found"
+            logger.error(error_msg)
+            return {"status": False, "error": error_msg}
+        except Exception as e:
+            error_msg = f"DB CONNECTION ERROR: {str(e)}"
+            logger.error(error_msg)
+            return {"status": False, "error": str(e)}
+
+# --- BACKEND SELECTION ---
+_backend = None
+_replica = None
+_backend_ready = False
+_backend_retry_at = 0.0
+_import_done = False
+_import_retry_at = 0.0
+_import_before = None  # primary was empty at this time; rows after it are our own
+
+def get_backend() -> KBBackend:
+    """Primary knowledge-base store (KB_BACKEND)."""
+    global _backend
+    if _backend is None:
+        with _conn_lock:
+            if _backend is None:
+                _backend = SheetsBackend() if KB_BACKEND == "sheets" else SQLiteBackend()
+                logger.info(f"Knowledge base backend: {_backend.name}")
+    return _backend
+
+def get_replica():
+    """Sheets sink replicated asynchronously from the SQLite primary, or None."""
+    global _replica
+    if _replica is None and KB_BACKEND != "sheets" and KB_SHEETS_REPLICA and sheets_configured():
+        with _conn_lock:
+            if _replica is None:
+                _replica = SheetsBackend()
+    return _replica
+
+def sheets_in_use() -> bool:
+    return KB_BACKEND == "sheets" or get_replica() is not None
+
+# --- CORE FUNCTIONS ---
+def check_connection():
+    """Checks the primary store; the dict also names the backend."""
+    backend = get_backend()
+    status = backend.check()
+    status["backend"] = backend.name
+    return status
+
+def replica_status():
+    """Health of the Sheets replica, or None when replication is off."""
+    replica = get_replica()
+    return replica.check() if replica else None
+
+def init_db():
+    """
+    Prepares the primary store (and Sheets replica). On first run with an
+    empty SQLite primary, existing history is imported from the replica;
+    a failed init or import is retried on later calls, at most every
+    KB_RETRY_MAX_SECONDS. Once both are done, later calls are free.
+    """
+    global _backend_ready, _backend_retry_at
+    if not _backend_ready and time.monotonic() >= _backend_retry_at:
+        try:
+            _backend_ready = bool(get_backend().init())
+        except Exception as e:
+            logger.error(f"Knowledge-base init failed: {str(e)}")
+        if not _backend_ready:
+            _backend_retry_at = time.monotonic() + KB_RETRY_MAX_SECONDS
+            logger.warning(f"Knowledge-base store not ready, retrying in {KB_RETRY_MAX_SECONDS:.0f}s")
+    if _backend_ready and not _import_done and time.monotonic() >= _import_retry_at:
+        _import_history()
+
+def _import_history():
+    """Copies the replica's history into an empty primary; sets _import_done on success."""
+    global _import_done, _import_retry_at, _import_before
+    replica = get_replica()
+    if replica is None:
+        _import_done = True
+        return
+    try:
+        if not replica.init():
+            raise ConnectionError("Google Sheets replica is not reachable")
+        backend = get_backend()
+        if _import_before is None:
+            if backend.stats()["total"] > 0:
+                _import_done = True
+                return
+            _import_before = datetime.now()
+        # Raises if the sheet can't be read, unlike replica.load() which serves the stale mirror
+        mirror = get_history_mirror()
+        with_worksheet(lambda wks: mirror.sync(wks, full=True))
+        df = mirror.frame()
+        if not df.empty:
+            df = df.reindex(columns=HISTORY_COLUMNS)
+            # Entries added here while the import was pending are already in the primary
+            df = df[~(df["created_at"] >= pd.Timestamp(_import_before))].copy()
+            df["created_at"] = df["created_at"].dt.strftime("%Y-%m-%d %H:%M:%S").fillna("")
+            backend.add_many(df.astype(object).where(df.notna(), None).values.tolist())
+            logger.info(f"Imported {len(df)} history rows from Google Sheets")
+        _import_done = True
     except Exception as e:
-        error_msg = f"DB INIT ERROR: {str(e)}"
-        logger.error(error_msg)
-        st.error(f"❌ {error_msg}")
+        _import_retry_at = time.monotonic() + KB_RETRY_MAX_SECONDS
+        logger.error(f"History import from Google Sheets failed, retrying in {KB_RETRY_MAX_SECONDS:.0f}s: {str(e)}")
 
 def add_entry(type_, source, details, amount, summary, tags, images=None):
     """
-    Appends a new row to the history worksheet with error handling.
+    Stores a new entry in the primary backend and queues it for the Sheets
+    replica, if one is configured.
     """
     try:
-        client = get_gspread_client()
-        if not client:
-            logger.error(f"Cannot add entry {type_}: No client")
-            return False
-
-        sh = client.open(SHEET_NAME)
-        wks = sh.worksheet(WORKSHEET_NAME)
-        
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         # Handle optional images
@@ -124,9 +401,17 @@ def add_entry(type_, source, details, amount, summary, tags, images=None):
             st.error("Missing required fields (type, source, or summary)")
             return False
         
-        # Append row
-        wks.append_row([type_, source, details, amount, summary, tags, images_str, timestamp])
+        row = [type_, source, details, amount, summary, tags, images_str, timestamp]
+        get_backend().add(row)
         logger.info(f"Entry added: {type_} | {source} | {timestamp}")
+
+        replica = get_replica()
+        if replica is not None:
+            try:
+                replica.add(row)
+            except Exception as e:
+                # The entry is safe in the primary; replication is best-effort
+                logger.warning(f"Sheets replication skipped for {source}: {str(e)}")
         return True
     except gspread.exceptions.APIError as e:
         error_msg = f"Google Sheets API Error: {str(e)}"
@@ -139,52 +424,31 @@ def add_entry(type_, source, details, amount, summary, tags, images=None):
         st.error(f"Failed to save: {error_msg}")
         return False
 
-def load_history():
+def load_history(refresh=False):
     """
-    Fetches all records from the sheet and returns a pandas DataFrame.
+    Returns the history from the primary backend as a DataFrame.
+    `refresh` forces a full reload (a full resync for Sheets).
     """
     try:
-        client = get_gspread_client()
-        if not client: 
-            logger.warning("Cannot load history: No client")
-            return pd.DataFrame()
-
-        sh = client.open(SHEET_NAME)
-        wks = sh.worksheet(WORKSHEET_NAME)
-        
-        data = wks.get_all_records()
-        logger.info(f"Loaded {len(data)} records from database")
-        
-        if not data:
-            return pd.DataFrame()
-
-        df = pd.DataFrame(data)
-        
-        # Ensure consistent columns even if empty
-        expected_cols = ["type", "source", "details", "amount", "summary", "tags", "images", "created_at"]
-        for col in expected_cols:
-            if col not in df.columns:
-                df[col] = ""
-
-        # Convert timestamp to datetime if possible for sorting
-        if "created_at" in df.columns:
-            df["created_at"] = pd.to_datetime(df["created_at"], errors='coerce')
-
-        return df
+        return get_backend().load(refresh)
     except Exception as e:
         error_msg = f"LOAD HISTORY ERROR: {str(e)}"
         logger.error(error_msg)
         return pd.DataFrame()
 
+def history_mirror_stats() -> dict:
+    return get_history_mirror().stats()
+
 def get_db_stats():
-    """Returns basic stats about the history."""
+    """
+    Entry counts (total and by type), latest entry time and store size,
+    answered from counters and metadata rather than by loading the history.
+    """
     try:
-        df = load_history()
-        if df.empty: 
-            return {"total": 0}
-        count = len(df)
-        logger.info(f"Database stats: {count} total entries")
-        return {"total": count}
+        stats = get_backend().stats()
+        stats["backend"] = get_backend().name
+        logger.info(f"Database stats: {stats['total']} total entries")
+        return stats
     except Exception as e:
         logger.error(f"Error getting DB stats: {str(e)}")
-        return {"total": 0}
+        return {"total": 0, "by_type": {}, "latest": None, "size_bytes": None}
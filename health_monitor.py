@@ -0,0 +1,95 @@
+"""
+Background health monitor.
+Runs dependency probes (AI server, storage) on an interval in a daemon
+thread and publishes the latest results, so page renders read cached
+status instead of doing network round-trips.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from config import HEALTH_CHECK_INTERVAL_SECONDS, get_logger
+
+logger = get_logger("health_monitor")
+
+
+class HealthMonitor:
+    """Periodically runs named probes and caches their last result."""
+
+    def __init__(self, probes: Dict[str, Callable[[], dict]], interval: float = HEALTH_CHECK_INTERVAL_SECONDS):
+        self.probes = probes
+        self.interval = interval
+        self._status = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, initial_probe: bool = True):
+        """Start the background loop; optionally run one blocking round first."""
+        if self._thread and self._thread.is_alive():
+            return
+        if initial_probe:
+            self.refresh()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+        self._thread.start()
+        logger.info(f"Health monitor started ({len(self.probes)} probes, every {self.interval}s)")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+    def _probe(self, name: str):
+        started = time.time()
+        previous = self._status.get(name, {})
+        try:
+            result = self.probes[name]()
+            error = None
+        except Exception as e:
+            logger.error(f"Health probe '{name}' failed: {str(e)}")
+            result = previous.get("result")
+            error = str(e)
+        return {
+            "result": result,
+            "checked_at": time.time(),
+            "duration_ms": round((time.time() - started) * 1000, 1),
+            "probe_error": error,
+        }
+
+    def refresh(self, name: Optional[str] = None):
+        """Run probes now (all, or just `name`) and publish the results."""
+        names = [name] if name else list(self.probes)
+        updates = {n: self._probe(n) for n in names}
+        with self._lock:
+            # Publish a fresh dict so readers never see a half-updated snapshot
+            status = dict(self._status)
+            status.update(updates)
+            self._status = status
+
+    def get(self, name: str, default: Optional[dict] = None) -> Optional[dict]:
+        """Last published probe result for `name`."""
+        entry = self._status.get(name)
+        if not entry or entry["result"] is None:
+            return default
+        return entry["result"]
+
+    def probe_error(self, name: str) -> Optional[str]:
+        """Exception text if the last probe of `name` raised."""
+        entry = self._status.get(name)
+        return entry["probe_error"] if entry else None
+
+    def checked_at(self, name: str) -> Optional[float]:
+        entry = self._status.get(name)
+        return entry["checked_at"] if entry else None
+
+    def age_seconds(self, name: str) -> Optional[float]:
+        ts = self.checked_at(name)
+        return time.time() - ts if ts else None
+
+    def snapshot(self) -> dict:
+        """All entries with their timestamps and probe durations."""
+        return dict(self._status)
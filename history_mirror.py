@@ -0,0 +1,224 @@
+"""
+Local SQLite mirror of the history worksheet.
+Each sync fetches the header plus only the rows appended since the last
+known row count (one batched read), starting one row early so the last
+mirrored row doubles as a consistency check. A full resync happens on the
+first sync, when the header or the overlap row no longer match (schema
+change, deleted rows), or on explicit refresh, which also picks up edits
+to older rows. The DataFrame is built from the mirror and extended in
+place as rows arrive.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+import pandas as pd
+from gspread.utils import numericise_all, rowcol_to_a1
+
+from config import HISTORY_MIRROR_PATH, HISTORY_SYNC_INTERVAL_SECONDS, get_logger
+
+logger = get_logger("history_mirror")
+
+
+def _column_names(header: list) -> list:
+    """SQL-safe, unique column names for a sheet header."""
+    names, seen = [], set()
+    for i, h in enumerate(header):
+        name = str(h).strip() or f"col_{i + 1}"
+        base, n = name, 2
+        while name.lower() in seen or name.lower() == "row_num":
+            name, n = f"{base}_{n}", n + 1
+        seen.add(name.lower())
+        names.append(name)
+    return names
+
+
+def _trim(row) -> list:
+    """Row values without trailing blanks (the API omits them)."""
+    row = list(row)
+    while row and row[-1] == "":
+        row.pop()
+    return row
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class HistoryMirror:
+    """Append-only mirror of one worksheet plus an in-process DataFrame over it."""
+
+    def __init__(self, path=HISTORY_MIRROR_PATH, sync_interval=HISTORY_SYNC_INTERVAL_SECONDS):
+        self.sync_interval = sync_interval
+        self._lock = threading.RLock()
+        self._stale = True
+        self._last_sync = 0.0
+        self._df = None
+        self._df_rows = 0
+        self._df_generation = None
+        self.full_syncs = 0
+        self.last_fetched = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS mirror_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+
+    # --- META ---
+    def _meta(self, key, default=None):
+        row = self._conn.execute("SELECT value FROM mirror_meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, **values):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO mirror_meta (key, value) VALUES (?, ?)",
+            [(k, json.dumps(v)) for k, v in values.items()]
+        )
+
+    def _row_count(self) -> int:
+        if self._meta("header") is None:
+            return 0
+        return self._conn.execute("SELECT COALESCE(MAX(row_num), 0) FROM history").fetchone()[0]
+
+    def _last_row(self, columns: list) -> Optional[list]:
+        row = self._conn.execute(
+            f"SELECT {', '.join(_quote(c) for c in columns)} FROM history ORDER BY row_num DESC LIMIT 1"
+        ).fetchone()
+        return list(row) if row else None
+
+    # --- SYNC ---
+    def mark_stale(self):
+        """Sync on the next call regardless of the interval (e.g. after a write)."""
+        self._stale = True
+
+    def _insert(self, columns: list, start: int, rows: list):
+        width = len(columns)
+        marks = ",".join("?" * (width + 1))
+        self._conn.executemany(
+            f"INSERT INTO history (row_num, {', '.join(_quote(c) for c in columns)}) VALUES ({marks})",
+            [(start + i, *(numericise_all((r + [""] * width)[:width]))) for i, r in enumerate(rows)]
+        )
+
+    def _full_sync(self, wks) -> dict:
+        values = wks.get_all_values()
+        header, rows = (values[0], values[1:]) if values else ([], [])
+        columns = _column_names(header)
+        with self._conn:
+            self._conn.execute("DROP TABLE IF EXISTS history")
+            self._conn.execute(
+                f"CREATE TABLE history (row_num INTEGER PRIMARY KEY{''.join(', ' + _quote(c) for c in columns)})"
+            )
+            if columns:
+                self._insert(columns, 1, rows)
+            self._set_meta(header=header, columns=columns, generation=self._meta("generation", 0) + 1)
+        self.full_syncs += 1
+        logger.info(f"History mirror: full resync, {len(rows)} rows")
+        return {"fetched": len(rows), "full": True}
+
+    def sync(self, wks, full: bool = False) -> dict:
+        """
+        Bring the mirror up to date with `wks`. Skipped (fetched=0) within
+        sync_interval of the last sync unless stale or `full`.
+        """
+        with self._lock:
+            if not full and not self._stale and time.time() - self._last_sync < self.sync_interval:
+                return {"fetched": 0, "full": False, "skipped": True}
+
+            header = self._meta("header")
+            n = self._row_count()
+            if full or not header or n == 0:
+                result = self._full_sync(wks)
+            else:
+                columns = self._meta("columns")
+                width = len(header)
+                last_col = rowcol_to_a1(1, width).rstrip("0123456789")
+                try:
+                    head, tail = wks.batch_get(["1:1", f"A{n + 1}:{last_col}"])
+                except Exception as e:
+                    # Typically the sheet shrank below the mirrored row count
+                    logger.warning(f"History mirror: incremental read failed ({str(e)}), resyncing")
+                    head, tail = None, None
+
+                overlap = numericise_all((list(tail[0]) + [""] * width)[:width]) if tail else None
+                if head is None or _trim(head[0] if head else []) != _trim(header) \
+                        or overlap != self._last_row(columns):
+                    result = self._full_sync(wks)
+                else:
+                    new_rows = [list(r) for r in tail[1:]]
+                    if new_rows:
+                        with self._conn:
+                            self._insert(columns, n + 1, new_rows)
+                    result = {"fetched": len(new_rows), "full": False}
+
+            self._stale = False
+            self._last_sync = time.time()
+            self.last_fetched = result["fetched"]
+            return result
+
+    # --- READ ---
+    def _read(self, columns: list, after: int) -> pd.DataFrame:
+        df = pd.read_sql_query(
+            f"SELECT {', '.join(_quote(c) for c in columns)} FROM history WHERE row_num > ? ORDER BY row_num",
+            self._conn, params=(after,)
+        )
+        if "created_at" in df.columns:
+            df["created_at"] = pd.to_datetime(df["created_at"], errors="coerce")
+        return df
+
+    def frame(self) -> pd.DataFrame:
+        """Mirrored rows as a DataFrame; only rows added since the last call are read."""
+        with self._lock:
+            columns = self._meta("columns")
+            if not columns:
+                return pd.DataFrame()
+            generation = self._meta("generation")
+            n = self._row_count()
+            if self._df is None or generation != self._df_generation or n < self._df_rows:
+                self._df = self._read(columns, 0)
+            elif n > self._df_rows:
+                self._df = pd.concat([self._df, self._read(columns, self._df_rows)], ignore_index=True)
+            self._df_rows = n
+            self._df_generation = generation
+            return self._df.copy(deep=False)
+
+    def summary(self) -> dict:
+        """Row count, counts by type and latest created_at, straight from the mirror table."""
+        with self._lock:
+            columns = self._meta("columns") or []
+            if not columns:
+                return {"total": 0, "by_type": {}, "latest": None}
+            by_type = {}
+            if "type" in columns:
+                by_type = dict(self._conn.execute('SELECT "type", COUNT(*) FROM history GROUP BY "type"').fetchall())
+            latest = None
+            if "created_at" in columns:
+                latest = self._conn.execute(
+                    "SELECT MAX(created_at) FROM history WHERE created_at != ''"
+                ).fetchone()[0]
+            total = self._conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+        return {"total": total, "by_type": by_type, "latest": latest}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rows": self._row_count(),
+                "full_syncs": self.full_syncs,
+                "last_fetched": self.last_fetched,
+                "synced_ago": round(time.time() - self._last_sync, 1) if self._last_sync else None,
+            }
+
+
+_mirror = None
+_mirror_lock = threading.Lock()
+
+
+def get_history_mirror() -> HistoryMirror:
+    """Process-wide history mirror."""
+    global _mirror
+    if _mirror is None:
+        with _mirror_lock:
+            if _mirror is None:
+                _mirror = HistoryMirror()
+    return _mirror
@@ -0,0 +1,230 @@
+"""
+Gallery post-processing for scraped image URLs.
+Images are fetched concurrently on the pooled HTTP client, decoded at
+reduced size and hashed with a DCT perceptual hash computed for the whole
+batch in NumPy. Near-duplicates (the same picture at several CDN sizes)
+collapse to the highest-resolution copy, and the best N are kept.
+Hashes are cached by URL so re-scrapes only fetch new images.
+"""
+
+import io
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import requests
+from PIL import Image, ImageFile
+
+from config import (
+    CACHE_DB_PATH,
+    SCRAPER_HTTP_TIMEOUT,
+    IMAGE_KEEP_MAX,
+    IMAGE_FETCH_CONCURRENCY,
+    IMAGE_FETCH_MAX_BYTES,
+    IMAGE_HASH_DISTANCE,
+    get_logger
+)
+from site_adapters import get_http_session
+
+logger = get_logger("image_dedup")
+
+# Large PNGs may be cut off at IMAGE_FETCH_MAX_BYTES; decode what arrived
+ImageFile.LOAD_TRUNCATED_IMAGES = True
+
+HASH_SIZE = 8
+SAMPLE_SIZE = 32
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II basis, so a 2-D DCT is D @ X @ D.T."""
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    d = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    d[0] /= np.sqrt(2.0)
+    return d
+
+_DCT = _dct_matrix(SAMPLE_SIZE)
+_BIT_WEIGHTS = np.uint64(1) << np.arange(HASH_SIZE * HASH_SIZE, dtype=np.uint64)
+
+
+def phash_batch(pixels: np.ndarray) -> np.ndarray:
+    """
+    64-bit DCT perceptual hashes for a (N, 32, 32) grayscale stack, in one
+    batched matrix product: low-frequency 8x8 block thresholded at its median.
+    """
+    coeffs = _DCT @ pixels.astype(np.float64) @ _DCT.T
+    low = coeffs[:, :HASH_SIZE, :HASH_SIZE].reshape(len(pixels), -1)
+    bits = low > np.median(low[:, 1:], axis=1, keepdims=True)
+    return (bits.astype(np.uint64) * _BIT_WEIGHTS).sum(axis=1, dtype=np.uint64)
+
+
+def hamming_matrix(hashes: np.ndarray) -> np.ndarray:
+    """Pairwise Hamming distances between 64-bit hashes."""
+    xor = np.bitwise_xor(hashes[:, None], hashes[None, :])
+    if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+        return np.bitwise_count(xor)
+    return np.unpackbits(xor.view(np.uint8).reshape(*xor.shape, 8), axis=-1).sum(axis=-1)
+
+
+def decode_thumbnail(data: bytes) -> Tuple[np.ndarray, int, int]:
+    """32x32 grayscale sample plus the full image size; JPEGs decode at reduced scale."""
+    img = Image.open(io.BytesIO(data))
+    width, height = img.size
+    img.draft("L", (SAMPLE_SIZE * 2, SAMPLE_SIZE * 2))
+    sample = img.convert("L").resize((SAMPLE_SIZE, SAMPLE_SIZE), Image.BILINEAR)
+    return np.asarray(sample, dtype=np.uint8), width, height
+
+
+class ImageHashCache:
+    """SQLite cache of url -> (hash, width, height)."""
+
+    def __init__(self, path=CACHE_DB_PATH):
+        self._lock = threading.Lock()
+        self._conn = None
+        try:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS image_hashes (
+                url        TEXT PRIMARY KEY,
+                phash      INTEGER NOT NULL,  -- 64-bit hash stored as signed int
+                width      INTEGER NOT NULL,
+                height     INTEGER NOT NULL,
+                fetched_at REAL    NOT NULL
+            )""")
+            self._conn.commit()
+        except Exception as e:
+            logger.warning(f"Image hash cache disabled: {str(e)}")
+            self._conn = None
+
+    def get_many(self, urls: List[str]) -> Dict[str, Tuple[int, int, int]]:
+        if not self._conn or not urls:
+            return {}
+        found = {}
+        with self._lock:
+            # Chunked to stay under SQLite's bound-parameter limit
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT url, phash, width, height FROM image_hashes WHERE url IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                found.update({u: (h & 0xFFFFFFFFFFFFFFFF, w, ht) for u, h, w, ht in rows})
+        return found
+
+    def put_many(self, entries: Dict[str, Tuple[int, int, int]]):
+        if not self._conn or not entries:
+            return
+        now = time.time()
+        rows = [(u, h - (1 << 64) if h >= 1 << 63 else h, w, ht, now) for u, (h, w, ht) in entries.items()]
+        try:
+            with self._lock:
+                self._conn.executemany("INSERT OR REPLACE INTO image_hashes VALUES (?,?,?,?,?)", rows)
+                self._conn.commit()
+        except Exception as e:
+            logger.warning(f"Image hash cache write failed: {str(e)}")
+
+
+def fetch_image(url: str) -> Optional[bytes]:
+    """Image bytes, capped at IMAGE_FETCH_MAX_BYTES; None on failure."""
+    try:
+        with get_http_session().get(url, timeout=SCRAPER_HTTP_TIMEOUT, stream=True) as r:
+            if r.status_code != 200 or not r.headers.get("Content-Type", "image/").startswith("image/"):
+                return None
+            buf = bytearray()
+            for chunk in r.iter_content(64 * 1024):
+                buf.extend(chunk)
+                if len(buf) >= IMAGE_FETCH_MAX_BYTES:
+                    break
+            return bytes(buf)
+    except requests.RequestException:
+        return None
+
+
+class ImageSelector:
+    """Fetch, hash, dedup and rank gallery images."""
+
+    def __init__(self, cache: ImageHashCache = None, concurrency=IMAGE_FETCH_CONCURRENCY,
+                 max_distance=IMAGE_HASH_DISTANCE):
+        self.cache = cache or ImageHashCache()
+        self.concurrency = concurrency
+        self.max_distance = max_distance
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="image-fetch")
+
+    def _hash_new(self, urls: List[str]) -> Dict[str, Tuple[int, int, int]]:
+        samples, sizes, ok = [], [], []
+        for url, data in zip(urls, self._executor.map(fetch_image, urls)):
+            if not data:
+                continue
+            try:
+                pixels, w, h = decode_thumbnail(data)
+            except Exception:
+                continue
+            samples.append(pixels)
+            sizes.append((w, h))
+            ok.append(url)
+        if not ok:
+            return {}
+        hashes = phash_batch(np.stack(samples))
+        return {u: (int(hv), w, h) for u, hv, (w, h) in zip(ok, hashes, sizes)}
+
+    def select(self, urls: List[str], limit: int = IMAGE_KEEP_MAX) -> List[str]:
+        """
+        Up to `limit` distinct images, highest resolution first. Images that
+        could not be fetched or decoded are dropped unless none could be.
+        """
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return []
+        started = time.perf_counter()
+        known = self.cache.get_many(urls)
+        new = self._hash_new([u for u in urls if u not in known])
+        self.cache.put_many(new)
+        known.update(new)
+
+        hashed = [u for u in urls if u in known]
+        if not hashed:
+            return urls[:limit]
+
+        hashes = np.array([known[u][0] for u in hashed], dtype=np.uint64)
+        area = np.array([known[u][1] * known[u][2] for u in hashed], dtype=np.int64)
+        # Largest first; page order breaks ties
+        order = np.lexsort((np.arange(len(hashed)), -area))
+        dist = hamming_matrix(hashes)
+
+        kept = []
+        covered = np.zeros(len(hashed), dtype=bool)
+        for i in order:
+            if covered[i]:
+                continue
+            kept.append(hashed[i])
+            covered |= dist[i] <= self.max_distance
+            if len(kept) == limit:
+                break
+
+        logger.info(
+            f"Images: {len(urls)} urls -> {len(hashed)} decoded ({len(new)} fetched) -> {len(kept)} kept "
+            f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+        return kept
+
+
+_selector = None
+_selector_lock = threading.Lock()
+
+
+def get_image_selector() -> ImageSelector:
+    """Process-wide selector (shared fetch pool and hash cache)."""
+    global _selector
+    if _selector is None:
+        with _selector_lock:
+            if _selector is None:
+                _selector = ImageSelector()
+    return _selector
+
+
+def select_images(urls: List[str], limit: int = IMAGE_KEEP_MAX) -> List[str]:
+    return get_image_selector().select(urls, limit)
@@ -0,0 +1,233 @@
+"""
+Durable SQLite job queue.
+The web tier enqueues jobs and polls their status; worker threads or
+processes (see worker.py) claim them with a lease, report progress and
+complete or fail them. Failed attempts are retried with exponential
+backoff; jobs whose worker died are re-claimed once their lease expires.
+"""
+
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import List, Optional
+
+from config import (
+    JOBS_DB_PATH,
+    JOB_MAX_ATTEMPTS,
+    JOB_RETRY_BASE_SECONDS,
+    JOB_LEASE_SECONDS,
+    get_logger
+)
+
+logger = get_logger("job_queue")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+MAX_LOG_LINES = 50
+
+
+class JobQueue:
+    """Jobs table with atomic claim, lease renewal and retry scheduling."""
+
+    def __init__(self, path=JOBS_DB_PATH, lease_seconds=JOB_LEASE_SECONDS,
+                 retry_base_seconds=JOB_RETRY_BASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.retry_base_seconds = retry_base_seconds
+        self._lock = threading.Lock()
+        # Autocommit mode; claims use explicit BEGIN IMMEDIATE transactions
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id           INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind         TEXT    NOT NULL,
+            payload      TEXT    NOT NULL,  -- JSON
+            status       TEXT    NOT NULL DEFAULT 'queued',
+            attempts     INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL,
+            progress     TEXT,
+            log          TEXT    NOT NULL DEFAULT '[]',  -- JSON array of progress messages
+            result       TEXT,  -- JSON
+            error        TEXT,
+            worker       TEXT,
+            claimed_by   TEXT,  -- token of the current claim; only its holder may finish the job
+            run_after    REAL    NOT NULL,
+            lease_until  REAL,
+            created_at   REAL    NOT NULL,
+            updated_at   REAL    NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(status, run_after);
+        """)
+        present = {r["name"] for r in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "claimed_by" not in present:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN claimed_by TEXT")
+
+    # --- PRODUCER SIDE ---
+    def enqueue(self, kind: str, payload: dict, max_attempts: int = JOB_MAX_ATTEMPTS) -> int:
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO jobs (kind, payload, max_attempts, progress, run_after, created_at, updated_at) "
+                "VALUES (?,?,?,?,?,?,?)",
+                (kind, json.dumps(payload), max_attempts, "Queued", now, now, now)
+            )
+        logger.info(f"Enqueued job {cur.lastrowid} ({kind})")
+        return cur.lastrowid
+
+    def get(self, job_id: int) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list_jobs(self, ids: Optional[List[int]] = None, limit: int = 20) -> List[dict]:
+        """Most recent jobs first, optionally restricted to `ids`."""
+        with self._lock:
+            if ids:
+                marks = ",".join("?" * len(ids))
+                rows = self._conn.execute(
+                    f"SELECT * FROM jobs WHERE id IN ({marks}) ORDER BY id DESC LIMIT ?", (*ids, limit)
+                ).fetchall()
+            else:
+                rows = self._conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [self._to_dict(r) for r in rows]
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        counts.update({status: n for status, n in rows})
+        return counts
+
+    # --- WORKER SIDE ---
+    def claim(self, worker: str, kinds: Optional[List[str]] = None) -> Optional[dict]:
+        """
+        Atomically take the oldest runnable job: queued and due, or running
+        with an expired lease (its worker died). Counts as one attempt.
+        The returned job's `claimed_by` token must be passed back to
+        progress/complete/fail; once the job is re-claimed they are ignored.
+        """
+        now = time.time()
+        kind_filter = ""
+        params = [now, now]
+        if kinds:
+            kind_filter = f"AND kind IN ({','.join('?' * len(kinds))})"
+            params += list(kinds)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(f"""
+                    SELECT id FROM jobs
+                    WHERE ((status = 'queued' AND run_after <= ?) OR (status = 'running' AND lease_until < ?))
+                    {kind_filter}
+                    ORDER BY run_after, id LIMIT 1
+                """, params).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?, claimed_by = ?, "
+                    "lease_until = ?, updated_at = ? WHERE id = ?",
+                    (worker, f"{worker}/{uuid.uuid4().hex[:12]}", now + self.lease_seconds, now, row["id"])
+                )
+                job = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._to_dict(job)
+
+    def progress(self, job_id: int, claimed_by: str, message: str):
+        """Record a progress message and renew the lease."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT log FROM jobs WHERE id = ? AND claimed_by = ? AND status = 'running'", (job_id, claimed_by)
+            ).fetchone()
+            if row is None:
+                return
+            log = json.loads(row["log"]) + [message]
+            self._conn.execute(
+                "UPDATE jobs SET progress = ?, log = ?, lease_until = ?, updated_at = ? "
+                "WHERE id = ? AND claimed_by = ? AND status = 'running'",
+                (message, json.dumps(log[-MAX_LOG_LINES:]), now + self.lease_seconds, now, job_id, claimed_by)
+            )
+
+    def complete(self, job_id: int, claimed_by: str, result: dict) -> bool:
+        """Store the result; returns False (and changes nothing) if the claim was lost."""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, progress = 'Done', "
+                "lease_until = NULL, updated_at = ? WHERE id = ? AND claimed_by = ? AND status = 'running'",
+                (json.dumps(result), now, job_id, claimed_by)
+            )
+        if cur.rowcount == 0:
+            logger.warning(f"Job {job_id} result from {claimed_by} ignored: the job was re-claimed")
+            return False
+        return True
+
+    def fail(self, job_id: int, claimed_by: str, error: str, retry: bool = True) -> bool:
+        """
+        Reschedule with exponential backoff and jitter, or mark failed when out
+        of attempts. Returns False (and changes nothing) if the claim was lost.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return False
+            retrying = retry and row["attempts"] < row["max_attempts"]
+            if retrying:
+                delay = self.retry_base_seconds * (2 ** (row["attempts"] - 1)) * random.uniform(0.8, 1.2)
+                cur = self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, progress = ?, run_after = ?, "
+                    "lease_until = NULL, updated_at = ? WHERE id = ? AND claimed_by = ? AND status = 'running'",
+                    (error, f"Retrying in {delay:.0f}s (attempt {row['attempts']}/{row['max_attempts']} failed)",
+                     now + delay, now, job_id, claimed_by)
+                )
+                message = f"Job {job_id} attempt {row['attempts']} failed, retry in {delay:.0f}s: {error}"
+            else:
+                cur = self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, progress = 'Failed', "
+                    "lease_until = NULL, updated_at = ? WHERE id = ? AND claimed_by = ? AND status = 'running'",
+                    (error, now, job_id, claimed_by)
+                )
+                message = f"Job {job_id} failed after {row['attempts']} attempts: {error}"
+        if cur.rowcount == 0:
+            logger.warning(f"Job {job_id} failure from {claimed_by} ignored: the job was re-claimed")
+            return False
+        if retrying:
+            logger.warning(message)
+        else:
+            logger.error(message)
+        return True
+
+    @staticmethod
+    def _to_dict(row) -> dict:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["log"] = json.loads(job["log"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide queue handle."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue()
+    return _queue
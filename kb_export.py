@@ -0,0 +1,165 @@
+"""
+Knowledge-base exports as CSV, gzip-compressed CSV or Parquet.
+Rows are read from the local store (or the Sheets mirror) in chunks and
+encoded chunk by chunk, so an export never holds the whole file or the
+whole table in memory and never touches the live sheet. iter_export()
+yields bytes for streaming responses; write_export() spools to a file.
+"""
+
+import io
+import os
+import sqlite3
+import tempfile
+import zlib
+from typing import Iterable, Iterator
+
+import pandas as pd
+
+from config import KB_BACKEND, KB_DB_PATH, HISTORY_MIRROR_PATH, EXPORT_CHUNK_ROWS, get_logger
+from kb_store import HISTORY_COLUMNS
+
+logger = get_logger("kb_export")
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = pq = None
+
+# format -> (mime type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", ".csv"),
+    "csv.gz": ("application/gzip", ".csv.gz"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+
+def available_formats() -> list:
+    return [f for f in EXPORT_FORMATS if f != "parquet" or pq is not None]
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """Fixed columns and dtypes, so every chunk has the same schema."""
+    out = pd.DataFrame(index=df.index)
+    for col in HISTORY_COLUMNS:
+        values = df[col] if col in df.columns else pd.Series("", index=df.index)
+        if col == "amount":
+            out[col] = pd.to_numeric(values, errors="coerce").astype("float64")
+        elif col == "created_at":
+            out[col] = pd.to_datetime(values, errors="coerce").astype("datetime64[us]")
+        else:
+            out[col] = values.fillna("").astype(str).astype(object)
+    return out.reset_index(drop=True)
+
+
+def iter_store_frames(chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """The whole knowledge base in chunks, from the SQLite store or the Sheets mirror."""
+    if KB_BACKEND == "sheets":
+        path, table, order = HISTORY_MIRROR_PATH, "history", "row_num"
+    else:
+        path, table, order = KB_DB_PATH, "kb_entries", "id"
+    if not os.path.exists(path):
+        # Fresh install, or Sheets primary before the first sync: nothing stored yet
+        logger.info(f"No knowledge-base store at {path}; exporting an empty table")
+        yield pd.DataFrame(columns=HISTORY_COLUMNS)
+        return
+    # Own read-only connection so a long export doesn't hold up writers
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        present = {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
+        cols = [c for c in HISTORY_COLUMNS if c in present]
+        if not cols:
+            return
+        quoted = ", ".join('"' + c + '"' for c in cols)
+        query = f"SELECT {quoted} FROM {table} ORDER BY {order}"
+        for chunk in pd.read_sql_query(query, conn, chunksize=chunk_rows):
+            yield chunk
+    finally:
+        conn.close()
+
+
+def iter_frame_chunks(df: pd.DataFrame, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """An in-memory DataFrame (e.g. the filtered view) in chunks."""
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink whose buffered bytes are taken after each write batch."""
+
+    def __init__(self):
+        self._parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._parts.append(bytes(b))
+        return len(b)
+
+    def take(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def _iter_csv(frames: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+    header = True
+    for frame in frames:
+        yield _normalize(frame).to_csv(index=False, header=header, date_format="%Y-%m-%d %H:%M:%S").encode("utf-8")
+        header = False
+    if header:
+        yield (",".join(HISTORY_COLUMNS) + "\n").encode("utf-8")
+
+
+def _iter_gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def _iter_parquet(frames: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+    if pq is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    sink = _Drain()
+    writer = None
+    for frame in frames:
+        table = pa.Table.from_pandas(_normalize(frame), preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema, compression="zstd")
+        # One row group per chunk
+        writer.write_table(table)
+        yield sink.take()
+    if writer is None:
+        writer = pq.ParquetWriter(sink, pa.Table.from_pandas(_normalize(pd.DataFrame()), preserve_index=False).schema)
+    writer.close()
+    yield sink.take()
+
+
+def iter_export(frames: Iterable[pd.DataFrame], fmt: str) -> Iterator[bytes]:
+    """Encoded export of `frames` as a stream of byte chunks."""
+    if fmt == "csv":
+        return _iter_csv(frames)
+    if fmt == "csv.gz":
+        return _iter_gzip(_iter_csv(frames))
+    if fmt == "parquet":
+        return _iter_parquet(frames)
+    raise ValueError(f"Unknown export format '{fmt}'")
+
+
+def write_export(frames: Iterable[pd.DataFrame], fmt: str, path: str = None) -> str:
+    """Stream an export to `path` (a new temp file by default); returns the path."""
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix="kb_export_", suffix=EXPORT_FORMATS[fmt][1])
+        f = open(fd, "wb")
+    else:
+        f = open(path, "wb")
+    size = 0
+    with f:
+        for chunk in iter_export(frames, fmt):
+            f.write(chunk)
+            size += len(chunk)
+    logger.info(f"Export written: {fmt}, {size / 1024:.0f} KB -> {path}")
+    return path
@@ -0,0 +1,181 @@
+"""
+Search index for the knowledge base.
+Rows are tokenized once into a sparse (rows x terms) matrix of
+field-weighted term counts and extended as new history rows arrive.
+A query token matches every indexed term containing it (vectorized over
+the vocabulary), so partial words and URL fragments still hit; rows must
+match all tokens and are ranked by TF-IDF with summary and tags weighted
+above details.
+"""
+
+import re
+import threading
+from itertools import chain
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from config import get_logger
+
+logger = get_logger("kb_search")
+
+# Field -> weight of a term occurrence in that field
+SEARCH_FIELDS = {"source": 2.0, "summary": 3.0, "tags": 3.0, "details": 1.0}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Incremental updates add a block each; merged once there are more than this
+MAX_BLOCKS = 16
+
+
+def search_tokens(text: str) -> List[str]:
+    return _WORD_RE.findall((text or "").lower())
+
+
+class KBSearchIndex:
+    """Incrementally built inverted index over history rows (positional, append-only)."""
+
+    def __init__(self, fields: dict = None):
+        self.fields = fields or SEARCH_FIELDS
+        self.vocab = {}
+        self.terms = []
+        self.n_docs = 0
+        self.types = np.array([], dtype=object)
+        self._blocks = []
+        self._term_series = pd.Series([], dtype=object)
+        self._term_hits = {}
+        self._last_key = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _row_key(df, i: int):
+        row = df.iloc[i]
+        return tuple(str(row.get(c, "")) for c in ("source", "created_at", "summary"))
+
+    def sync(self, df) -> int:
+        """Index rows of `df` not seen yet; rebuilds if earlier rows changed. Returns rows added."""
+        with self._lock:
+            n = len(df) if df is not None else 0
+            if n < self.n_docs or (self.n_docs and self._row_key(df, self.n_docs - 1) != self._last_key):
+                self._reset()
+            if n == self.n_docs:
+                return 0
+            added = n - self.n_docs
+            self._add(df.iloc[self.n_docs:])
+            self._last_key = self._row_key(df, n - 1)
+            return added
+
+    def _reset(self):
+        self.vocab, self.terms = {}, []
+        self.n_docs = 0
+        self.types = np.array([], dtype=object)
+        self._blocks = []
+        self._last_key = None
+
+    def _term_ids(self, terms: np.ndarray) -> np.ndarray:
+        """Vocabulary ids for `terms`, adding unseen ones."""
+        inverse, uniq = pd.factorize(terms)
+        ids = np.empty(len(uniq), dtype=np.int64)
+        for i, term in enumerate(uniq):
+            idx = self.vocab.get(term)
+            if idx is None:
+                idx = len(self.terms)
+                self.vocab[term] = idx
+                self.terms.append(term)
+            ids[i] = idx
+        return ids[inverse]
+
+    def _add(self, frame):
+        rows, terms, data = [], [], []
+        for field, weight in self.fields.items():
+            if field not in frame.columns:
+                continue
+            found = frame[field].fillna("").astype(str).str.lower().str.findall(_WORD_RE.pattern)
+            lengths = found.str.len().to_numpy(dtype=np.int64)
+            rows.append(np.repeat(np.arange(len(frame)), lengths))
+            terms.append(np.fromiter(chain.from_iterable(found), dtype=object, count=int(lengths.sum())))
+            data.append(np.full(int(lengths.sum()), weight, dtype=np.float32))
+
+        rows = np.concatenate(rows) if rows else np.array([], dtype=np.int64)
+        terms = np.concatenate(terms) if terms else np.array([], dtype=object)
+        cols = self._term_ids(terms) if terms.size else np.array([], dtype=np.int64)
+        width = len(self.terms)
+        # Duplicate (row, term) pairs sum into weighted counts
+        self._blocks.append(sp.csc_matrix(
+            (np.concatenate(data) if data else [], (rows, cols)), shape=(len(frame), width), dtype=np.float32
+        ))
+        if len(self._blocks) > MAX_BLOCKS:
+            self._compact()
+        self._term_series = pd.Series(self.terms, dtype=object)
+        self._term_hits = {}
+        types = frame["type"].fillna("").astype(str).to_numpy(dtype=object) if "type" in frame.columns \
+            else np.full(len(frame), "", dtype=object)
+        self.types = np.concatenate([self.types, types])
+        self.n_docs += len(frame)
+
+    def _compact(self):
+        """Merge the per-update blocks into one matrix (vocabulary widths differ per block)."""
+        width = len(self.terms)
+        widened = [sp.csc_matrix((b.data, b.indices, np.pad(b.indptr, (0, width - b.shape[1]), mode="edge")),
+                                 shape=(b.shape[0], width)) for b in self._blocks]
+        self._blocks = [sp.vstack(widened, format="csc")]
+
+    def _term_frequency(self, cols: np.ndarray) -> np.ndarray:
+        """Summed weighted counts of the given term columns, per row."""
+        parts = []
+        for block in self._blocks:
+            own = cols[cols < block.shape[1]]
+            parts.append(np.asarray(block[:, own].sum(axis=1)).ravel() if own.size else np.zeros(block.shape[0]))
+        return np.concatenate(parts) if parts else np.zeros(0)
+
+    def _columns_for(self, token: str) -> np.ndarray:
+        """Term columns containing `token` (cached until the vocabulary grows)."""
+        cols = self._term_hits.get(token)
+        if cols is None:
+            cols = np.flatnonzero(self._term_series.str.contains(token, regex=False).to_numpy())
+            self._term_hits[token] = cols
+        return cols
+
+    def search(self, query: str, types: Optional[Iterable[str]] = None, limit: int = None) -> np.ndarray:
+        """
+        Positions of matching rows, best first. With an empty query every
+        row (after the type filter) is returned in index order.
+        """
+        with self._lock:
+            keep = np.ones(self.n_docs, dtype=bool)
+            if types:
+                keep &= np.isin(self.types, list(types))
+            tokens = list(dict.fromkeys(search_tokens(query)))
+            if not tokens:
+                return np.flatnonzero(keep)[:limit]
+
+            score = np.zeros(self.n_docs, dtype=np.float64)
+            for token in tokens:
+                cols = self._columns_for(token)
+                if cols.size == 0:
+                    return np.array([], dtype=np.int64)
+                tf = self._term_frequency(cols)
+                hit = tf > 0
+                keep &= hit
+                idf = np.log((1.0 + self.n_docs) / (1.0 + hit.sum())) + 1.0
+                score[hit] += idf * (1.0 + np.log(tf[hit]))
+
+            matches = np.flatnonzero(keep)
+            # Best score first, newest first among equal scores
+            order = matches[np.lexsort((-matches, -score[matches]))]
+            return order[:limit]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> KBSearchIndex:
+    """Process-wide index over the knowledge base."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = KBSearchIndex()
+    return _index
@@ -0,0 +1,233 @@
+"""
+Write-behind buffer for knowledge-base rows.
+add_entry() appends rows to a local SQLite spool and returns immediately;
+a background flusher coalesces spooled rows into append_rows batches,
+flushing when KB_BATCH_SIZE rows are waiting or the oldest has waited
+KB_FLUSH_INTERVAL_SECONDS. Quota (429) and server errors back off with
+jitter; a batch rejected outright is split so only the offending rows
+are held back. Rows stay in the spool until the sheet accepts them, so
+nothing is lost if the process dies (delivery is at-least-once).
+"""
+
+import json
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Optional
+
+from config import (
+    KB_SPOOL_PATH,
+    KB_BATCH_SIZE,
+    KB_FLUSH_INTERVAL_SECONDS,
+    KB_RETRY_MAX_SECONDS,
+    KB_SPOOL_MAX_ATTEMPTS,
+    get_logger
+)
+
+logger = get_logger("kb_spool")
+
+CLAIM_SECONDS = 120
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+def _status_code(e) -> Optional[int]:
+    code = getattr(e, "code", None)
+    if code is None:
+        code = getattr(getattr(e, "response", None), "status_code", None)
+    return code
+
+
+def _permanent(e) -> bool:
+    """An HTTP error retrying won't fix; errors without a status (network) are retried."""
+    code = _status_code(e)
+    return code is not None and code not in RETRYABLE_STATUS
+
+
+class KBSpool:
+    """Durable row spool plus a flusher thread that writes batches via `writer(rows)`."""
+
+    def __init__(self, writer: Callable[[List[list]], None], path=KB_SPOOL_PATH,
+                 batch_size=KB_BATCH_SIZE, flush_interval=KB_FLUSH_INTERVAL_SECONDS,
+                 retry_max_seconds=KB_RETRY_MAX_SECONDS, max_attempts=KB_SPOOL_MAX_ATTEMPTS):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_max_seconds = retry_max_seconds
+        self.max_attempts = max_attempts
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.flushed = 0
+        self.batches = 0
+        self.last_error = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+        CREATE TABLE IF NOT EXISTS kb_spool (
+            id            INTEGER PRIMARY KEY AUTOINCREMENT,
+            row           TEXT    NOT NULL,  -- JSON list, worksheet column order
+            created_at    REAL    NOT NULL,
+            attempts      INTEGER NOT NULL DEFAULT 0,
+            dead          INTEGER NOT NULL DEFAULT 0,
+            last_error    TEXT,
+            claimed_by    TEXT,
+            claimed_until REAL    NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_kb_spool_pending ON kb_spool(dead, claimed_until, id);
+        """)
+
+    # --- PRODUCER ---
+    def append(self, row: list):
+        """Durably spool one row and nudge the flusher."""
+        with self._lock:
+            self._conn.execute("INSERT INTO kb_spool (row, created_at) VALUES (?, ?)", (json.dumps(row), time.time()))
+        self.start()
+        self._wake.set()
+
+    def pending_rows(self) -> List[list]:
+        """Rows accepted but not yet written to the sheet, oldest first."""
+        with self._lock:
+            rows = self._conn.execute("SELECT row FROM kb_spool WHERE dead = 0 ORDER BY id").fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending, dead = self._conn.execute(
+                "SELECT COALESCE(SUM(dead = 0), 0), COALESCE(SUM(dead = 1), 0) FROM kb_spool"
+            ).fetchone()
+        return {
+            "pending": pending,
+            "dead": dead,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "retry_in": max(0.0, round(self._retry_at - time.time(), 1)),
+            "last_error": self.last_error,
+        }
+
+    # --- FLUSHER ---
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="kb-spool-flusher", daemon=True)
+            self._thread.start()
+
+    def _due(self) -> bool:
+        """A batch is due when enough rows are waiting or the oldest has waited long enough."""
+        with self._lock:
+            count, oldest = self._conn.execute(
+                "SELECT COUNT(*), MIN(created_at) FROM kb_spool WHERE dead = 0 AND claimed_until < ?", (time.time(),)
+            ).fetchone()
+        if not count:
+            return False
+        return count >= self.batch_size or time.time() - oldest >= self.flush_interval
+
+    def _claim(self) -> list:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, row FROM kb_spool WHERE dead = 0 AND claimed_until < ? ORDER BY id LIMIT ?",
+                    (now, self.batch_size)
+                ).fetchall()
+                if rows:
+                    marks = ",".join("?" * len(rows))
+                    self._conn.execute(
+                        f"UPDATE kb_spool SET claimed_by = ?, claimed_until = ?, attempts = attempts + 1 WHERE id IN ({marks})",
+                        (self.name, now + CLAIM_SECONDS, *[r[0] for r in rows])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return rows
+
+    def _write(self, batch) -> tuple:
+        """
+        Write claimed rows; returns (ids written, [(id, error)] not written).
+        A batch rejected with a non-retryable error is split in half and each
+        half written on its own, so one bad row doesn't hold back the rest.
+        A retryable error stops the split; the remaining rows wait for backoff.
+        """
+        try:
+            self.writer([json.loads(r[1]) for r in batch])
+            return [r[0] for r in batch], []
+        except Exception as e:
+            if len(batch) == 1 or not _permanent(e):
+                return [], [(r[0], e) for r in batch]
+        mid = len(batch) // 2
+        written, failed = self._write(batch[:mid])
+        if failed and not _permanent(failed[-1][1]):
+            return written, failed + [(r[0], failed[-1][1]) for r in batch[mid:]]
+        more_written, more_failed = self._write(batch[mid:])
+        return written + more_written, failed + more_failed
+
+    def flush_once(self) -> int:
+        """Write one batch; returns rows written (0 if nothing was due or no row went through)."""
+        batch = self._claim()
+        if not batch:
+            return 0
+        written, failed = self._write(batch)
+
+        with self._lock:
+            if written:
+                self._conn.execute(f"DELETE FROM kb_spool WHERE id IN ({','.join('?' * len(written))})", written)
+            # Release the claim; a row out of attempts that fails on its own with a non-retryable error is parked
+            for row_id, e in failed:
+                self._conn.execute(
+                    "UPDATE kb_spool SET claimed_until = 0, last_error = ?, "
+                    "dead = CASE WHEN ? AND attempts >= ? THEN 1 ELSE dead END WHERE id = ?",
+                    (f"{type(e).__name__}: {str(e)[:200]}", _permanent(e), self.max_attempts, row_id)
+                )
+
+        if written:
+            self.flushed += len(written)
+            self.batches += 1
+            logger.info(f"KB batch written: {len(written)} rows")
+        if failed:
+            e = failed[-1][1]
+            self.last_error = f"{type(e).__name__}: {str(e)[:200]}"
+            self._failures += 1
+            delay = min(self.retry_max_seconds, 2 ** min(self._failures, 10)) * random.uniform(0.5, 1.0)
+            self._retry_at = time.time() + delay
+            logger.warning(f"KB batch: {len(failed)} of {len(batch)} rows failed (HTTP {_status_code(e)}), "
+                           f"retrying in {delay:.1f}s: {self.last_error}")
+        else:
+            self._failures = 0
+            self._retry_at = 0.0
+            self.last_error = None
+        return len(written)
+
+    def _run(self):
+        while True:
+            wait = max(0.05, self._retry_at - time.time()) if self._retry_at else self.flush_interval / 2
+            self._wake.wait(timeout=wait)
+            self._wake.clear()
+            if time.time() < self._retry_at:
+                continue
+            try:
+                while time.time() >= self._retry_at and self._due() and self.flush_once():
+                    pass
+            except Exception as e:
+                logger.error(f"KB flusher error: {str(e)}")
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """Write everything spooled now (ignoring thresholds); True if the spool drained."""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.stats()["pending"] == 0:
+                return True
+            if time.time() >= self._retry_at and not self.flush_once():
+                time.sleep(0.1)
+            elif time.time() < self._retry_at:
+                time.sleep(min(0.5, self._retry_at - time.time()))
+        return self.stats()["pending"] == 0
@@ -0,0 +1,160 @@
+"""
+Storage backends for the knowledge base.
+database.py talks to a KBBackend; the local SQLite backend is the default
+primary store and Google Sheets (database.SheetsBackend) can be the
+primary or an asynchronously replicated sink.
+"""
+
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import List
+
+import pandas as pd
+
+from config import KB_DB_PATH, get_logger
+
+logger = get_logger("kb_store")
+
+HISTORY_COLUMNS = ["type", "source", "details", "amount", "summary", "tags", "images", "created_at"]
+
+
+class KBBackend(ABC):
+    """Interface behind add_entry / load_history / get_db_stats / check_connection."""
+
+    name = "base"
+
+    def init(self) -> bool:
+        """Create whatever the store needs; True once it is ready. Safe to call repeatedly."""
+        return True
+
+    @abstractmethod
+    def add(self, row: list):
+        """Store one row in HISTORY_COLUMNS order; raises on failure."""
+
+    def add_many(self, rows: List[list]):
+        for row in rows:
+            self.add(row)
+
+    @abstractmethod
+    def load(self, refresh: bool = False) -> pd.DataFrame:
+        """All rows as a DataFrame with HISTORY_COLUMNS."""
+
+    def stats(self) -> dict:
+        """
+        {"total", "by_type": {type: count}, "latest": created_at text or None,
+        "size_bytes"}; backends answer from counters/metadata, not by loading rows.
+        """
+        df = self.load()
+        by_type = df["type"].value_counts().to_dict() if not df.empty else {}
+        latest = df["created_at"].max() if not df.empty else None
+        return {"total": len(df), "by_type": by_type, "latest": None if pd.isna(latest) else str(latest), "size_bytes": None}
+
+    @abstractmethod
+    def check(self) -> dict:
+        """{"status": bool, "error": str | None}"""
+
+
+class SQLiteBackend(KBBackend):
+    """Local SQLite store; the DataFrame is cached and extended by row id."""
+
+    name = "sqlite"
+
+    def __init__(self, path=KB_DB_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._df = None
+        self._df_last_id = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self.init()
+
+    def init(self) -> bool:
+        with self._lock, self._conn:
+            self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS kb_entries (
+                id         INTEGER PRIMARY KEY AUTOINCREMENT,
+                type       TEXT NOT NULL,
+                source     TEXT NOT NULL,
+                details    TEXT,
+                amount     REAL,
+                summary    TEXT NOT NULL,
+                tags       TEXT,
+                images     TEXT,
+                created_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_kb_entries_type ON kb_entries(type);
+
+            -- Per-type counters kept by triggers, so stats never scan kb_entries
+            CREATE TABLE IF NOT EXISTS kb_type_counts (
+                type   TEXT PRIMARY KEY,
+                n      INTEGER NOT NULL,
+                latest TEXT
+            );
+            CREATE TRIGGER IF NOT EXISTS kb_entries_count_ins AFTER INSERT ON kb_entries BEGIN
+                INSERT INTO kb_type_counts (type, n, latest) VALUES (NEW.type, 1, NEW.created_at)
+                ON CONFLICT(type) DO UPDATE SET n = n + 1, latest = MAX(COALESCE(latest, ''), NEW.created_at);
+            END;
+            CREATE TRIGGER IF NOT EXISTS kb_entries_count_del AFTER DELETE ON kb_entries BEGIN
+                UPDATE kb_type_counts SET n = n - 1 WHERE type = OLD.type;
+            END;
+            """)
+            # Counters for a store created before they existed
+            if self._conn.execute("SELECT COUNT(*) FROM kb_type_counts").fetchone()[0] == 0:
+                self._conn.execute(
+                    "INSERT INTO kb_type_counts (type, n, latest) "
+                    "SELECT type, COUNT(*), MAX(created_at) FROM kb_entries GROUP BY type"
+                )
+        return True
+
+    def add(self, row: list):
+        self.add_many([row])
+
+    def add_many(self, rows: List[list]):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO kb_entries ({', '.join(HISTORY_COLUMNS)}) VALUES ({','.join('?' * len(HISTORY_COLUMNS))})",
+                rows
+            )
+
+    def _read(self, after_id: int) -> pd.DataFrame:
+        df = pd.read_sql_query(
+            f"SELECT id, {', '.join(HISTORY_COLUMNS)} FROM kb_entries WHERE id > ? ORDER BY id",
+            self._conn, params=(after_id,)
+        )
+        df["created_at"] = pd.to_datetime(df["created_at"], errors="coerce")
+        return df
+
+    def load(self, refresh: bool = False) -> pd.DataFrame:
+        with self._lock:
+            last_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM kb_entries").fetchone()[0]
+            if refresh or self._df is None or last_id < self._df_last_id:
+                self._df = self._read(0)
+            elif last_id > self._df_last_id:
+                new = self._read(self._df_last_id)
+                self._df = new if self._df.empty else pd.concat([self._df, new], ignore_index=True)
+            self._df_last_id = last_id
+            if self._df.empty:
+                return pd.DataFrame()
+            return self._df.drop(columns="id")
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT type, n, latest FROM kb_type_counts WHERE n > 0").fetchall()
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+            pages = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        return {
+            "total": sum(n for _, n, _ in rows),
+            "by_type": {t: n for t, n, _ in rows},
+            "latest": max((l for _, _, l in rows if l), default=None),
+            "size_bytes": page_size * pages,
+        }
+
+    def check(self) -> dict:
+        try:
+            with self._lock:
+                self._conn.execute("SELECT 1 FROM kb_entries LIMIT 1").fetchall()
+            return {"status": True, "error": None}
+        except Exception as e:
+            return {"status": False, "error": f"SQLite error: {str(e)}"}
@@ -4,17 +4,18 @@ import subprocess
 import os
 import logging
 import sys
-from config import get_logger, is_production
+from config import get_logger, is_production, AI_MODEL, AI_PROMPT_MAX_CHARS
+from context_builder import fit_prompt
 
 logger = get_logger("ai_server")
 
 app = FastAPI(title="3D Brain AI Server", version="1.0.0")
-MODEL = os.getenv("AI_MODEL", "phi3:mini")
+MODEL = AI_MODEL
 
 # Request/Response models
 class AnalysisRequest(BaseModel):
     prompt: str
-    max_length: int = 6000
+    max_length: int = AI_PROMPT_MAX_CHARS
 
 class HealthResponse(BaseModel):
     status: str
@@ -42,10 +43,10 @@ def analyze(payload: AnalysisRequest):
             logger.warning("Empty prompt received")
             raise HTTPException(status_code=400, detail="Prompt cannot be empty")
         
-        # Truncate prompt if too long
+        # Shrink prompt if too long, keeping the most relevant lines
         if len(prompt) > max_length:
-            logger.info(f"Prompt truncated from {len(prompt)} to {max_length} chars")
-            prompt = prompt[:max_length]
+            logger.info(f"Prompt compacted from {len(prompt)} to {max_length} chars")
+            prompt = fit_prompt(prompt, max_length)
         
         logger.info(f"Starting analysis with model '{MODEL}' (input: {len(prompt)} chars)")
         
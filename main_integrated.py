@@ -7,16 +7,26 @@
 
 from fastapi import FastAPI, Depends, HTTPException, status, File, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-import sqlite3, json, os, io
+import sqlite3, json, os, hashlib
 import requests
-import trimesh
 import numpy as np
+from ai_cache import get_prompt_cache
+from scrape_metrics import get_scrape_metrics
+from kb_export import EXPORT_FORMATS, available_formats, iter_export, iter_store_frames
+from context_builder import fit_prompt
+from app_utils import load_mesh, quote_matrix
+from print_scheduler import parse_hours, schedule
+from config import (
+    AI_MODEL, PRINTER_PROFILES, MATERIAL_DENSITIES, QUOTE_COST_PER_KG, QUOTE_ELECTRICITY_RATE, QUOTE_LABOR_RATE,
+    QUOTE_PROFIT_MARGIN, QUOTE_GST_PERCENT, QUOTE_BULK_MAX, QUOTE_MAX_UPLOAD_MB, SCHEDULER_REFERENCE_SPEED,
+)
 
 # ── CONFIG ────────────────────────────────────────────────────
 SECRET_KEY = os.getenv("SECRET_KEY", "CHANGE_THIS_IN_PRODUCTION_supersecret123")
@@ -25,6 +35,17 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 DB_PATH = "printforge_brain.db"
 AI_SERVER_URL = os.getenv("AI_SERVER_URL", "http://127.0.0.1:8000")
 
+# Pricing used for server-computed quotes; rows in pricing_settings override these
+PRICING_DEFAULTS = {
+    "cost_per_kg": QUOTE_COST_PER_KG,
+    "electricity_rate": QUOTE_ELECTRICITY_RATE,
+    "labor_rate": QUOTE_LABOR_RATE,
+    "profit_margin": QUOTE_PROFIT_MARGIN,
+    "gst_percent": QUOTE_GST_PERCENT,
+    "infill": 20.0,
+    "walls": 20.0,
+}
+
 app = FastAPI(
     title="PrintForge + 3D Business Brain API",
     version="1.0.0",
@@ -87,6 +108,7 @@ def init_db():
         material    TEXT,
         print_time  TEXT,
         weight_g    REAL,
+        nozzle      REAL,    -- required nozzle (mm); NULL = any
         image_url   TEXT,
         ai_analysis TEXT,    -- JSON field for AI insights
         is_quote    INTEGER DEFAULT 0,  -- 1 if converted from quote
@@ -124,6 +146,11 @@ def init_db():
         id          INTEGER PRIMARY KEY AUTOINCREMENT,
         user_id     INTEGER NOT NULL REFERENCES users(id),
         file_name   TEXT    NOT NULL,
+        mesh_id     TEXT    REFERENCES mesh_analyses(mesh_id),
+        printer     TEXT,
+        material    TEXT,
+        infill      REAL,
+        walls       REAL,
         weight_g    REAL,
         print_time  REAL,
         material_cost REAL,
@@ -137,6 +164,34 @@ def init_db():
         created_at  TEXT    DEFAULT (datetime('now'))
     );
 
+    -- Mesh analysis cache, keyed by the SHA-256 of the STL bytes
+    CREATE TABLE IF NOT EXISTS mesh_analyses (
+        mesh_id     TEXT    PRIMARY KEY,
+        file_name   TEXT,
+        volume_cm3  REAL    NOT NULL,
+        size_x      REAL,
+        size_y      REAL,
+        size_z      REAL,
+        created_at  TEXT    DEFAULT (datetime('now'))
+    );
+
+    CREATE TABLE IF NOT EXISTS pricing_settings (
+        key         TEXT    PRIMARY KEY,
+        value       REAL    NOT NULL,
+        updated_at  TEXT    DEFAULT (datetime('now'))
+    );
+
+    CREATE TABLE IF NOT EXISTS farm_printers (
+        id          INTEGER PRIMARY KEY AUTOINCREMENT,
+        name        TEXT    NOT NULL UNIQUE,
+        profile     TEXT,
+        speed       REAL    NOT NULL,  -- mm/s
+        nozzle      REAL    NOT NULL,  -- mm
+        materials   TEXT,              -- JSON array; empty = any
+        active      INTEGER DEFAULT 1,
+        created_at  TEXT    DEFAULT (datetime('now'))
+    );
+
     CREATE TABLE IF NOT EXISTS scraped_models (
         id          INTEGER PRIMARY KEY AUTOINCREMENT,
         user_id     INTEGER REFERENCES users(id),
@@ -148,6 +203,16 @@ def init_db():
         created_at  TEXT    DEFAULT (datetime('now'))
     );
     """)
+    # Columns added after the first release
+    added = {
+        "quotes": [("mesh_id", "TEXT"), ("printer", "TEXT"), ("material", "TEXT"), ("infill", "REAL"), ("walls", "REAL")],
+        "products": [("nozzle", "REAL")],
+    }
+    for table, columns in added.items():
+        present = {r["name"] for r in conn.execute(f"PRAGMA table_info({table})")}
+        for col, decl in columns:
+            if col not in present:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {col} {decl}")
     conn.commit()
 
     # Seed sample products
@@ -174,6 +239,12 @@ def row_to_dict(row):
 def rows_to_list(rows):
     return [dict(r) for r in rows]
 
+def farm_printer_dict(row) -> dict:
+    d = dict(row)
+    d["materials"] = json.loads(d["materials"] or "[]")
+    d["active"] = bool(d["active"])
+    return d
+
 def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_db)):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -207,6 +278,7 @@ class ProductCreate(BaseModel):
     material: Optional[str] = None
     print_time: Optional[str] = None
     weight_g: Optional[float] = None
+    nozzle: Optional[float] = None
     image_url: Optional[str] = None
 
 class OrderItem(BaseModel):
@@ -224,15 +296,32 @@ class StatusUpdate(BaseModel):
     status: str
 
 class QuoteCreate(BaseModel):
-    file_name: str
-    weight_g: float
-    print_time: float
-    material_cost: float
-    electricity_cost: float
-    labor_cost: float
-    subtotal: float
-    gst_amount: float
-    total: float
+    mesh_id: str  # from POST /quotes/analyze
+    file_name: Optional[str] = None
+    printer: Optional[str] = None
+    material: Optional[str] = None
+    infill: Optional[float] = None
+    walls: Optional[float] = None
+
+class QuoteBulkCreate(BaseModel):
+    items: List[QuoteCreate]
+
+class FarmPrinterCreate(BaseModel):
+    name: str
+    profile: Optional[str] = None  # key of PRINTER_PROFILES; fills speed and nozzle
+    speed: Optional[float] = None
+    nozzle: Optional[float] = None
+    materials: List[str] = []  # empty = any material
+    active: bool = True
+
+class PricingUpdate(BaseModel):
+    cost_per_kg: Optional[float] = None
+    electricity_rate: Optional[float] = None
+    labor_rate: Optional[float] = None
+    profit_margin: Optional[float] = None
+    gst_percent: Optional[float] = None
+    infill: Optional[float] = None
+    walls: Optional[float] = None
 
 class QuoteAcceptCreate(BaseModel):
     name: str  # Product name
@@ -242,55 +331,136 @@ class QuoteAcceptCreate(BaseModel):
 
 # ── AI HELPERS ────────────────────────────────────────────────
 def call_ai_analysis(text: str) -> str:
-    """Call local AI server for analysis"""
+    """Call local AI server for analysis (served from the prompt cache when possible)"""
+    prompt = fit_prompt(text)
+    cache = get_prompt_cache()
+    cached = cache.get(AI_MODEL, prompt)
+    if cached is not None:
+        return cached
     try:
         r = requests.post(
             f"{AI_SERVER_URL}/analyze",
-            json={"prompt": text[:6000]},
+            json={"prompt": prompt},
             timeout=30
         )
         if r.status_code == 200:
-            return r.json().get("content", "Analysis complete")
+            content = r.json().get("content")
+            if not content:
+                return "Analysis complete"
+            cache.set(AI_MODEL, prompt, content)
+            return content
         return "AI analysis unavailable"
     except:
         return "AI server offline"
 
 # ── STL ANALYSIS ──────────────────────────────────────────────
-def analyze_stl_file(file_content: bytes, density=1.24, infill=20, wall=20):
-    """Analyze STL file and return dimensions, weight, etc."""
-    try:
-        mesh = trimesh.load(file_obj=io.BytesIO(file_content), file_type='stl', force='mesh')
-        
-        if not mesh.is_watertight:
-            mesh = mesh.convex_hull
-        
-        if mesh.is_empty:
-            return None
-        
-        volume_cm3 = mesh.volume / 1000.0
-        wall_fraction = wall / 100
-        infill_fraction = infill / 100
-        effective_volume = (volume_cm3 * wall_fraction) + (volume_cm3 * (1 - wall_fraction) * infill_fraction)
-        weight_g = effective_volume * density
-        
-        # Estimate print time (rough calculation)
-        extrusion_rate = 60 * 0.2 * 0.4  # speed * layer_height * nozzle
-        total_mm3 = effective_volume * 1000
-        print_time_hours = (total_mm3 / extrusion_rate) / 3600 if extrusion_rate > 0 else 0
-        
-        return {
-            "volume_cm3": round(volume_cm3, 2),
-            "effective_volume": round(effective_volume, 2),
-            "weight_g": round(weight_g, 2),
-            "print_time_hours": round(print_time_hours, 2),
-            "dimensions": {
-                "x": round(mesh.extents[0], 2),
-                "y": round(mesh.extents[1], 2),
-                "z": round(mesh.extents[2], 2)
+def analyze_mesh(db, file_content: bytes, file_name: str = None) -> dict:
+    """Volume and bounding box of an STL, cached by content hash so re-uploads skip trimesh."""
+    mesh_id = hashlib.sha256(file_content).hexdigest()
+    row = db.execute("SELECT * FROM mesh_analyses WHERE mesh_id = ?", (mesh_id,)).fetchone()
+    if row is None:
+        mesh = load_mesh(file_content)
+        x, y, z = (round(float(v), 2) for v in mesh.extents)
+        db.execute(
+            "INSERT OR IGNORE INTO mesh_analyses (mesh_id, file_name, volume_cm3, size_x, size_y, size_z) VALUES (?,?,?,?,?,?)",
+            (mesh_id, file_name, mesh.volume / 1000.0, x, y, z)
+        )
+        db.commit()
+        row = db.execute("SELECT * FROM mesh_analyses WHERE mesh_id = ?", (mesh_id,)).fetchone()
+        cached = False
+    else:
+        cached = True
+    return {
+        "mesh_id": mesh_id,
+        "file_name": file_name or row["file_name"],
+        "volume_cm3": round(row["volume_cm3"], 2),
+        "dimensions": {"x": row["size_x"], "y": row["size_y"], "z": row["size_z"]},
+        "cached": cached,
+    }
+
+# ── QUOTE PRICING ─────────────────────────────────────────────
+def get_pricing(db) -> dict:
+    pricing = dict(PRICING_DEFAULTS)
+    pricing.update({r["key"]: r["value"] for r in db.execute("SELECT key, value FROM pricing_settings")})
+    return pricing
+
+def price_quotes(db, items: List[QuoteCreate]) -> List[dict]:
+    """
+    Server-side figures for each quote request. Client prices are never
+    trusted: volumes come from mesh_analyses and rates from get_pricing();
+    items sharing infill/walls are priced in one quote_matrix() call.
+    """
+    pricing = get_pricing(db)
+    printers, materials = list(PRINTER_PROFILES), list(MATERIAL_DENSITIES)
+    mesh_ids = list({item.mesh_id for item in items})
+    meshes = {}
+    for start in range(0, len(mesh_ids), 500):  # stay under SQLite's bound-parameter limit
+        chunk = mesh_ids[start:start + 500]
+        for r in db.execute(f"SELECT mesh_id, file_name, volume_cm3 FROM mesh_analyses WHERE mesh_id IN ({','.join('?' * len(chunk))})", chunk):
+            meshes[r["mesh_id"]] = r
+
+    resolved, groups = [], {}
+    for i, item in enumerate(items):
+        where = f"Item {i}: " if len(items) > 1 else ""
+        if item.mesh_id not in meshes:
+            raise HTTPException(status_code=404, detail=f"{where}unknown mesh_id; upload the file to /quotes/analyze first")
+        printer = item.printer or printers[0]
+        material = item.material or materials[0]
+        if printer not in PRINTER_PROFILES:
+            raise HTTPException(status_code=400, detail=f"{where}unknown printer '{printer}' (choose from {printers})")
+        if material not in MATERIAL_DENSITIES:
+            raise HTTPException(status_code=400, detail=f"{where}unknown material '{material}' (choose from {materials})")
+        infill = pricing["infill"] if item.infill is None else item.infill
+        walls = pricing["walls"] if item.walls is None else item.walls
+        if not (0 <= infill <= 100 and 0 <= walls <= 100):
+            raise HTTPException(status_code=400, detail=f"{where}infill and walls must be between 0 and 100")
+        resolved.append((item, meshes[item.mesh_id], printer, material, infill, walls))
+        groups.setdefault((infill, walls), []).append(i)
+
+    quotes = [None] * len(items)
+    for (infill, walls), idx in groups.items():
+        m = quote_matrix(
+            [resolved[i][1]["volume_cm3"] for i in idx], PRINTER_PROFILES, MATERIAL_DENSITIES,
+            pricing["cost_per_kg"], infill, walls,
+            pricing["electricity_rate"], pricing["labor_rate"], pricing["profit_margin"]
+        )
+        cell = (np.arange(len(idx)),
+                np.array([printers.index(resolved[i][2]) for i in idx]),
+                np.array([materials.index(resolved[i][3]) for i in idx]))
+        subtotal = np.round(m["price"][cell], 2)
+        gst = np.round(subtotal * pricing["gst_percent"] / 100, 2)
+        figures = zip(m["weight_g"][cell], m["hours"][cell], m["material"][cell],
+                      m["electricity"][cell], m["labor"][cell], subtotal, gst)
+        for i, (weight, hours, material_cost, electricity, labor, sub, tax) in zip(idx, figures):
+            item, mesh, printer, material = resolved[i][:4]
+            quotes[i] = {
+                "file_name": item.file_name or mesh["file_name"] or f"{item.mesh_id[:12]}.stl",
+                "mesh_id": item.mesh_id, "printer": printer, "material": material,
+                "infill": infill, "walls": walls,
+                "weight_g": round(float(weight), 2), "print_time": float(hours),
+                "material_cost": float(material_cost), "electricity_cost": round(float(electricity), 2),
+                "labor_cost": round(float(labor), 2), "subtotal": float(sub),
+                "gst_amount": float(tax), "total": round(float(sub + tax), 2),
             }
-        }
-    except Exception as e:
-        return None
+    return quotes
+
+QUOTE_COLUMNS = ["user_id", "file_name", "mesh_id", "printer", "material", "infill", "walls", "weight_g", "print_time",
+                 "material_cost", "electricity_cost", "labor_cost", "subtotal", "gst_amount", "total"]
+
+def save_quotes(db, user_id: int, quotes: List[dict]) -> List[int]:
+    """Insert priced quotes in one transaction; returns their ids in order."""
+    sql = f"INSERT INTO quotes ({', '.join(QUOTE_COLUMNS)}, status) VALUES ({','.join('?' * len(QUOTE_COLUMNS))}, 'pending')"
+    ids = []
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        # One statement per row: executemany can't report the ids it assigned
+        for q in quotes:
+            ids.append(db.execute(sql, [user_id] + [q[c] for c in QUOTE_COLUMNS[1:]]).lastrowid)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return ids
 
 # ── AUTH ROUTES ───────────────────────────────────────────────
 @app.post("/auth/register")
@@ -405,17 +575,43 @@ def my_orders(user=Depends(get_current_user), db=Depends(get_db)):
     return result
 
 # ── QUOTE ROUTES (NEW) ────────────────────────────────────────
+@app.post("/quotes/analyze")
+def analyze_quote_files(files: List[UploadFile] = File(...), user=Depends(get_current_user), db=Depends(get_db)):
+    """Analyze uploaded STL files once; quotes then refer to them by mesh_id"""
+    results = []
+    for f in files:
+        content = f.file.read(QUOTE_MAX_UPLOAD_MB * 1024 * 1024 + 1)
+        if len(content) > QUOTE_MAX_UPLOAD_MB * 1024 * 1024:
+            results.append({"file_name": f.filename, "error": f"File larger than {QUOTE_MAX_UPLOAD_MB} MB"})
+            continue
+        try:
+            results.append(analyze_mesh(db, content, f.filename))
+        except Exception as e:
+            results.append({"file_name": f.filename, "error": f"Could not read STL: {e}"})
+    return results
+
 @app.post("/quotes")
 def create_quote(data: QuoteCreate, user=Depends(get_current_user), db=Depends(get_db)):
-    """User creates a quote from uploaded STL file"""
-    cur = db.execute("""
-        INSERT INTO quotes 
-        (user_id, file_name, weight_g, print_time, material_cost, electricity_cost, labor_cost, subtotal, gst_amount, total, status)
-        VALUES (?,?,?,?,?,?,?,?,?,?, 'pending')
-    """, (user["id"], data.file_name, data.weight_g, data.print_time, data.material_cost, 
-          data.electricity_cost, data.labor_cost, data.subtotal, data.gst_amount, data.total))
-    db.commit()
-    return {"message": "Quote saved", "quote_id": cur.lastrowid}
+    """User creates a quote for an analyzed STL file; prices are computed here"""
+    quote = price_quotes(db, [data])[0]
+    quote_id = save_quotes(db, user["id"], [quote])[0]
+    return {"message": "Quote saved", "quote_id": quote_id, "quote": quote}
+
+@app.post("/quotes/bulk", status_code=201)
+def create_quotes_bulk(data: QuoteBulkCreate, user=Depends(get_current_user), db=Depends(get_db)):
+    """Price and save many quotes at once, all or nothing"""
+    if not data.items:
+        raise HTTPException(status_code=400, detail="No items")
+    if len(data.items) > QUOTE_BULK_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {QUOTE_BULK_MAX} items per request")
+    quotes = price_quotes(db, data.items)
+    ids = save_quotes(db, user["id"], quotes)
+    return {
+        "message": f"{len(ids)} quotes saved",
+        "quote_ids": ids,
+        "total": round(sum(q["total"] for q in quotes), 2),
+        "quotes": quotes,
+    }
 
 @app.get("/quotes/my")
 def my_quotes(user=Depends(get_current_user), db=Depends(get_db)):
@@ -432,11 +628,17 @@ def accept_quote_as_product(quote_id: int, data: QuoteAcceptCreate, user=Depends
     if not quote:
         raise HTTPException(status_code=404, detail="Quote not found")
     
-    # Create product from quote
+    # Create product from quote; print time is restated at the scheduler's reference speed
+    profile = PRINTER_PROFILES.get(quote["printer"] or "")
+    print_time = None
+    if quote["print_time"]:
+        hours = quote["print_time"] * (profile["speed"] / SCHEDULER_REFERENCE_SPEED if profile else 1)
+        print_time = f"{hours:.2f}hr"
     cur = db.execute("""
-        INSERT INTO products (name, description, price, stock, category, is_quote)
-        VALUES (?,?,?,?,?, 1)
-    """, (data.name, data.description, data.price, data.stock, "Custom Quote"))
+        INSERT INTO products (name, description, price, stock, category, material, print_time, weight_g, nozzle, is_quote)
+        VALUES (?,?,?,?,?,?,?,?,?, 1)
+    """, (data.name, data.description, data.price, data.stock, "Custom Quote",
+          quote["material"], print_time, quote["weight_g"], profile["nozzle"] if profile else None))
     prod_id = cur.lastrowid
     
     # Update quote status
@@ -454,8 +656,8 @@ def admin_list_products(admin=Depends(require_admin), db=Depends(get_db)):
 @app.post("/admin/products", status_code=201)
 def admin_add_product(data: ProductCreate, admin=Depends(require_admin), db=Depends(get_db)):
     cur = db.execute(
-        "INSERT INTO products (name, description, price, stock, category, material, print_time, weight_g, image_url) VALUES (?,?,?,?,?,?,?,?,?)",
-        (data.name, data.description, data.price, data.stock, data.category, data.material, data.print_time, data.weight_g, data.image_url)
+        "INSERT INTO products (name, description, price, stock, category, material, print_time, weight_g, nozzle, image_url) VALUES (?,?,?,?,?,?,?,?,?,?)",
+        (data.name, data.description, data.price, data.stock, data.category, data.material, data.print_time, data.weight_g, data.nozzle, data.image_url)
     )
     db.commit()
     return {"message": "Product added", "id": cur.lastrowid}
@@ -467,9 +669,9 @@ def admin_update_product(product_id: int, data: ProductCreate, admin=Depends(req
         raise HTTPException(status_code=404, detail="Product not found")
     db.execute("""
         UPDATE products SET name=?, description=?, price=?, stock=?, category=?,
-        material=?, print_time=?, weight_g=?, image_url=? WHERE id=?
+        material=?, print_time=?, weight_g=?, nozzle=?, image_url=? WHERE id=?
     """, (data.name, data.description, data.price, data.stock, data.category,
-          data.material, data.print_time, data.weight_g, data.image_url, product_id))
+          data.material, data.print_time, data.weight_g, data.nozzle, data.image_url, product_id))
     db.commit()
     return {"message": "Updated"}
 
@@ -504,6 +706,78 @@ def admin_list_quotes(admin=Depends(require_admin), db=Depends(get_db)):
     """).fetchall()
     return rows_to_list(quotes)
 
+@app.get("/admin/pricing")
+def admin_get_pricing(admin=Depends(require_admin), db=Depends(get_db)):
+    """Rates used for server-computed quotes"""
+    return {"pricing": get_pricing(db), "printers": PRINTER_PROFILES, "materials": MATERIAL_DENSITIES}
+
+@app.put("/admin/pricing")
+def admin_update_pricing(data: PricingUpdate, admin=Depends(require_admin), db=Depends(get_db)):
+    """Override pricing defaults; applies to quotes created from now on"""
+    updates = data.model_dump(exclude_none=True)
+    if any(v < 0 for v in updates.values()):
+        raise HTTPException(status_code=400, detail="Pricing values must not be negative")
+    if any(updates.get(k, 0) > 100 for k in ("infill", "walls")):
+        raise HTTPException(status_code=400, detail="infill and walls must be between 0 and 100")
+    db.executemany("""
+        INSERT INTO pricing_settings (key, value, updated_at) VALUES (?, ?, datetime('now'))
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+    """, list(updates.items()))
+    db.commit()
+    return {"message": "Pricing updated", "pricing": get_pricing(db)}
+
+@app.get("/admin/farm/printers")
+def admin_list_farm_printers(admin=Depends(require_admin), db=Depends(get_db)):
+    return [farm_printer_dict(r) for r in db.execute("SELECT * FROM farm_printers ORDER BY name")]
+
+@app.post("/admin/farm/printers", status_code=201)
+def admin_add_farm_printer(data: FarmPrinterCreate, admin=Depends(require_admin), db=Depends(get_db)):
+    profile = PRINTER_PROFILES.get(data.profile) if data.profile else {}
+    if profile is None:
+        raise HTTPException(status_code=400, detail=f"Unknown profile (choose from {list(PRINTER_PROFILES)})")
+    speed = data.speed or profile.get("speed")
+    nozzle = data.nozzle or profile.get("nozzle")
+    if not speed or not nozzle or speed <= 0 or nozzle <= 0:
+        raise HTTPException(status_code=400, detail="Give a profile or a positive speed and nozzle")
+    try:
+        cur = db.execute(
+            "INSERT INTO farm_printers (name, profile, speed, nozzle, materials, active) VALUES (?,?,?,?,?,?)",
+            (data.name, data.profile, speed, nozzle, json.dumps([m.upper() for m in data.materials]), int(data.active))
+        )
+    except sqlite3.IntegrityError:
+        raise HTTPException(status_code=400, detail="A printer with this name already exists")
+    db.commit()
+    return {"message": "Printer added", "id": cur.lastrowid}
+
+@app.delete("/admin/farm/printers/{printer_id}")
+def admin_delete_farm_printer(printer_id: int, admin=Depends(require_admin), db=Depends(get_db)):
+    db.execute("DELETE FROM farm_printers WHERE id = ?", (printer_id,))
+    db.commit()
+    return {"message": "Deleted"}
+
+@app.get("/admin/schedule")
+def admin_schedule(admin=Depends(require_admin), db=Depends(get_db)):
+    """Plan every unit of every pending order onto the active farm printers"""
+    printers = [farm_printer_dict(r) for r in db.execute("SELECT * FROM farm_printers WHERE active = 1 ORDER BY id")]
+    if not printers:
+        raise HTTPException(status_code=400, detail="No active printers; add them via POST /admin/farm/printers")
+    jobs = []
+    for r in db.execute("""
+        SELECT oi.id, oi.order_id, oi.product_name, oi.quantity, p.material, p.print_time, p.weight_g, p.nozzle
+        FROM order_items oi
+        JOIN orders o ON o.id = oi.order_id
+        LEFT JOIN products p ON p.id = oi.product_id
+        WHERE o.status = 'pending'
+        ORDER BY o.created_at, oi.id
+    """):
+        for unit in range(1, r["quantity"] + 1):
+            jobs.append({
+                "id": f"{r['id']}-{unit}", "order_id": r["order_id"], "order_item_id": r["id"],
+                "product_name": r["product_name"], "material": r["material"], "nozzle": r["nozzle"],
+                "weight_g": r["weight_g"], "hours": parse_hours(r["print_time"]),
+            })
+    return schedule(jobs, printers)
+
 @app.put("/admin/orders/{order_id}/status")
 def admin_update_order_status(order_id: int, data: StatusUpdate, admin=Depends(require_admin), db=Depends(get_db)):
     valid = ['pending', 'processing', 'shipped', 'delivered', 'cancelled']
@@ -547,9 +821,31 @@ def health():
     return {
         "status": "online",
         "database": "sqlite",
-        "ai_server": ai_status
+        "ai_server": ai_status,
+        "ai_cache": get_prompt_cache().stats()
     }
 
+@app.get("/admin/kb/export")
+def admin_export_kb(format: str = "csv", admin=Depends(require_admin)):
+    """Knowledge base export streamed in chunks from the local store (csv, csv.gz, parquet)"""
+    if format not in available_formats():
+        raise HTTPException(status_code=400, detail=f"Format must be one of {available_formats()}")
+    mime, ext = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        iter_export(iter_store_frames(), format), media_type=mime,
+        headers={"Content-Disposition": f'attachment; filename="brain_dump{ext}"'}
+    )
+
+# ── METRICS ─────────────────────────────────────────────────
+@app.get("/metrics/scraper")
+def scraper_metrics(window_seconds: int = 86400, admin=Depends(require_admin)):
+    """Per-domain scrape outcomes, failure categories, latency percentiles and phase timings"""
+    return get_scrape_metrics().summary(window_seconds)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics(window_seconds: int = 86400, admin=Depends(require_admin)):
+    return get_scrape_metrics().prometheus(window_seconds)
+
 # ── STARTUP ───────────────────────────────────────────────────
 @app.on_event("startup")
 def startup():
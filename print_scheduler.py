@@ -0,0 +1,210 @@
+"""
+Print-farm scheduling.
+Assigns print jobs to printers to minimize makespan (the time until the
+last printer finishes). A job can only run on a printer that is loaded
+with its material and fitted with its nozzle, and runs faster on faster
+printers. Jobs are placed longest-first on the compatible printer that
+would finish them earliest (LPT/ECT), then moves and swaps off the
+busiest printer shave the makespan within a small time budget.
+
+Jobs and printers are plain dicts, so callers can build them from any
+source; see schedule() for the fields used.
+"""
+
+import re
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from config import SCHEDULER_REFERENCE_SPEED, SCHEDULER_IMPROVE_SECONDS, get_logger
+
+logger = get_logger("print_scheduler")
+
+# A number with an optional h/m unit that ends at a word boundary; a
+# unitless number must not run into other text ("0.2 mm", "6x")
+_DURATION_RE = re.compile(
+    r"(?<![\d.])(\d+(?:\.\d+)?)\s*(?:(h(?:(?:ou)?rs?)?|m(?:in(?:ute)?s?)?)(?![a-z])|(?![\d.]|\s*[a-z]))", re.I
+)
+
+
+def parse_hours(text) -> Optional[float]:
+    """
+    Print time as hours from values like 6, "6hr", "2.5 h", "90 min", "1h 30m"
+    or "1h30". A unitless number after an hour component is minutes.
+    """
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return float(text) if text > 0 else None
+    total, found, after_hours = 0.0, False, False
+    for number, unit in _DURATION_RE.findall(str(text)):
+        found = True
+        minutes = unit.lower().startswith("m") or (not unit and after_hours)
+        total += float(number) / 60 if minutes else float(number)
+        after_hours = unit.lower().startswith("h")
+    return total if found and total > 0 else None
+
+
+def _nozzle_key(nozzle) -> Optional[float]:
+    return None if nozzle in (None, "") else round(float(nozzle), 2)
+
+
+def _compatibility(jobs: List[dict], printers: List[dict]):
+    """
+    Per-job requirement ids and a (requirements x printers) bool matrix of
+    which printers can run each distinct (material, nozzle) requirement.
+    """
+    materials = [{m.upper() for m in (p.get("materials") or [])} for p in printers]
+    nozzles = [_nozzle_key(p.get("nozzle")) for p in printers]
+    keys, rows, job_keys = {}, [], []
+    for job in jobs:
+        key = ((job.get("material") or "").upper(), _nozzle_key(job.get("nozzle")))
+        if key not in keys:
+            keys[key] = len(rows)
+            rows.append([
+                # A printer without a material list takes any material
+                (not key[0] or not materials[i] or key[0] in materials[i])
+                and (key[1] is None or nozzles[i] == key[1])
+                for i in range(len(printers))
+            ])
+        job_keys.append(keys[key])
+    return np.array(job_keys, dtype=np.int64), np.array(rows, dtype=bool).reshape(len(rows), len(printers))
+
+
+def _improve(on, loads, hours, rate, can_run, deadline):
+    """
+    Local search on the busiest printer: move one of its jobs elsewhere, or
+    swap one with a job on another printer, whenever both printers then
+    finish before the current makespan. Takes the best such step each
+    round; stops at a local optimum or the deadline. `can_run` is the
+    (jobs x printers) compatibility matrix.
+    """
+    moves = 0
+    while time.perf_counter() < deadline:
+        crit = int(np.argmax(loads))
+        peak = loads[crit]
+        mine = np.array(on[crit], dtype=np.int64)
+        if mine.size == 0:
+            break
+        left = peak - hours[mine] * rate[crit]
+        best = (peak - 1e-9, None)  # only strict improvements
+
+        # Moves: (jobs on crit x printers)
+        after = loads[None, :] + hours[mine, None] * rate[None, :]
+        after[~can_run[mine]] = np.inf
+        after[:, crit] = np.inf
+        worst = np.maximum(left[:, None], after)
+        j, p = np.unravel_index(np.argmin(worst), worst.shape)
+        if worst[j, p] < best[0]:
+            best = (worst[j, p], ("move", int(mine[j]), int(p), None))
+
+        # Swaps: (jobs on crit x jobs on p) for each printer p
+        for p in range(len(loads)):
+            if p == crit or not on[p] or loads[p] >= peak:
+                continue
+            theirs = np.array(on[p], dtype=np.int64)
+            ok = can_run[mine, p][:, None] & can_run[theirs, crit][None, :]
+            new_crit = left[:, None] + hours[theirs][None, :] * rate[crit]
+            new_p = loads[p] - hours[theirs][None, :] * rate[p] + hours[mine, None] * rate[p]
+            worst = np.where(ok, np.maximum(new_crit, new_p), np.inf)
+            j, o = np.unravel_index(np.argmin(worst), worst.shape)
+            if worst[j, o] < best[0]:
+                best = (worst[j, o], ("swap", int(mine[j]), p, int(theirs[o])))
+
+        if best[1] is None:
+            break
+        kind, j, p, o = best[1]
+        on[crit].remove(j)
+        on[p].append(j)
+        loads[crit] -= hours[j] * rate[crit]
+        loads[p] += hours[j] * rate[p]
+        if kind == "swap":
+            on[p].remove(o)
+            on[crit].append(o)
+            loads[p] -= hours[o] * rate[p]
+            loads[crit] += hours[o] * rate[crit]
+        moves += 1
+    return moves
+
+
+def schedule(jobs: List[dict], printers: List[dict], reference_speed: float = SCHEDULER_REFERENCE_SPEED,
+             improve_seconds: float = SCHEDULER_IMPROVE_SECONDS) -> dict:
+    """
+    Plan `jobs` onto `printers`.
+
+    jobs:     {"id", "hours" (at reference_speed), "material", "nozzle" (None = any), ...}
+    printers: {"id", "name", "speed" (mm/s), "nozzle", "materials" (empty = any)}
+
+    Returns {"makespan_hours", "lower_bound_hours", "scheduled", "unscheduled",
+    "printers": [{..., "busy_hours", "utilization", "jobs": [job + start/end hours]}],
+    "moves", "elapsed_ms"}. On each printer jobs are grouped by material so
+    spools change as rarely as possible.
+    """
+    started = time.perf_counter()
+    rate = np.array([reference_speed / float(p.get("speed") or reference_speed) for p in printers], dtype=np.float64)
+
+    runnable, unscheduled = [], []
+    for job in jobs:
+        hours = parse_hours(job.get("hours"))
+        if hours is None:
+            unscheduled.append({**job, "reason": "no print time"})
+        else:
+            runnable.append((job, hours))
+    job_keys, key_printers = _compatibility([job for job, _ in runnable], printers)
+    can_run = key_printers[job_keys] if len(runnable) else np.zeros((0, len(printers)), dtype=bool)
+    placeable = can_run.any(axis=1)
+    unscheduled += [{**job, "reason": "no printer with this material and nozzle"}
+                    for (job, _), ok in zip(runnable, placeable) if not ok]
+    runnable = [r for r, ok in zip(runnable, placeable) if ok]
+    can_run = can_run[placeable]
+
+    hours = np.array([h for _, h in runnable], dtype=np.float64)
+    loads = np.zeros(len(printers), dtype=np.float64)
+    on = [[] for _ in printers]
+
+    # Longest first, each onto the compatible printer that finishes it earliest
+    for j in np.argsort(-hours, kind="stable"):
+        finish = np.where(can_run[j], loads + hours[j] * rate, np.inf)
+        k = int(np.argmin(finish))
+        loads[k] = finish[k]
+        on[k].append(int(j))
+
+    moves = 0
+    if runnable and improve_seconds > 0:
+        moves = _improve(on, loads, hours, rate, can_run, time.perf_counter() + improve_seconds)
+
+    # Neither the longest job nor the total work can finish sooner than this
+    lower_bound = 0.0
+    if runnable:
+        fastest = float(np.where(can_run, hours[:, None] * rate[None, :], np.inf).min(axis=1).max())
+        lower_bound = max(fastest, float(hours.sum() / (1.0 / rate).sum()))
+
+    makespan = float(loads.max()) if runnable else 0.0
+    plan = []
+    for i, printer in enumerate(printers):
+        ordered = sorted(on[i], key=lambda j: ((runnable[j][0].get("material") or "").upper(), -hours[j]))
+        clock, entries = 0.0, []
+        for j in ordered:
+            end = clock + hours[j] * rate[i]
+            entries.append({**runnable[j][0], "start_hours": round(clock, 3), "end_hours": round(end, 3)})
+            clock = end
+        plan.append({
+            **printer,
+            "busy_hours": round(clock, 3),
+            "utilization": round(clock / makespan, 3) if makespan else 0.0,
+            "jobs": entries,
+        })
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info(f"Scheduled {len(runnable)} jobs on {len(printers)} printers: makespan {makespan:.1f}h "
+                f"(bound {lower_bound:.1f}h), {moves} moves, {elapsed_ms:.0f} ms")
+    return {
+        "makespan_hours": round(makespan, 3),
+        "lower_bound_hours": round(lower_bound, 3),
+        "scheduled": len(runnable),
+        "unscheduled": unscheduled,
+        "printers": plan,
+        "moves": moves,
+        "elapsed_ms": round(elapsed_ms, 1),
+    }
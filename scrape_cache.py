@@ -0,0 +1,259 @@
+"""
+Persistent scrape cache keyed by canonical URL.
+Entries hold the extracted text, image URLs, HTTP validators (ETag /
+Last-Modified) and fetch time. Fresh entries are served directly; stale
+ones are revalidated with a conditional GET and only re-scraped when the
+page actually changed.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+
+from config import (
+    ENABLE_CACHE,
+    CACHE_DB_PATH,
+    SCRAPE_CACHE_FRESH_SECONDS,
+    SCRAPE_CACHE_MAX_ENTRIES,
+    SCRAPER_HTTP_TIMEOUT,
+    get_logger
+)
+from site_adapters import get_http_session
+
+logger = get_logger("scrape_cache")
+
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "mc_cid", "mc_eid", "igshid",
+    "ref", "ref_src", "referrer", "spm", "_ga", "_gl",
+})
+TRACKING_PREFIXES = ("utm_",)
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL so equivalent links share one cache key: lowercase
+    scheme/host, drop default ports, fragments, tracking params and
+    trailing slashes, and sort the remaining query.
+    """
+    parts = urlsplit((url or "").strip())
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+class ScrapeCache:
+    """SQLite store of scrape results with freshness and conditional revalidation."""
+
+    def __init__(self, path=CACHE_DB_PATH, fresh_seconds=SCRAPE_CACHE_FRESH_SECONDS,
+                 max_entries=SCRAPE_CACHE_MAX_ENTRIES, enabled=ENABLE_CACHE):
+        self.path = path
+        self.fresh_seconds = fresh_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if self.enabled:
+            try:
+                self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS scrape_cache (
+                    url           TEXT PRIMARY KEY,
+                    text          TEXT NOT NULL,
+                    images        TEXT NOT NULL,  -- JSON array of URLs
+                    etag          TEXT,
+                    last_modified TEXT,
+                    source        TEXT,
+                    fetched_at    REAL NOT NULL,
+                    last_access   REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_scrape_cache_last_access ON scrape_cache(last_access);
+                """)
+                self._conn.commit()
+                logger.info(f"Scrape cache ready at '{self.path}' (fresh={self.fresh_seconds}s, max={self.max_entries})")
+            except Exception as e:
+                logger.warning(f"Scrape cache disabled, could not open '{self.path}': {str(e)}")
+                self._conn = None
+                self.enabled = False
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """Stored entry for `url` (fresh or stale) with an `age_seconds` field, or None."""
+        if not self.enabled:
+            return None
+        key = canonicalize_url(url)
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT url, text, images, etag, last_modified, source, fetched_at FROM scrape_cache WHERE url = ?",
+                    (key,)
+                ).fetchone()
+                if row:
+                    self._conn.execute("UPDATE scrape_cache SET last_access = ? WHERE url = ?", (time.time(), key))
+                    self._conn.commit()
+        except Exception as e:
+            logger.warning(f"Scrape cache read failed: {str(e)}")
+            return None
+        if not row:
+            return None
+        return {
+            "url": row[0],
+            "text": row[1],
+            "images": json.loads(row[2]),
+            "etag": row[3],
+            "last_modified": row[4],
+            "source": row[5],
+            "fetched_at": row[6],
+            "age_seconds": time.time() - row[6],
+        }
+
+    def is_fresh(self, entry: dict) -> bool:
+        return entry["age_seconds"] <= self.fresh_seconds
+
+    def revalidate(self, url: str, entry: dict) -> bool:
+        """
+        Conditional GET with the stored validators. True (and the entry is
+        re-stamped) if the server answers 304 Not Modified.
+        """
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        if not headers:
+            return False
+        try:
+            r = get_http_session().get(url, headers=headers, timeout=SCRAPER_HTTP_TIMEOUT, stream=True)
+            r.close()
+        except requests.RequestException as e:
+            logger.info(f"Revalidation request failed for {url}: {str(e)}")
+            return False
+        if r.status_code != 304:
+            return False
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE scrape_cache SET fetched_at = ? WHERE url = ?", (time.time(), entry["url"])
+                )
+                self._conn.commit()
+        except Exception as e:
+            logger.warning(f"Scrape cache write failed: {str(e)}")
+        return True
+
+    def get(self, url: str) -> Optional[dict]:
+        """
+        Scrape-result-shaped cache hit, revalidating stale entries; None
+        means the caller must scrape.
+        """
+        entry = self.lookup(url)
+        if entry is None:
+            self.misses += 1
+            return None
+        if self.is_fresh(entry):
+            self.hits += 1
+            state = "hit"
+        elif self.revalidate(url, entry):
+            self.revalidated += 1
+            state = "revalidated"
+        else:
+            self.misses += 1
+            return None
+        return {
+            "text": entry["text"],
+            "images": entry["images"],
+            "stats": {"cache": state, "source": entry["source"], "age_seconds": round(entry["age_seconds"])},
+        }
+
+    def put(self, url: str, result: dict):
+        """Store a successful scrape result and evict least-recently-used entries."""
+        if not self.enabled or not result or "error" in result or not result.get("text"):
+            return
+        stats = result.get("stats") or {}
+        # Timeouts, HTTP errors and browser error pages still carry text; don't serve them for hours
+        if stats.get("navigation_error") or (stats.get("http_status") or 0) >= 400:
+            return
+        validators = result.get("validators") or {}
+        source = (result.get("stats") or {}).get("adapter", "browser")
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO scrape_cache "
+                    "(url, text, images, etag, last_modified, source, fetched_at, last_access) VALUES (?,?,?,?,?,?,?,?)",
+                    (canonicalize_url(url), result["text"], json.dumps(result.get("images") or []),
+                     validators.get("etag"), validators.get("last_modified"), source, now, now)
+                )
+                self._conn.execute("""
+                    DELETE FROM scrape_cache WHERE url IN (
+                        SELECT url FROM scrape_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_entries,))
+                self._conn.commit()
+        except Exception as e:
+            logger.warning(f"Scrape cache write failed: {str(e)}")
+
+    def invalidate(self, url: str):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM scrape_cache WHERE url = ?", (canonicalize_url(url),))
+            self._conn.commit()
+
+    def clear(self):
+        """Drop all cached pages and reset counters."""
+        with self._lock:
+            if self._conn:
+                self._conn.execute("DELETE FROM scrape_cache")
+                self._conn.commit()
+            self.hits = self.revalidated = self.misses = 0
+
+    def stats(self) -> dict:
+        entries = 0
+        if self.enabled:
+            try:
+                with self._lock:
+                    entries = self._conn.execute("SELECT COUNT(*) FROM scrape_cache").fetchone()[0]
+            except Exception:
+                pass
+        lookups = self.hits + self.revalidated + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.revalidated) / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "fresh_seconds": self.fresh_seconds,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_scrape_cache() -> ScrapeCache:
+    """Process-wide scrape cache instance."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ScrapeCache()
+    return _cache
@@ -0,0 +1,222 @@
+"""
+Scraper instrumentation.
+Every scrape (cache hit, adapter or browser) is recorded as one event with
+its phase timings, transfer counts, outcome and failure category. Events
+are logged as a structured line and kept in SQLite so any process (the
+app, queue workers) can write them and the API can aggregate them per
+domain for the metrics endpoints.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlparse
+
+import numpy as np
+
+from config import METRICS_DB_PATH, METRICS_RETENTION_SECONDS, get_logger
+
+logger = get_logger("scrape_metrics")
+
+OK = "ok"
+DEGRADED = "degraded"  # page loaded with errors (bad status, navigation warning)
+ERROR = "error"
+
+# (category, pattern) checked in order against the lowercased error text
+FAILURE_PATTERNS = [
+    ("safe_mode", r"safe mode"),
+    ("timeout", r"timeout|timed out"),
+    ("dns", r"name_not_resolved|enotfound|name or service not known|getaddrinfo|nodename"),
+    ("connection", r"connection|err_connection|econnrefused|econnreset|err_address|ssl|cert"),
+    ("blocked", r"http 403|http 429|captcha|access denied|cloudflare"),
+    ("http_4xx", r"http 4\d\d"),
+    ("http_5xx", r"http 5\d\d"),
+    ("browser", r"browser|target closed|target page|playwright|chromium|executable"),
+]
+_FAILURE_RES = [(c, re.compile(p)) for c, p in FAILURE_PATTERNS]
+
+
+def classify_failure(error: Optional[str]) -> Optional[str]:
+    """Coarse failure category for an error message; None for no error."""
+    if not error:
+        return None
+    text = error.lower()
+    for category, pattern in _FAILURE_RES:
+        if pattern.search(text):
+            return category
+    return "other"
+
+
+def domain_of(url: str) -> str:
+    host = (urlparse(url).hostname or "unknown").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class ScrapeMetrics:
+    """Append-only event log with per-domain aggregation."""
+
+    def __init__(self, path=METRICS_DB_PATH, retention_seconds=METRICS_RETENTION_SECONDS):
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self._conn = None
+        try:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS scrape_events (
+                id        INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts        REAL    NOT NULL,
+                domain    TEXT    NOT NULL,
+                path      TEXT    NOT NULL,  -- cache | adapter | browser
+                outcome   TEXT    NOT NULL,  -- ok | degraded | error
+                category  TEXT,
+                fallback  INTEGER NOT NULL DEFAULT 0,
+                wall_ms   INTEGER,
+                bytes     INTEGER,
+                requests  INTEGER,
+                blocked   INTEGER,
+                phases    TEXT    -- JSON {phase: ms}
+            );
+            CREATE INDEX IF NOT EXISTS idx_scrape_events_ts ON scrape_events(ts);
+            """)
+            self._conn.commit()
+        except Exception as e:
+            logger.warning(f"Scrape metrics disabled, could not open '{self.path}': {str(e)}")
+            self._conn = None
+
+    def record(self, url: str, result: dict, wall_ms: int):
+        """Log and store one scrape; `result` is the scraper's return value."""
+        stats = result.get("stats") or {}
+        error = result.get("error") or stats.get("navigation_error")
+        status = stats.get("http_status")
+        if status and status >= 400 and not error:
+            error = f"HTTP {status}"
+        outcome = ERROR if "error" in result else DEGRADED if error else OK
+        event = {
+            "domain": domain_of(url),
+            "path": stats.get("path", "browser"),
+            "outcome": outcome,
+            "category": classify_failure(error),
+            "fallback": int(bool(stats.get("adapter_fallback"))),
+            "wall_ms": wall_ms,
+            "bytes": stats.get("bytes"),
+            "requests": stats.get("requests"),
+            "blocked": stats.get("blocked_requests"),
+            "phases": stats.get("phases_ms") or {},
+        }
+
+        phases = " ".join(f"{k}={v}" for k, v in event["phases"].items())
+        log = logger.warning if outcome != OK else logger.info
+        log(
+            f"scrape domain={event['domain']} path={event['path']} outcome={outcome} "
+            f"category={event['category'] or '-'} wall_ms={wall_ms} bytes={event['bytes'] or 0} "
+            f"requests={event['requests'] or 0} fallback={event['fallback']} {phases}".rstrip()
+        )
+
+        if not self._conn:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT INTO scrape_events (ts, domain, path, outcome, category, fallback, wall_ms, bytes, requests, blocked, phases) "
+                    "VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                    (now, event["domain"], event["path"], outcome, event["category"], event["fallback"], wall_ms,
+                     event["bytes"], event["requests"], event["blocked"], json.dumps(event["phases"]))
+                )
+                self._inserts += 1
+                if self._inserts % 200 == 0:
+                    self._conn.execute("DELETE FROM scrape_events WHERE ts < ?", (now - self.retention_seconds,))
+                self._conn.commit()
+        except Exception as e:
+            logger.warning(f"Scrape metrics write failed: {str(e)}")
+
+    def summary(self, window_seconds: int = 86400) -> dict:
+        """Per-domain counts, failure categories, latency percentiles and mean phase times."""
+        if not self._conn:
+            return {"window_seconds": window_seconds, "domains": {}}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT domain, path, outcome, category, fallback, wall_ms, bytes, requests, phases "
+                "FROM scrape_events WHERE ts >= ?", (time.time() - window_seconds,)
+            ).fetchall()
+
+        by_domain = {}
+        for row in rows:
+            by_domain.setdefault(row[0], []).append(row)
+
+        domains = {}
+        for domain, events in sorted(by_domain.items()):
+            wall = np.array([e[5] or 0 for e in events], dtype=np.float64)
+            fetched = [e for e in events if e[1] != "cache"]
+            categories, paths, phase_totals, phase_counts = {}, {}, {}, {}
+            for e in events:
+                paths[e[1]] = paths.get(e[1], 0) + 1
+                if e[3]:
+                    categories[e[3]] = categories.get(e[3], 0) + 1
+                for phase, ms in json.loads(e[8] or "{}").items():
+                    phase_totals[phase] = phase_totals.get(phase, 0) + ms
+                    phase_counts[phase] = phase_counts.get(phase, 0) + 1
+            domains[domain] = {
+                "scrapes": len(events),
+                "ok": sum(e[2] == OK for e in events),
+                "degraded": sum(e[2] == DEGRADED for e in events),
+                "errors": sum(e[2] == ERROR for e in events),
+                "failure_categories": categories,
+                "paths": paths,
+                "adapter_fallbacks": sum(e[4] for e in events),
+                "p50_ms": round(float(np.percentile(wall, 50))),
+                "p95_ms": round(float(np.percentile(wall, 95))),
+                "avg_kb": round(sum(e[6] or 0 for e in fetched) / max(1, len(fetched)) / 1024, 1),
+                "avg_requests": round(sum(e[7] or 0 for e in fetched) / max(1, len(fetched)), 1),
+                "phase_avg_ms": {p: round(phase_totals[p] / phase_counts[p]) for p in phase_totals},
+            }
+        return {"window_seconds": window_seconds, "domains": domains}
+
+    def prometheus(self, window_seconds: int = 86400) -> str:
+        """Summary in Prometheus text exposition format (values cover the window)."""
+        summary = self.summary(window_seconds)
+        lines = [
+            "# HELP scraper_pages Scrapes in the window by outcome.",
+            "# TYPE scraper_pages gauge",
+        ]
+        domains = summary["domains"]
+        for d, m in domains.items():
+            for outcome in (OK, DEGRADED, ERROR):
+                key = "errors" if outcome == ERROR else outcome
+                lines.append(f'scraper_pages{{domain="{d}",outcome="{outcome}"}} {m[key]}')
+        lines += ["# HELP scraper_failures Failures in the window by category.", "# TYPE scraper_failures gauge"]
+        for d, m in domains.items():
+            for cat, n in m["failure_categories"].items():
+                lines.append(f'scraper_failures{{domain="{d}",category="{cat}"}} {n}')
+        lines += ["# HELP scraper_duration_ms End-to-end scrape time.", "# TYPE scraper_duration_ms gauge"]
+        for d, m in domains.items():
+            lines.append(f'scraper_duration_ms{{domain="{d}",quantile="0.5"}} {m["p50_ms"]}')
+            lines.append(f'scraper_duration_ms{{domain="{d}",quantile="0.95"}} {m["p95_ms"]}')
+        lines += ["# HELP scraper_phase_ms_avg Mean time per scrape phase.", "# TYPE scraper_phase_ms_avg gauge"]
+        for d, m in domains.items():
+            for phase, ms in m["phase_avg_ms"].items():
+                lines.append(f'scraper_phase_ms_avg{{domain="{d}",phase="{phase}"}} {ms}')
+        lines += ["# HELP scraper_transfer_kb_avg Mean KB transferred per fetched page.", "# TYPE scraper_transfer_kb_avg gauge"]
+        for d, m in domains.items():
+            lines.append(f'scraper_transfer_kb_avg{{domain="{d}"}} {m["avg_kb"]}')
+        return "\n".join(lines) + "\n"
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_scrape_metrics() -> ScrapeMetrics:
+    """Process-wide metrics store."""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = ScrapeMetrics()
+    return _metrics
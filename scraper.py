@@ -1,94 +1,712 @@
 import time
 import os
 import sys
+import queue
+import asyncio
+import threading
 import subprocess
-from playwright.sync_api import sync_playwright
+from collections import defaultdict
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from playwright.async_api import async_playwright
+from config import (
+    SCRAPER_TIMEOUT,
+    SCRAPER_CONCURRENCY,
+    SCRAPER_PER_DOMAIN_CONCURRENCY,
+    SCRAPER_DOMAIN_DELAY_MS,
+    SCRAPER_RECYCLE_AFTER,
+    SCRAPER_BLOCK_RESOURCE_TYPES,
+    SCRAPER_BLOCK_HOSTS,
+    SCRAPER_PAGE_BUDGET_MS,
+    SCRAPER_SETTLE_MS,
+    SCRAPER_SCROLL_MAX_MS,
+    SCRAPER_SCROLL_IDLE_MS,
+    SCRAPER_USE_ADAPTERS,
+    get_logger
+)
+from site_adapters import fetch_with_adapter, get_adapter
+from context_builder import BOILERPLATE_PATTERNS
+from scrape_cache import canonicalize_url, get_scrape_cache
+from image_dedup import select_images
+from scrape_metrics import get_scrape_metrics
+
+logger = get_logger("scraper")
 
 # Check safe mode
 SAFE_MODE = os.getenv("STREAMLIT_SAFE_MODE", "false").lower() == "true"
 
-def install_playwright_if_needed():
-    """Install Playwright browser on cloud environments."""
-    if sys.platform != "win32":
+BROWSER_ARGS = ["--no-sandbox", "--disable-dev-shm-usage", "--disable-blink-features=AutomationControlled"]
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+_install_lock = threading.Lock()
+_install_checked = False
+
+def install_playwright_if_needed(executable_path=None):
+    """
+    Install the Playwright Chromium build once per process, and only if the
+    executable is actually missing.
+    """
+    global _install_checked
+    with _install_lock:
+        if _install_checked:
+            return
+        try:
+            if executable_path and os.path.exists(executable_path):
+                return
+            if sys.platform != "win32":
+                logger.info("Chromium not found, running 'playwright install chromium'")
+                subprocess.run([sys.executable, "-m", "playwright", "install", "chromium"], check=True)
+        except Exception as e:
+            logger.warning(f"Playwright browser install failed: {str(e)}")
+        finally:
+            _install_checked = True
+
+# --- BROWSER POOL ---
+class BrowserPool:
+    """
+    A warm Chromium driven by async Playwright on a dedicated event-loop thread.
+    Callers on any thread submit coroutines `fn(browser)` and get a
+    concurrent Future back; each job should use its own browser context.
+    The browser is replaced after `recycle_after` pages or when it crashes,
+    and the old one is closed once its in-flight pages finish.
+    """
+
+    def __init__(self, recycle_after=SCRAPER_RECYCLE_AFTER):
+        self.recycle_after = max(1, recycle_after)
+        self.pages_served = 0
+        self.launches = 0
+        self._loop = None
+        self._thread = None
+        self._playwright = None
+        self._browser = None
+        self._browser_pages = 0
+        self._in_flight = defaultdict(int)
+        self._retired = set()
+        self._launch_lock = None
+        self._start_lock = threading.Lock()
+
+    # --- EVENT LOOP ---
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(self._loop)
+                self._launch_lock = asyncio.Lock()
+                ready.set()
+                self._loop.run_forever()
+
+            self._thread = threading.Thread(target=run, name="browser-pool", daemon=True)
+            self._thread.start()
+            ready.wait()
+
+    def submit(self, fn):
+        """Schedule coroutine `fn(browser)` on a warm browser; returns a concurrent Future."""
+        self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self.run(fn), self._loop)
+
+    def submit_coroutine(self, coro):
+        """Schedule an arbitrary coroutine on the pool's event loop."""
+        self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    # --- BROWSER LIFECYCLE (event-loop thread only) ---
+    async def _launch(self):
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+            await asyncio.get_running_loop().run_in_executor(
+                None, install_playwright_if_needed, self._playwright.chromium.executable_path
+            )
+        browser = await self._playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+        self.launches += 1
+        logger.info(f"Browser launched (launch #{self.launches})")
+        return browser
+
+    async def _acquire(self):
+        async with self._launch_lock:
+            browser = self._browser
+            if browser is None or not browser.is_connected() or self._browser_pages >= self.recycle_after:
+                if browser is not None:
+                    logger.info(f"Recycling browser after {self._browser_pages} pages")
+                    self._retired.add(browser)
+                    await self._close_if_idle(browser)
+                self._browser = await self._launch()
+                self._browser_pages = 0
+            self._browser_pages += 1
+            self._in_flight[self._browser] += 1
+            return self._browser
+
+    async def _release(self, browser):
+        self._in_flight[browser] -= 1
+        self.pages_served += 1
+        if browser in self._retired or not browser.is_connected():
+            await self._close_if_idle(browser)
+
+    async def _close_if_idle(self, browser):
+        if self._in_flight.get(browser, 0) > 0:
+            return
+        self._in_flight.pop(browser, None)
+        self._retired.discard(browser)
+        if self._browser is browser:
+            self._browser = None
         try:
-            subprocess.run([sys.executable, "-m", "playwright", "install", "chromium"], check=True)
-        except:
+            await browser.close()
+        except Exception:
             pass
 
-def scrape_model_page(url, status_callback=None):
+    async def run(self, fn):
+        """
+        Run `fn(browser)` on the current warm browser (event-loop thread).
+        Time spent waiting for / launching the browser is added to the
+        result's phase timings as "acquire".
+        """
+        t0 = time.perf_counter()
+        launches = self.launches
+        browser = await self._acquire()
+        acquire_ms = round((time.perf_counter() - t0) * 1000)
+        try:
+            result = await fn(browser)
+        finally:
+            await self._release(browser)
+        if isinstance(result, dict) and isinstance(result.get("stats"), dict):
+            result["stats"].setdefault("phases_ms", {})["acquire"] = acquire_ms
+            result["stats"]["browser_launched"] = self.launches > launches
+        return result
+
+    def warm_up(self):
+        """Launch the browser ahead of the first scrape."""
+        async def noop(browser):
+            return browser.version
+        return self.submit(noop)
+
+    def stats(self) -> dict:
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "browser_connected": bool(self._browser and self._browser.is_connected()),
+            "launches": self.launches,
+            "pages_served": self.pages_served,
+            "recycle_after": self.recycle_after,
+        }
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_browser_pool() -> BrowserPool:
+    """Process-wide browser pool."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = BrowserPool()
+    return _pool
+
+# --- POLITENESS ---
+class DomainThrottle:
+    """Caps concurrent pages and spaces request starts per domain."""
+
+    def __init__(self, per_domain=SCRAPER_PER_DOMAIN_CONCURRENCY, delay_ms=SCRAPER_DOMAIN_DELAY_MS):
+        self.per_domain = max(1, per_domain)
+        self.delay = delay_ms / 1000
+        self._semaphores = {}
+        self._next_start = defaultdict(float)
+
+    async def __call__(self, url, coro_fn):
+        domain = urlparse(url).netloc.lower()
+        sem = self._semaphores.setdefault(domain, asyncio.Semaphore(self.per_domain))
+        async with sem:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            start_at = max(now, self._next_start[domain])
+            self._next_start[domain] = start_at + self.delay
+            if start_at > now:
+                await asyncio.sleep(start_at - now)
+            return await coro_fn()
+
+# --- RESOURCE POLICY ---
+class ResourcePolicy:
     """
-    Robust scraper: Launches fresh browser per request to prevent Threading Errors.
+    Decides which network requests a scrape may make. We only need page text
+    and image URLs (read from the DOM), so heavy resource types and known
+    trackers are aborted before they download.
+    """
+
+    def __init__(self, blocked_types=SCRAPER_BLOCK_RESOURCE_TYPES, blocked_hosts=SCRAPER_BLOCK_HOSTS):
+        self.blocked_types = frozenset(t.strip().lower() for t in blocked_types if t.strip())
+        self.blocked_hosts = tuple(h.strip().lower() for h in blocked_hosts if h.strip())
+
+    def should_block(self, resource_type, url) -> bool:
+        if resource_type in self.blocked_types:
+            return True
+        host = urlparse(url).hostname or ""
+        return any(host == h or host.endswith("." + h) for h in self.blocked_hosts)
+
+    async def install(self, context, stats):
+        """Route every request of `context` through the policy, counting blocked ones."""
+        async def handle(route):
+            request = route.request
+            if self.should_block(request.resource_type, request.url):
+                stats["blocked_requests"] += 1
+                await route.abort()
+            else:
+                await route.continue_()
+        await context.route("**/*", handle)
+
+DEFAULT_POLICY = ResourcePolicy()
+
+async def _track_transfer(context, page, stats):
+    """Count requests and encoded bytes received via the Chromium DevTools protocol."""
+    try:
+        cdp = await context.new_cdp_session(page)
+        await cdp.send("Network.enable")
+
+        def on_finished(event):
+            stats["requests"] += 1
+            stats["bytes"] += int(event.get("encodedDataLength", 0))
+        cdp.on("Network.loadingFinished", on_finished)
+    except Exception as e:
+        logger.debug(f"Transfer tracking unavailable: {str(e)}")
+
+# --- WAITING ---
+class PhaseTimer:
+    """Per-page time budget with named phase timings (milliseconds)."""
+
+    def __init__(self, budget_ms):
+        self.budget_ms = budget_ms
+        self.started = time.perf_counter()
+        self.phases = {}
+
+    def elapsed_ms(self) -> int:
+        return round((time.perf_counter() - self.started) * 1000)
+
+    def remaining_ms(self, cap=None) -> int:
+        remaining = max(0, self.budget_ms - self.elapsed_ms())
+        return min(remaining, cap) if cap is not None else remaining
+
+    @contextmanager
+    def phase(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - t0) * 1000)
+
+# Scrolls in viewport steps, waiting on DOM mutations instead of fixed sleeps.
+# Stops at the bottom once no new images appear, after consecutive idle steps,
+# or when the time budget runs out.
+INCREMENTAL_SCROLL_JS = """
+async ({maxMs, idleMs}) => {
+    const start = performance.now();
+    const waitForMutation = (ms) => new Promise(resolve => {
+        const obs = new MutationObserver(() => { obs.disconnect(); resolve(true); });
+        obs.observe(document.body, {childList: true, subtree: true, attributes: true, attributeFilter: ['src', 'srcset']});
+        setTimeout(() => { obs.disconnect(); resolve(false); }, ms);
+    });
+    let lastCount = document.images.length, steps = 0, idleSteps = 0;
+    while (performance.now() - start < maxMs) {
+        const atBottom = window.innerHeight + window.scrollY >= document.body.scrollHeight - 2;
+        if (!atBottom) window.scrollBy(0, window.innerHeight * 1.5);
+        steps++;
+        await waitForMutation(Math.min(idleMs, Math.max(0, maxMs - (performance.now() - start))));
+        const count = document.images.length;
+        idleSteps = count === lastCount ? idleSteps + 1 : 0;
+        lastCount = count;
+        if (idleSteps > 0 && (atBottom || idleSteps >= 2)) break;
+    }
+    window.scrollTo(0, 0);
+    return {steps, images: lastCount};
+}
+"""
+
+CONTENT_SELECTOR = "main, article, h1, [itemprop=name]"
+
+# Readability-style extraction run inside the page: score text blocks, pick the
+# main-content container (plus strong siblings), drop boilerplate lines and
+# duplicates, and return only compact text and image metadata.
+EXTRACT_CONTENT_JS = """
+({mainMinLine, bodyMinLine, minMainChars, maxChars, boilerplate}) => {
+    const NEGATIVE = /comment|footer|foot|nav|menu|sidebar|share|social|cookie|consent|related|recommend|promo|banner|advert|\\bad-|login|signup|sign-in|breadcrumb|modal|popup|header|avatar|profile-card/i;
+    const POSITIVE = /content|article|main|description|detail|body|text|instruction|summary|setting|spec|info|post/i;
+    const BLOCKS = 'p, li, pre, td, dd, h1, h2, h3, h4, blockquote, div';
+    const boiler = new RegExp(boilerplate, 'i');
+
+    const classWeight = el => {
+        const attrs = `${el.className && el.className.baseVal === undefined ? el.className : ''} ${el.id || ''}`;
+        let w = 0;
+        if (NEGATIVE.test(attrs)) w -= 25;
+        if (POSITIVE.test(attrs)) w += 25;
+        if (el.tagName === 'MAIN' || el.tagName === 'ARTICLE') w += 30;
+        return w;
+    };
+    const linkDensity = el => {
+        // textContent avoids a layout pass per node; innerText is only used for the final text
+        const len = (el.textContent || '').length || 1;
+        let links = 0;
+        for (const a of el.querySelectorAll('a')) links += (a.textContent || '').length;
+        return Math.min(1, links / len);
+    };
+
+    // Score parents of text blocks by the text they directly carry
+    const scores = new Map();
+    for (const el of document.body.querySelectorAll(BLOCKS)) {
+        if (el.tagName === 'DIV' && el.querySelector(BLOCKS)) continue;  // only leaf-ish divs
+        const text = (el.textContent || '').trim();
+        if (text.length < 25) continue;
+        const score = 1 + text.split(/[,;]/).length + Math.min(Math.floor(text.length / 100), 3);
+        let node = el.parentElement, depth = 0;
+        while (node && node !== document.body && depth < 3) {
+            if (!scores.has(node)) scores.set(node, classWeight(node));
+            scores.set(node, scores.get(node) + score / (depth === 0 ? 1 : depth * 2));
+            node = node.parentElement; depth++;
+        }
+    }
+
+    let best = null, bestScore = 0;
+    for (const [el, score] of scores) {
+        const adjusted = score * (1 - linkDensity(el));
+        scores.set(el, adjusted);
+        if (adjusted > bestScore) { best = el; bestScore = adjusted; }
+    }
+
+    const roots = [];
+    if (best) {
+        const siblings = best.parentElement ? Array.from(best.parentElement.children) : [best];
+        for (const sib of siblings) {
+            if (sib === best || (scores.get(sib) || 0) >= bestScore * 0.2) roots.push(sib);
+        }
+    }
+    const title = document.querySelector('h1');
+    if (title && !roots.some(r => r.contains(title))) roots.unshift(title);
+
+    const collect = (els, minLine) => {
+        const seen = new Set(), out = [];
+        let total = 0;
+        for (const el of els) {
+            for (let line of (el.innerText || '').split('\\n')) {
+                line = line.trim();
+                if (line.length < minLine) continue;
+                if (line.length < 120 && boiler.test(line)) continue;
+                const key = line.toLowerCase().replace(/[^a-z0-9]+/g, ' ');
+                if (seen.has(key)) continue;
+                seen.add(key);
+                out.push(line);
+                total += line.length + 1;
+                if (total >= maxChars) return out;
+            }
+        }
+        return out;
+    };
+
+    let source = 'main';
+    let lines = best ? collect(roots, mainMinLine) : [];
+    if (lines.join('\\n').length < minMainChars) {
+        source = 'body';
+        lines = collect([document.body], bodyMinLine);
+    }
+
+    // Image bytes are blocked, so size comes from attributes/layout rather than naturalWidth;
+    // images with no known size are kept and only known-small ones are dropped
+    const seenSrc = new Set(), images = [];
+    for (const i of document.images) {
+        const src = i.currentSrc || i.src || i.dataset.src || '';
+        if (!src.startsWith('http') || seenSrc.has(src) || /avatar|icon|logo|svg/.test(src)) continue;
+        const rect = i.getBoundingClientRect();
+        const w = i.naturalWidth || parseInt(i.getAttribute('width')) || Math.round(rect.width) || 0;
+        const h = i.naturalHeight || parseInt(i.getAttribute('height')) || Math.round(rect.height) || 0;
+        if (!((w === 0 && h === 0) || w > 200 || h > 200)) continue;
+        seenSrc.add(src);
+        images.push({src, w, h, alt: (i.alt || '').slice(0, 120)});
+    }
+
+    return {
+        text: lines.join('\\n'),
+        images,
+        source,
+        rawChars: (document.body.innerText || '').length
+    };
+}
+"""
+
+# --- SCRAPING ---
+async def _scrape_page(browser, url, report, policy=DEFAULT_POLICY, budget_ms=SCRAPER_PAGE_BUDGET_MS):
+    """
+    Scrape one page in an isolated context of a pooled browser.
+    Every wait is event-driven and bounded by the page's time budget.
+    """
+    timer = PhaseTimer(budget_ms)
+    validators = {}
+    stats = {"requests": 0, "bytes": 0, "blocked_requests": 0, "load_ms": None, "total_ms": None}
+    context = await browser.new_context(
+        viewport={"width": 1920, "height": 1080},
+        user_agent=USER_AGENT
+    )
+    try:
+        await policy.install(context, stats)
+        page = await context.new_page()
+        await _track_transfer(context, page, stats)
+
+        report(f"🌐 Navigating to {url}...")
+        with timer.phase("navigate"):
+            try:
+                response = await page.goto(url, wait_until="domcontentloaded", timeout=timer.remaining_ms(SCRAPER_TIMEOUT) or 1)
+                stats["load_ms"] = timer.elapsed_ms()
+                if response:
+                    stats["http_status"] = response.status
+                    validators = {"etag": response.headers.get("etag"), "last_modified": response.headers.get("last-modified")}
+            except Exception as e:
+                stats["navigation_error"] = str(e)[:300]
+                report(f"⚠️ Navigation warning: {e}")
+
+        # Proceed as soon as main content exists and the network has gone quiet
+        with timer.phase("settle"):
+            try:
+                await page.wait_for_selector(CONTENT_SELECTOR, timeout=timer.remaining_ms(SCRAPER_SETTLE_MS) or 1)
+            except Exception:
+                pass
+            try:
+                await page.wait_for_load_state("networkidle", timeout=timer.remaining_ms(SCRAPER_SETTLE_MS) or 1)
+            except Exception:
+                pass
+
+        # Scroll incrementally to trigger lazy loading
+        with timer.phase("scroll"):
+            try:
+                scroll = await page.evaluate(INCREMENTAL_SCROLL_JS, {
+                    "maxMs": timer.remaining_ms(SCRAPER_SCROLL_MAX_MS),
+                    "idleMs": SCRAPER_SCROLL_IDLE_MS
+                })
+                stats["scroll_steps"] = scroll["steps"]
+            except Exception as e:
+                report(f"⚠️ Scroll warning: {e}")
+
+        # Click standard gallery expansion buttons only if they exist
+        with timer.phase("expand"):
+            try:
+                show_all = page.get_by_role("button", name="Show all")
+                if await show_all.count() > 0:
+                    await show_all.first.click(timeout=timer.remaining_ms(1000) or 1)
+                    await page.wait_for_load_state("networkidle", timeout=timer.remaining_ms(SCRAPER_SCROLL_IDLE_MS) or 1)
+            except Exception:
+                pass
+
+        with timer.phase("extract"):
+            extracted = await page.evaluate(EXTRACT_CONTENT_JS, {
+                "mainMinLine": 12,
+                "bodyMinLine": 30,
+                "minMainChars": 200,
+                "maxChars": 200000,
+                "boilerplate": "|".join(BOILERPLATE_PATTERNS)
+            })
+    finally:
+        await context.close()
+
+    stats["text_source"] = extracted["source"]
+    stats["text_chars"] = len(extracted["text"])
+    stats["raw_text_chars"] = extracted["rawChars"]
+
+    stats["total_ms"] = timer.elapsed_ms()
+    stats["phases_ms"] = timer.phases
+    stats["path"] = "browser"
+    report(
+        f"📦 {stats['bytes'] / 1024:.0f} KB in {stats['requests']} requests "
+        f"({stats['blocked_requests']} blocked), loaded in {stats['load_ms']} ms"
+    )
+    report("⏱️ " + ", ".join(f"{k} {v} ms" for k, v in timer.phases.items()))
+    report("✅ Extraction complete.")
+    return {
+        "text": extracted["text"],
+        # Page order; ranking and near-duplicate removal happen in _finalize
+        "images": [i["src"] for i in extracted["images"][:500]],
+        "stats": stats,
+        "validators": validators
+    }
+
+def _finalize(url, result):
+    """Post-process a fresh scrape (gallery dedup/ranking) and store it in the scrape cache."""
+    if "error" not in result and result.get("images"):
+        t0 = time.perf_counter()
+        result["images"] = select_images(result["images"])
+        result["stats"].setdefault("phases_ms", {})["images"] = round((time.perf_counter() - t0) * 1000)
+    get_scrape_cache().put(url, result)
+    return result
+
+def _from_cache(url, refresh=False):
+    """Cached result for `url` (revalidating if stale), or None if it must be scraped."""
+    if refresh:
+        return None
+    t0 = time.perf_counter()
+    cached = get_scrape_cache().get(url)
+    if cached:
+        cached["stats"].update(path="cache", phases_ms={"cache": round((time.perf_counter() - t0) * 1000)})
+    return cached
+
+def _try_adapter(url):
+    """Browserless result for `url`, or None when no adapter applies or it failed."""
+    if not (SCRAPER_USE_ADAPTERS and get_adapter(url)):
+        return None
+    result = fetch_with_adapter(url)
+    if result:
+        result["stats"].update(path="adapter", phases_ms={"adapter": result["stats"]["total_ms"]})
+    return result
+
+def _record(url, result, started):
+    """Export one scrape's timings and outcome; never lets metrics break a scrape."""
+    try:
+        get_scrape_metrics().record(url, result, round((time.perf_counter() - started) * 1000))
+    except Exception as e:
+        logger.warning(f"Could not record scrape metrics: {str(e)}")
+
+def scrape_model_page(url, status_callback=None, refresh=False):
+    """
+    Scrape a model page on a warm pooled browser. Status messages are relayed
+    back to the calling thread so Streamlit callbacks keep working.
+    Results are served from the scrape cache unless `refresh` is set.
     """
     if SAFE_MODE: return {"error": "Scraper disabled in production safe mode"}
-    
+
     logs = []
-    def report(msg):
+    messages = queue.Queue()
+    started = time.perf_counter()
+
+    def relay(msg):
         logs.append(msg)
         if status_callback: status_callback(msg)
         print(f"[Scraper] {msg}")
 
-    IS_CLOUD = sys.platform != "win32"
-    if IS_CLOUD: install_playwright_if_needed()
+    def run():
+        cached = _from_cache(url, refresh)
+        if cached:
+            relay(f"🗄️ Served from scrape cache ({cached['stats']['cache']}, fetched {cached['stats']['age_seconds']}s ago)")
+            return cached
+
+        fallback = False
+        if SCRAPER_USE_ADAPTERS and get_adapter(url):
+            relay(f"⚡ Trying browserless {get_adapter(url).name} adapter...")
+            result = _try_adapter(url)
+            if result:
+                relay(f"📦 {len(result['text'])} chars, {len(result['images'])} images in {result['stats']['total_ms']} ms (no browser)")
+                relay("🖼️ Ranking gallery images...")
+                return _finalize(url, result)
+            relay("↩️ Adapter failed, falling back to browser")
+            fallback = True
+
+        relay("🚀 Acquiring warm browser...")
+        future = get_browser_pool().submit(lambda browser: _scrape_page(browser, url, messages.put))
+
+        # Drain worker messages on this thread until the job finishes
+        deadline = time.monotonic() + SCRAPER_TIMEOUT / 1000 * 3
+        while not future.done():
+            try:
+                relay(messages.get(timeout=0.1))
+            except queue.Empty:
+                if time.monotonic() > deadline:
+                    future.cancel()
+                    return {"error": "Scrape timed out", "stats": {"path": "browser", "adapter_fallback": fallback}}
+        while not messages.empty():
+            relay(messages.get_nowait())
+
+        result = future.result()
+        result["stats"]["adapter_fallback"] = fallback
+        relay("🖼️ Ranking gallery images...")
+        return _finalize(url, result)
 
     try:
-        report("🚀 Launching secure browser...")
-        
-        # NO CACHE HERE - Critical for Render stability
-        with sync_playwright() as p:
-            browser = p.chromium.launch(
-                headless=True,
-                args=["--no-sandbox", "--disable-dev-shm-usage", "--disable-blink-features=AutomationControlled"]
-            )
-            
-            context = browser.new_context(
-                viewport={"width": 1920, "height": 1080},
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            )
-            page = context.new_page()
+        result = run()
+    except Exception as e:
+        result = {"error": str(e), "stats": {"path": "browser"}}
+    _record(url, result, started)
+    result["debug"] = logs
+    return result
+
+# --- BULK SCRAPING ---
+async def scrape_many_async(urls, concurrency=SCRAPER_CONCURRENCY, per_domain=SCRAPER_PER_DOMAIN_CONCURRENCY,
+                            domain_delay_ms=SCRAPER_DOMAIN_DELAY_MS, pool=None, refresh=False):
+    """
+    Async generator yielding (url, result) as each page completes.
+    At most `concurrency` pages are open overall and `per_domain` per host.
+    Cached pages are served without touching the throttle or the browser.
+    Must run on the pool's event loop (see scrape_many for the sync entry point).
+    """
+    pool = pool or get_browser_pool()
+    limit = asyncio.Semaphore(max(1, concurrency))
+    throttle = DomainThrottle(per_domain, domain_delay_ms)
 
-            report(f"🌐 Navigating to {url}...")
+    loop = asyncio.get_running_loop()
+
+    async def fetch(url, logs):
+        fallback = False
+        if SCRAPER_USE_ADAPTERS and get_adapter(url):
+            # Adapters use blocking HTTP; keep them off the event loop
+            result = await loop.run_in_executor(None, _try_adapter, url)
+            if result:
+                return result
+            logs.append("↩️ Adapter failed, falling back to browser")
+            fallback = True
+        result = await pool.run(lambda b: _scrape_page(b, url, logs.append))
+        result["stats"]["adapter_fallback"] = fallback
+        return result
+
+    async def one(url):
+        logs = []
+        started = time.perf_counter()
+        async with limit:
             try:
-                page.goto(url, wait_until="domcontentloaded", timeout=45000)
-                page.wait_for_timeout(1000)
+                # Cache lookups and revalidation are blocking SQLite/HTTP calls
+                result = await loop.run_in_executor(None, _from_cache, url, refresh)
+                if result:
+                    logs.append(f"🗄️ Served from scrape cache ({result['stats']['cache']})")
+                else:
+                    result = await throttle(url, lambda: fetch(url, logs))
+                    result = await loop.run_in_executor(None, _finalize, url, result)
             except Exception as e:
-                report(f"⚠️ Navigation warning: {e}")
+                result = {"error": str(e), "stats": {"path": "browser"}}
+        await loop.run_in_executor(None, _record, url, result, started)
+        result["debug"] = logs
+        return url, result
 
-            # Scroll to bottom to trigger lazy loading
-            page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            page.wait_for_timeout(2000)
-            page.evaluate("window.scrollTo(0, 0)") # Scroll back up
-            page.wait_for_timeout(1000)
+    # Links differing only in tracking params or trailing slashes are scraped once
+    unique = {}
+    for u in urls:
+        unique.setdefault(canonicalize_url(u), u)
+    tasks = [asyncio.ensure_future(one(u)) for u in unique.values()]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for t in tasks:
+            t.cancel()
 
-            # Click standard gallery expansion buttons if they exist
-            try:
-                page.get_by_role("button", name="Show all").click(timeout=1000)
-            except: pass
-
-            text = page.inner_text("body")
-            
-            # Filter for useful images with broader acceptance but strict exclusion
-            images = page.eval_on_selector_all("img", """
-                imgs => imgs.filter(i => 
-                    i.src.startsWith('http') && 
-                    !i.src.includes('avatar') && 
-                    !i.src.includes('icon') &&
-                    !i.src.includes('logo') &&
-                    !i.src.includes('svg') &&
-                    (i.naturalWidth > 200 || i.naturalHeight > 200)
-                ).map(i => i.src)
-            """)
-            
-            browser.close()
-            
-            # Limit text size for AI processing
-            cleaned_text = "\n".join([l.strip() for l in text.splitlines() if len(l.strip()) > 30][:50000])
-            
-            report("✅ Extraction complete.")
-            return {
-                "text": cleaned_text,
-                "images": list(set(images))[:500],
-                "debug": logs
-            }
+def scrape_many(urls, concurrency=SCRAPER_CONCURRENCY, per_domain=SCRAPER_PER_DOMAIN_CONCURRENCY,
+                domain_delay_ms=SCRAPER_DOMAIN_DELAY_MS, refresh=False):
+    """
+    Scrape many URLs concurrently; a sync generator yielding (url, result)
+    in completion order. Duplicate URLs (after canonicalization) are scraped once.
+    """
+    if SAFE_MODE:
+        for url in dict.fromkeys(urls):
+            yield url, {"error": "Scraper disabled in production safe mode"}
+        return
 
-    except Exception as e:
-        return {"error": str(e), "debug": logs}
+    pool = get_browser_pool()
+    results = queue.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for item in scrape_many_async(urls, concurrency, per_domain, domain_delay_ms, pool, refresh):
+                results.put(item)
+        finally:
+            results.put(done)
+
+    future = pool.submit_coroutine(pump())
+    try:
+        while True:
+            item = results.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        # Stops outstanding scrapes if the caller abandons the generator
+        future.cancel()
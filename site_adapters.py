@@ -0,0 +1,313 @@
+"""
+Browserless fast path for known model repositories.
+Each adapter fetches a model page (or the site's JSON endpoint) with a
+pooled HTTP client and parses embedded structured data: JSON-LD,
+Next.js __NEXT_DATA__, OpenGraph meta. The scraper falls back to
+Playwright only when no adapter matches or an adapter fails.
+"""
+
+import html
+import json
+import re
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    SCRAPER_HTTP_TIMEOUT,
+    SCRAPER_ADAPTER_MIN_TEXT,
+    THINGIVERSE_API_TOKEN,
+    get_logger
+)
+
+logger = get_logger("site_adapters")
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+class AdapterError(Exception):
+    """The adapter could not produce a usable result; fall back to the browser."""
+
+
+# --- HTTP CLIENT ---
+_session = None
+_session_lock = threading.Lock()
+
+def get_http_session() -> requests.Session:
+    """Process-wide keep-alive session shared by all adapters."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update({
+                    "User-Agent": USER_AGENT,
+                    "Accept-Language": "en-US,en;q=0.9",
+                })
+                _session = session
+    return _session
+
+
+# --- PARSING HELPERS ---
+_JSON_LD_RE = re.compile(r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>', re.S | re.I)
+_NEXT_DATA_RE = re.compile(r'<script[^>]+id=["\']__NEXT_DATA__["\'][^>]*>(.*?)</script>', re.S | re.I)
+_META_RE = re.compile(r'<meta\s+[^>]*(?:property|name)=["\']([^"\']+)["\'][^>]*content=["\']([^"\']*)["\']', re.I)
+_TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.S | re.I)
+_TAG_RE = re.compile(r"<[^>]+>")
+_BLOCK_TAG_RE = re.compile(r"</?(?:p|div|br|li|h[1-6]|tr|ul|ol)[^>]*>", re.I)
+_IMAGE_URL_RE = re.compile(r"^https?://[^\s\"']+\.(?:jpe?g|png|webp)(?:\?[^\s\"']*)?$", re.I)
+_FILENAME_RE = re.compile(r"^[\w\-. ]+\.(?:jpe?g|png|webp|gif|stl|3mf|obj|step|zip)$", re.I)
+
+TEXT_KEYS = {
+    "name", "title", "headline", "summary", "description", "details", "instructions",
+    "print_settings", "printsettings", "content", "text", "category", "license", "tags",
+}
+
+def html_to_text(fragment: str) -> str:
+    """Strip markup from an HTML fragment, keeping block boundaries as newlines."""
+    text = _BLOCK_TAG_RE.sub("\n", fragment or "")
+    text = html.unescape(_TAG_RE.sub("", text))
+    return "\n".join(l.strip() for l in text.splitlines() if l.strip())
+
+def extract_json_ld(page_html: str) -> list:
+    blocks = []
+    for raw in _JSON_LD_RE.findall(page_html):
+        try:
+            data = json.loads(raw.strip())
+        except ValueError:
+            continue
+        blocks.extend(data if isinstance(data, list) else [data])
+    return blocks
+
+def extract_next_data(page_html: str) -> Optional[dict]:
+    match = _NEXT_DATA_RE.search(page_html)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except ValueError:
+        return None
+
+def extract_meta(page_html: str) -> dict:
+    meta = {k.lower(): html.unescape(v) for k, v in _META_RE.findall(page_html)}
+    title = _TITLE_RE.search(page_html)
+    if title:
+        meta.setdefault("title", html.unescape(title.group(1).strip()))
+    return meta
+
+def walk_json(data, texts=None, images=None, key=None, depth=0):
+    """Collect descriptive text fields and image URLs from nested JSON."""
+    texts = [] if texts is None else texts
+    images = [] if images is None else images
+    if depth > 12:
+        return texts, images
+    if isinstance(data, dict):
+        for k, v in data.items():
+            walk_json(v, texts, images, str(k).lower(), depth + 1)
+    elif isinstance(data, list):
+        for v in data:
+            walk_json(v, texts, images, key, depth + 1)
+    elif isinstance(data, str):
+        value = data.strip()
+        if _IMAGE_URL_RE.match(value):
+            images.append(value)
+        elif key in TEXT_KEYS and value and not _FILENAME_RE.match(value):
+            texts.append(html_to_text(value))
+    return texts, images
+
+def response_validators(response) -> dict:
+    """ETag / Last-Modified from an HTTP response, for conditional revalidation."""
+    return {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+
+def build_result(texts, images, adapter, started, fetched_bytes):
+    """Normalize adapter output to the scraper's result shape."""
+    lines = []
+    for block in texts:
+        lines.extend(l.strip() for l in block.splitlines())
+    lines = list(dict.fromkeys(l for l in lines if l))
+    text = "\n".join(lines)
+    if len(text) < SCRAPER_ADAPTER_MIN_TEXT:
+        raise AdapterError(f"{adapter}: only {len(text)} chars of text extracted")
+    return {
+        "text": text[:200000],
+        "images": list(dict.fromkeys(images))[:500],
+        "stats": {
+            "adapter": adapter,
+            "bytes": fetched_bytes,
+            "requests": 1,
+            "blocked_requests": 0,
+            "total_ms": round((time.perf_counter() - started) * 1000),
+        },
+    }
+
+
+# --- ADAPTERS ---
+class SiteAdapter:
+    """Base adapter: fetch HTML and parse JSON-LD, __NEXT_DATA__ and OpenGraph meta."""
+
+    name = "generic"
+    domains = ()
+
+    def matches(self, url: str) -> bool:
+        host = (urlparse(url).hostname or "").lower()
+        return any(host == d or host.endswith("." + d) for d in self.domains)
+
+    def fetch(self, url: str) -> requests.Response:
+        r = get_http_session().get(url, timeout=SCRAPER_HTTP_TIMEOUT)
+        if r.status_code != 200:
+            raise AdapterError(f"{self.name}: HTTP {r.status_code}")
+        return r
+
+    def parse(self, url: str, page_html: str) -> tuple:
+        """Return (texts, images) from a model page's HTML."""
+        texts, images = [], []
+        for block in extract_json_ld(page_html):
+            walk_json(block, texts, images)
+        next_data = extract_next_data(page_html)
+        if next_data:
+            walk_json(next_data.get("props", {}).get("pageProps", {}), texts, images)
+        meta = extract_meta(page_html)
+        head = [meta[k] for k in ("og:title", "og:description") if meta.get(k)] or \
+            [meta[k] for k in ("title", "description") if meta.get(k)]
+        cover = [meta["og:image"]] if meta.get("og:image") else []
+        return head + texts, cover + images
+
+    def scrape(self, url: str, page_html: Optional[str] = None) -> dict:
+        """Fetch (unless `page_html` is given) and parse; raises AdapterError on failure."""
+        started = time.perf_counter()
+        validators = {}
+        if page_html is None:
+            response = self.fetch(url)
+            page_html, validators = response.text, response_validators(response)
+        texts, images = self.parse(url, page_html)
+        result = build_result(texts, images, self.name, started, len(page_html.encode("utf-8", "ignore")))
+        result["validators"] = validators
+        return result
+
+
+class MakerWorldAdapter(SiteAdapter):
+    """MakerWorld is a Next.js app; the design lives in __NEXT_DATA__.props.pageProps.design."""
+
+    name = "makerworld"
+    domains = ("makerworld.com",)
+
+    def parse(self, url, page_html):
+        next_data = extract_next_data(page_html)
+        if not next_data:
+            raise AdapterError("makerworld: no __NEXT_DATA__")
+        page_props = next_data.get("props", {}).get("pageProps", {})
+        design = page_props.get("design") or page_props
+        texts, images = walk_json(design)
+        cover = design.get("coverUrl") if isinstance(design, dict) else None
+        if cover:
+            images.insert(0, cover)
+        return texts, images
+
+
+class PrintablesAdapter(SiteAdapter):
+    """Printables: GraphQL API by model id, with the HTML page as a fallback."""
+
+    name = "printables"
+    domains = ("printables.com",)
+    api_url = "https://api.printables.com/graphql/"
+    media_url = "https://media.printables.com/"
+    query = """
+    query PrintProfile($id: ID!) {
+      print(id: $id) {
+        id name summary description
+        images { filePath }
+        tags { name }
+      }
+    }
+    """
+    _ID_RE = re.compile(r"/model/(\d+)")
+
+    def scrape(self, url, page_html=None):
+        if page_html is not None:
+            return super().scrape(url, page_html)
+        match = self._ID_RE.search(url)
+        if match:
+            started = time.perf_counter()
+            try:
+                r = get_http_session().post(
+                    self.api_url,
+                    json={"operationName": "PrintProfile", "query": self.query, "variables": {"id": match.group(1)}},
+                    timeout=SCRAPER_HTTP_TIMEOUT
+                )
+                data = (r.json().get("data") or {}).get("print") if r.status_code == 200 else None
+                if data:
+                    texts, _ = walk_json({k: v for k, v in data.items() if k != "images"})
+                    images = [self.media_url + i["filePath"] for i in data.get("images") or [] if i.get("filePath")]
+                    return build_result(texts, images, self.name, started, len(r.content))
+            except (requests.RequestException, ValueError, AdapterError) as e:
+                logger.info(f"printables API path failed, trying HTML: {str(e)}")
+        return super().scrape(url)
+
+
+class ThingiverseAdapter(SiteAdapter):
+    """Thingiverse: REST API when THINGIVERSE_API_TOKEN is set, else page metadata."""
+
+    name = "thingiverse"
+    domains = ("thingiverse.com",)
+    api_url = "https://api.thingiverse.com/things/{id}"
+    _ID_RE = re.compile(r"thing:(\d+)")
+
+    def scrape(self, url, page_html=None):
+        match = self._ID_RE.search(url)
+        if page_html is None and match and THINGIVERSE_API_TOKEN:
+            started = time.perf_counter()
+            headers = {"Authorization": f"Bearer {THINGIVERSE_API_TOKEN}"}
+            session = get_http_session()
+            r = session.get(self.api_url.format(id=match.group(1)), headers=headers, timeout=SCRAPER_HTTP_TIMEOUT)
+            if r.status_code != 200:
+                raise AdapterError(f"thingiverse API: HTTP {r.status_code}")
+            thing = r.json()
+            texts = [html_to_text(thing.get(k) or "") for k in ("name", "description", "instructions", "details")]
+            images = []
+            ri = session.get(self.api_url.format(id=match.group(1)) + "/images", headers=headers, timeout=SCRAPER_HTTP_TIMEOUT)
+            if ri.status_code == 200:
+                for img in ri.json():
+                    sizes = [s for s in img.get("sizes", []) if s.get("size") == "large" and s.get("type") == "display"]
+                    if sizes:
+                        images.append(sizes[0]["url"])
+            return build_result(texts, images, self.name, started, len(r.content))
+        return super().scrape(url, page_html)
+
+
+ADAPTERS = [MakerWorldAdapter(), PrintablesAdapter(), ThingiverseAdapter()]
+
+def register_adapter(adapter: SiteAdapter, first: bool = True):
+    """Plug in an adapter for another site."""
+    if first:
+        ADAPTERS.insert(0, adapter)
+    else:
+        ADAPTERS.append(adapter)
+
+def get_adapter(url: str) -> Optional[SiteAdapter]:
+    for adapter in ADAPTERS:
+        if adapter.matches(url):
+            return adapter
+    return None
+
+def fetch_with_adapter(url: str) -> Optional[dict]:
+    """Scrape `url` without a browser; None means no adapter or adapter failure."""
+    adapter = get_adapter(url)
+    if adapter is None:
+        return None
+    try:
+        result = adapter.scrape(url)
+        logger.info(f"Adapter '{adapter.name}' scraped {url} in {result['stats']['total_ms']} ms")
+        return result
+    except (AdapterError, requests.RequestException, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Adapter '{adapter.name}' failed for {url}, falling back to browser: {str(e)}")
+        return None
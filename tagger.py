@@ -0,0 +1,207 @@
+"""
+Local keyword/tag extraction for the knowledge base.
+TF-IDF over sparse term-count matrices, fitted on history entries and
+refitted incrementally as new entries arrive. No LLM call required.
+"""
+
+import re
+import threading
+from typing import Iterable, List
+
+import numpy as np
+import scipy.sparse as sp
+
+from config import get_logger
+
+logger = get_logger("tagger")
+
+DEFAULT_TAGS = "#3dprinting"
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have having
+he her here hers him his how i if in into is it its itself just me more most my no nor not now of off on
+once only or other our out over own same she should so some such than that the their them then there these
+they this those through to too under until up very was we were what when where which while who whom why
+will with would you your yours enable disable disabled sidebar full extracted text sample page extract
+model models print printing printed print3d 3d analyze analysis summary however overall well may might
+use used using make makes made good great best need needs like one two get see also based
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z][a-z0-9\-]{2,}")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased unigrams plus adjacent-word bigrams, stopwords removed."""
+    words = [w.strip("-") for w in _TOKEN_RE.findall((text or "").lower())]
+    words = [w for w in words if len(w) > 2 and w not in STOPWORDS]
+    bigrams = [f"{a}-{b}" for a, b in zip(words, words[1:]) if a != b]
+    return words + bigrams
+
+
+class KeywordTagger:
+    """Incrementally fitted TF-IDF keyword extractor."""
+
+    def __init__(self, max_tags: int = 5):
+        self.max_tags = max_tags
+        self.vocab = {}
+        self.terms = []
+        self.doc_freq = np.zeros(0, dtype=np.int64)
+        self.n_docs = 0
+        self._lock = threading.Lock()
+
+    def _counts(self, docs: Iterable[str], grow: bool, extra: dict = None) -> sp.csr_matrix:
+        """
+        Sparse (n_docs x n_terms) term-count matrix. Unseen terms are added
+        to the vocabulary when `grow`; otherwise they get columns after the
+        vocabulary, numbered in `extra` (term -> offset), or are dropped.
+        """
+        rows, cols = [], []
+        n = 0
+        for i, doc in enumerate(docs):
+            n += 1
+            for term in tokenize(doc):
+                idx = self.vocab.get(term)
+                if idx is None:
+                    if grow:
+                        idx = len(self.terms)
+                        self.vocab[term] = idx
+                        self.terms.append(term)
+                    elif extra is not None:
+                        idx = len(self.terms) + extra.setdefault(term, len(extra))
+                    else:
+                        continue
+                rows.append(i)
+                cols.append(idx)
+        data = np.ones(len(rows), dtype=np.float32)
+        # Duplicate (row, col) pairs are summed into term counts
+        return sp.csr_matrix((data, (rows, cols)), shape=(n, len(self.terms) + len(extra or ())))
+
+    def partial_fit(self, docs: Iterable[str]) -> "KeywordTagger":
+        """Add documents to the document-frequency statistics."""
+        with self._lock:
+            counts = self._counts(docs, grow=True)
+            if counts.shape[1] > self.doc_freq.size:
+                self.doc_freq = np.concatenate(
+                    [self.doc_freq, np.zeros(counts.shape[1] - self.doc_freq.size, dtype=np.int64)]
+                )
+            self.doc_freq += np.bincount(counts.indices, minlength=counts.shape[1])
+            self.n_docs += counts.shape[0]
+        return self
+
+    def fit(self, docs: Iterable[str]) -> "KeywordTagger":
+        """Refit from scratch."""
+        with self._lock:
+            self.vocab, self.terms = {}, []
+            self.doc_freq = np.zeros(0, dtype=np.int64)
+            self.n_docs = 0
+        return self.partial_fit(docs)
+
+    def _weights(self, docs: Iterable[str]):
+        """transform() plus the term of every column; reading never changes the model."""
+        extra = {}
+        with self._lock:
+            counts = self._counts(docs, grow=False, extra=extra)
+            terms = self.terms + list(extra)
+            doc_freq = np.zeros(counts.shape[1], dtype=np.int64)
+            doc_freq[:self.doc_freq.size] = self.doc_freq
+            idf = np.log((1.0 + self.n_docs) / (1.0 + doc_freq)) + 1.0
+        counts.data = 1.0 + np.log(counts.data)
+        return counts.multiply(idf.astype(np.float32)).tocsr(), terms
+
+    def transform(self, docs: Iterable[str]) -> sp.csr_matrix:
+        """
+        Sublinear TF times smoothed IDF, one sparse row per document.
+        Terms never seen in fitted documents get the maximum IDF, in
+        columns after the fitted vocabulary that exist for this call only.
+        """
+        return self._weights(docs)[0]
+
+    def tag_many(self, docs: List[str], k: int = None) -> List[List[str]]:
+        """Top-k terms per document, ranked for all documents in one pass."""
+        k = k or self.max_tags
+        if not docs:
+            return []
+        weights, terms = self._weights(docs)
+        weights.sum_duplicates()
+
+        row_ids = np.repeat(np.arange(weights.shape[0]), np.diff(weights.indptr))
+        order = np.lexsort((-weights.data, row_ids))
+        sorted_rows = row_ids[order]
+        rank = np.arange(order.size) - weights.indptr[sorted_rows]
+        # Over-select so overlapping unigrams/bigrams can be pruned below
+        keep = order[rank < k * 2]
+
+        candidates = [[] for _ in range(weights.shape[0])]
+        for row, col in zip(row_ids[keep], weights.indices[keep]):
+            candidates[row].append(terms[col])
+        return [self._prune(c, k) for c in candidates]
+
+    @staticmethod
+    def _prune(terms: List[str], k: int) -> List[str]:
+        """Drop unigrams already covered by a chosen bigram."""
+        chosen = []
+        for term in terms:
+            if any(term in c.split("-") or c in term.split("-") for c in chosen):
+                continue
+            chosen.append(term)
+            if len(chosen) == k:
+                break
+        return chosen
+
+    def tag(self, doc: str, k: int = None) -> str:
+        """Hashtag string for a single document."""
+        terms = self.tag_many([doc], k)[0]
+        return format_tags(terms)
+
+
+def format_tags(terms: List[str]) -> str:
+    if not terms:
+        return DEFAULT_TAGS
+    return " ".join(f"#{t}" for t in terms)
+
+
+def history_documents(df) -> List[str]:
+    """Text used for tagging from a load_history() DataFrame."""
+    if df is None or df.empty:
+        return []
+    cols = [c for c in ("summary", "details") if c in df.columns]
+    return df[cols].fillna("").astype(str).agg(" ".join, axis=1).tolist()
+
+
+def retag_placeholders(df, placeholders=("", "#3dprinting #scraped")):
+    """Batch-tag rows whose tags are empty or the old stub, in one pass."""
+    if df is None or df.empty or "tags" not in df.columns:
+        return df
+    mask = df["tags"].fillna("").astype(str).str.strip().isin(placeholders)
+    if mask.any():
+        docs = history_documents(df[mask])
+        df = df.copy()
+        df.loc[mask, "tags"] = [format_tags(t) for t in _tagger.tag_many(docs)]
+    return df
+
+
+_tagger = KeywordTagger()
+_synced_rows = 0
+
+
+def get_tagger() -> KeywordTagger:
+    """Process-wide tagger shared by the app and ai.ai_generate_tags."""
+    return _tagger
+
+
+def sync_with_history(df) -> int:
+    """Fit on history rows not seen yet; returns the number of rows added."""
+    global _synced_rows
+    docs = history_documents(df)
+    if len(docs) < _synced_rows:
+        # History shrank (rows deleted in the sheet): refit from scratch
+        _tagger.fit(docs)
+        _synced_rows = len(docs)
+        return len(docs)
+    new_docs = docs[_synced_rows:]
+    if new_docs:
+        _tagger.partial_fit(new_docs)
+        _synced_rows = len(docs)
+        logger.info(f"Tagger refitted with {len(new_docs)} new entries ({_tagger.n_docs} total, {len(_tagger.terms)} terms)")
+    return len(new_docs)
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+import database
+from kb_store import HISTORY_COLUMNS, SQLiteBackend
+
+
+class FakeMirror:
+    def __init__(self, rows):
+        self.rows = rows
+        self.fail = True
+
+    def sync(self, wks, full=False):
+        if self.fail:
+            raise ConnectionError("quota exceeded")
+        return {"fetched": len(self.rows), "full": full}
+
+    def frame(self):
+        df = pd.DataFrame(self.rows, columns=HISTORY_COLUMNS)
+        df["created_at"] = pd.to_datetime(df["created_at"])
+        return df
+
+
+class FakeReplica:
+    def init(self):
+        return True
+
+
+def row(summary, when):
+    return ["Web Scrape", "https://example.com", "", 0, summary, "#pla", "[]", when.strftime("%Y-%m-%d %H:%M:%S")]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    backend = SQLiteBackend(str(tmp_path / "kb.db"))
+    old = datetime.now() - timedelta(days=3)
+    mirror = FakeMirror([row("old entry 1", old), row("old entry 2", old)])
+    monkeypatch.setattr(database, "_backend", backend)
+    monkeypatch.setattr(database, "get_replica", lambda: FakeReplica())
+    monkeypatch.setattr(database, "get_history_mirror", lambda: mirror)
+    monkeypatch.setattr(database, "with_worksheet", lambda fn: fn(None))
+    for name, value in [("_backend_ready", False), ("_backend_retry_at", 0.0), ("_import_done", False),
+                        ("_import_retry_at", 0.0), ("_import_before", None)]:
+        monkeypatch.setattr(database, name, value)
+    return backend, mirror
+
+
+def test_failed_import_is_retried(store, monkeypatch):
+    backend, mirror = store
+    database.init_db()
+    assert database._backend_ready and not database._import_done
+    assert backend.stats()["total"] == 0
+
+    # Within the retry interval nothing is attempted
+    mirror.fail = False
+    database.init_db()
+    assert not database._import_done
+
+    monkeypatch.setattr(database, "_import_retry_at", 0.0)
+    database.init_db()
+    assert database._import_done
+    assert sorted(backend.load()["summary"]) == ["old entry 1", "old entry 2"]
+
+
+def test_rows_added_while_import_pending_are_not_duplicated(store, monkeypatch):
+    backend, mirror = store
+    database.init_db()
+    new = row("added after start", datetime.now() + timedelta(seconds=1))
+    backend.add(new)
+    mirror.rows.append(new)  # replicated to the sheet meanwhile
+
+    mirror.fail = False
+    monkeypatch.setattr(database, "_import_retry_at", 0.0)
+    database.init_db()
+    assert database._import_done
+    assert sorted(backend.load()["summary"]) == ["added after start", "old entry 1", "old entry 2"]
+
+
+def test_non_empty_primary_skips_import(store):
+    backend, mirror = store
+    backend.add(row("local", datetime.now()))
+    database.init_db()
+    assert database._import_done
+    assert backend.stats()["total"] == 1
+
+
+def test_failed_backend_init_is_retried(store, monkeypatch):
+    backend, mirror = store
+    mirror.fail = False
+    results = iter([False, True])
+    monkeypatch.setattr(backend, "init", lambda: next(results))
+
+    database.init_db()
+    assert not database._backend_ready
+    # The import waits for the primary
+    assert not database._import_done and backend.stats()["total"] == 0
+
+    database.init_db()  # still backing off
+    assert not database._backend_ready
+
+    monkeypatch.setattr(database, "_backend_retry_at", 0.0)
+    database.init_db()
+    assert database._backend_ready and database._import_done
+    assert backend.stats()["total"] == 2
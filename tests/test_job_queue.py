@@ -0,0 +1,45 @@
+import pytest
+
+from job_queue import JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.db"), lease_seconds=60, retry_base_seconds=0)
+
+
+def expire_lease(queue, job_id):
+    queue._conn.execute("UPDATE jobs SET lease_until = 0 WHERE id = ?", (job_id,))
+
+
+def test_stale_worker_cannot_finish_a_reclaimed_job(queue):
+    job_id = queue.enqueue("scrape_analyze", {"url": "https://example.com/1"})
+    stale = queue.claim("worker-a")
+    expire_lease(queue, job_id)
+    current = queue.claim("worker-b")
+    assert current["id"] == job_id and current["claimed_by"] != stale["claimed_by"]
+
+    assert not queue.complete(job_id, stale["claimed_by"], {"from": "a"})
+    assert not queue.fail(job_id, stale["claimed_by"], "boom")
+    queue.progress(job_id, stale["claimed_by"], "still going")
+    job = queue.get(job_id)
+    assert job["status"] == "running" and job["result"] is None and job["log"] == []
+
+    assert queue.complete(job_id, current["claimed_by"], {"from": "b"})
+    assert queue.get(job_id)["result"] == {"from": "b"}
+
+
+def test_finished_job_ignores_late_failure(queue):
+    job_id = queue.enqueue("scrape_analyze", {"url": "https://example.com/1"})
+    job = queue.claim("worker-a")
+    assert queue.complete(job_id, job["claimed_by"], {"ok": True})
+    assert not queue.fail(job_id, job["claimed_by"], "late error")
+    assert queue.get(job_id)["status"] == "done"
+
+
+def test_fail_retries_then_gives_up(queue):
+    job_id = queue.enqueue("scrape_analyze", {"url": "https://example.com/1"}, max_attempts=2)
+    assert queue.fail(job_id, queue.claim("w")["claimed_by"], "timeout")
+    assert queue.get(job_id)["status"] == "queued"
+    assert queue.fail(job_id, queue.claim("w")["claimed_by"], "timeout")
+    assert queue.get(job_id)["status"] == "failed"
@@ -0,0 +1,60 @@
+import pytest
+
+from kb_spool import KBSpool
+
+
+class HTTPError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+class Sheet:
+    """Writer that rejects any batch containing a 'bad' row, like a sheet API validation error."""
+
+    def __init__(self, code=400):
+        self.code = code
+        self.rows = []
+        self.calls = 0
+
+    def __call__(self, rows):
+        self.calls += 1
+        if any(row[0] == "bad" for row in rows):
+            raise HTTPError(self.code)
+        self.rows += rows
+
+
+def make_spool(tmp_path, sheet, max_attempts=1):
+    spool = KBSpool(sheet, path=str(tmp_path / "spool.db"), batch_size=8, max_attempts=max_attempts)
+    for i in range(8):
+        spool._conn.execute("INSERT INTO kb_spool (row, created_at) VALUES (?, 0)",
+                            (f'["{"bad" if i == 5 else "ok"}", {i}]',))
+    return spool
+
+
+def test_non_retryable_error_parks_only_the_bad_row(tmp_path):
+    sheet = Sheet(400)
+    spool = make_spool(tmp_path, sheet)
+    assert spool.flush_once() == 7
+    assert sorted(row[1] for row in sheet.rows) == [0, 1, 2, 3, 4, 6, 7]
+    stats = spool.stats()
+    assert stats["pending"] == 0 and stats["dead"] == 1
+
+
+def test_bad_row_is_retried_until_out_of_attempts(tmp_path):
+    spool = make_spool(tmp_path, Sheet(400), max_attempts=2)
+    assert spool.flush_once() == 7
+    assert spool.stats()["pending"] == 1 and spool.stats()["dead"] == 0
+    spool._retry_at = 0
+    assert spool.flush_once() == 0
+    assert spool.stats()["dead"] == 1
+
+
+@pytest.mark.parametrize("code", [429, 503])
+def test_retryable_error_keeps_the_batch_whole(tmp_path, code):
+    sheet = Sheet(code)
+    spool = make_spool(tmp_path, sheet)
+    assert spool.flush_once() == 0
+    assert sheet.calls == 1
+    assert spool.stats()["pending"] == 8 and spool.stats()["dead"] == 0
+    assert spool.stats()["retry_in"] > 0
@@ -0,0 +1,31 @@
+import pytest
+
+from print_scheduler import parse_hours, schedule
+
+
+@pytest.mark.parametrize("text, hours", [
+    (6, 6.0),
+    ("6", 6.0),
+    ("6hr", 6.0),
+    ("2.5 h", 2.5),
+    ("90 min", 1.5),
+    ("1h 30m", 1.5),
+    ("1h30", 1.5),
+    ("1 hour 30", 1.5),
+    ("2 hours 15 minutes", 2.25),
+    ("0.2mm 6hr", 6.0),
+    ("0.2 mm layers, 6 hours", 6.0),
+])
+def test_parse_hours(text, hours):
+    assert parse_hours(text) == pytest.approx(hours)
+
+
+@pytest.mark.parametrize("text", [None, 0, "", "abc", "0.2mm", "6x"])
+def test_parse_hours_rejects_non_durations(text):
+    assert parse_hours(text) is None
+
+
+def test_schedule_uses_parsed_hours():
+    printers = [{"id": 1, "name": "A", "speed": 60, "nozzle": 0.4, "materials": ["PLA"]}]
+    plan = schedule([{"id": 1, "hours": "1h30", "material": "PLA"}], printers, improve_seconds=0)
+    assert plan["makespan_hours"] == pytest.approx(1.5)
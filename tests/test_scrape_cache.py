@@ -0,0 +1,38 @@
+import pytest
+
+from scrape_cache import ScrapeCache
+
+
+def browser_result(**stats):
+    return {
+        "text": "Dragon figurine\nPrint at 0.12 mm layers with tree supports.",
+        "images": ["https://cdn.example.com/dragon.jpg"],
+        "stats": {"path": "browser", **stats},
+        "validators": {"etag": '"abc"', "last_modified": None},
+    }
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ScrapeCache(str(tmp_path / "scrape.db"), fresh_seconds=3600, max_entries=10, enabled=True)
+
+
+def test_successful_result_is_cached(cache):
+    url = "https://www.printables.com/model/1-dragon"
+    cache.put(url, browser_result(http_status=200))
+    hit = cache.get(url)
+    assert hit["text"].startswith("Dragon figurine")
+    assert hit["stats"]["cache"] == "hit"
+
+
+@pytest.mark.parametrize("stats", [
+    {"navigation_error": "Timeout 20000ms exceeded."},
+    {"http_status": 404},
+    {"http_status": 503},
+    {"http_status": 200, "navigation_error": "net::ERR_CONNECTION_RESET"},
+])
+def test_degraded_result_is_not_cached(cache, stats):
+    url = "https://www.printables.com/model/2-broken"
+    cache.put(url, browser_result(**stats))
+    assert cache.lookup(url) is None
+    assert cache.get(url) is None
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+import site_adapters
+from config import SCRAPER_ADAPTER_MIN_TEXT
+from site_adapters import AdapterError, MakerWorldAdapter, PrintablesAdapter, ThingiverseAdapter, get_adapter
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    def no_network():
+        raise AssertionError("adapter tried to use the network")
+    monkeypatch.setattr(site_adapters, "get_http_session", no_network)
+
+
+def test_makerworld_next_data():
+    url = "https://makerworld.com/en/models/123"
+    assert isinstance(get_adapter(url), MakerWorldAdapter)
+    result = MakerWorldAdapter().scrape(url, page_html=fixture("makerworld_model.html"))
+    lines = result["text"].splitlines()
+    assert lines[0] == "Modular Cable Organizer"
+    assert lines[1].startswith("Snap-together cable organizer for desks.")
+    assert "Designed for printing without supports on any Bambu Lab printer." in lines
+    base = "https://makerworld.bblmw.com/makerworld/model/US1a2b3c/"
+    assert result["images"] == [
+        base + "design/cover.jpg", base + "design/front.jpg", base + "design/side.jpg", base + "instance/plate_1.png",
+    ]
+    assert result["stats"]["adapter"] == "makerworld"
+
+
+def test_makerworld_without_next_data():
+    with pytest.raises(AdapterError, match="no __NEXT_DATA__"):
+        MakerWorldAdapter().scrape("https://makerworld.com/en/models/1", page_html="<html><body>Hi</body></html>")
+
+
+def test_printables_html_fallback():
+    url = "https://www.printables.com/model/445566-articulated-dragon"
+    assert isinstance(get_adapter(url), PrintablesAdapter)
+    result = PrintablesAdapter().scrape(url, page_html=fixture("printables_model.html"))
+    lines = result["text"].splitlines()
+    assert lines[0] == "Print-in-place Articulated Dragon"
+    assert lines[1] == "A fully articulated dragon that prints in place with no supports. Tested on Prusa MK4 and MINI."
+    # Lines are de-duplicated across JSON-LD, __NEXT_DATA__ and meta
+    assert len(lines) == len(set(lines))
+    media = "https://media.printables.com/media/prints/445566/images/"
+    assert result["images"] == [
+        media + "3344556_a1b2/thumbs/cover/1200x630/jpg/dragon.jpg",
+        media + "3344556_a1b2/dragon.jpg",
+        media + "3344557_c3d4/dragon_side.webp",
+    ]
+
+
+def test_thingiverse_meta():
+    url = "https://www.thingiverse.com/thing:123"
+    assert isinstance(get_adapter(url), ThingiverseAdapter)
+    result = ThingiverseAdapter().scrape(url, page_html=fixture("thingiverse_thing.html"))
+    lines = result["text"].splitlines()
+    assert lines[0] == "Parametric Spool Holder"
+    assert lines[1].startswith("Parametric spool holder for 200 mm and 1 kg spools")
+    assert lines[2].startswith("Print settings: 0.28 mm layers")
+    assert result["images"] == ["https://cdn.thingiverse.com/assets/aa/bb/cc/dd/ee/large_display_spool_holder.jpg"]
+
+
+def test_too_little_text_is_an_adapter_error():
+    short = "x" * (SCRAPER_ADAPTER_MIN_TEXT // 2)
+    page = f'<html><head><meta property="og:title" content="{short}"></head><body></body></html>'
+    with pytest.raises(AdapterError, match="chars of text extracted"):
+        ThingiverseAdapter().scrape("https://www.thingiverse.com/thing:9", page_html=page)
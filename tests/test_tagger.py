@@ -0,0 +1,20 @@
+from tagger import KeywordTagger, tokenize
+
+
+def test_tagging_does_not_grow_the_model():
+    tagger = KeywordTagger().fit(["petg bracket strong walls", "pla dragon miniature supports"])
+    vocab, n_docs = len(tagger.vocab), tagger.n_docs
+    for i in range(100):
+        tags = tagger.tag(f"unique{i}word dragon supports")
+    assert len(tagger.vocab) == vocab == tagger.doc_freq.size
+    assert tagger.n_docs == n_docs
+    # Unseen terms still rank, with the maximum IDF
+    assert "#unique99word" in tags.split()
+
+
+def test_transform_width_covers_unseen_terms_per_call():
+    tagger = KeywordTagger().fit(["petg bracket"])
+    unseen = [t for t in tokenize("petg xyzzy plover") if t not in tagger.vocab]
+    weights = tagger.transform(["petg xyzzy plover"])
+    assert weights.shape == (1, len(tagger.vocab) + len(unseen))
+    assert tagger.transform(["petg"]).shape == (1, len(tagger.vocab))
@@ -0,0 +1,52 @@
+import pytest
+
+import worker
+from job_queue import JobQueue
+
+URL = "https://www.printables.com/model/1-dragon"
+
+
+def page(**stats):
+    return {"text": "Dragon figurine", "images": [], "stats": {"path": "browser", **stats}}
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.db"), retry_base_seconds=0)
+
+
+def run(queue, monkeypatch, url=URL, **scrape):
+    monkeypatch.setattr(worker, "scrape_model_page", lambda *a, **kw: scrape)
+    job_id = queue.enqueue("scrape_analyze", {"url": url, "ai_enabled": False})
+    worker.Worker(queue, name="test").run_once()
+    return queue.get(job_id)
+
+
+@pytest.mark.parametrize("url, scrape", [
+    ("ftp://example.com/model.stl", {}),
+    (URL, page(http_status=404)),
+    (URL, page(http_status=403)),
+])
+def test_permanent_failures_are_not_retried(queue, monkeypatch, url, scrape):
+    job = run(queue, monkeypatch, url, **scrape)
+    assert job["status"] == "failed"
+    assert job["attempts"] == 1
+
+
+@pytest.mark.parametrize("scrape", [
+    {"error": "Scrape timed out"},
+    page(http_status=503),
+    page(http_status=429),
+    page(navigation_error="net::ERR_CONNECTION_RESET"),
+])
+def test_transient_failures_are_retried(queue, monkeypatch, scrape):
+    job = run(queue, monkeypatch, **scrape)
+    assert job["status"] == "queued"
+    assert job["error"].startswith("Scrape failed")
+
+
+def test_safe_mode_refusal_is_not_retried(queue, monkeypatch):
+    monkeypatch.setattr(worker, "SAFE_MODE", True)
+    job = run(queue, monkeypatch, **page(http_status=200))
+    assert job["status"] == "failed"
+    assert "safe mode" in job["error"]
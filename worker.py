@@ -0,0 +1,180 @@
+"""
+Background workers for the job queue.
+
+Run standalone (one or more processes):
+    python worker.py --workers 2
+
+The Streamlit app also starts JOB_EMBEDDED_WORKERS worker threads in its
+own process, so single-process deployments keep working without a
+separate worker service.
+"""
+
+import argparse
+import multiprocessing
+import os
+import socket
+import threading
+import traceback
+from urllib.parse import urlparse
+
+from ai import ai_analyze, ai_generate_tags
+from config import JOB_POLL_INTERVAL_SECONDS, get_logger
+from context_builder import build_prompt
+from database import add_entry
+from job_queue import JobQueue, get_job_queue
+from scraper import DEFAULT_POLICY, SAFE_MODE, scrape_model_page
+
+logger = get_logger("worker")
+
+ANALYSIS_INSTRUCTION = "Analyze this 3D model for printing risks, commercial viability, and optimal settings. Page extract:"
+
+# Client errors that are worth another attempt (request timeout, rate limit)
+RETRYABLE_HTTP_STATUSES = {408, 429}
+
+
+class RetryableJobError(Exception):
+    """Transient failure; the queue retries the job with backoff."""
+
+
+class PermanentJobError(Exception):
+    """Failure no retry can fix; the job fails at once."""
+
+
+def analyze_scraped_text(text, ai_enabled=True):
+    """AI analysis of scraped page text (or a text sample when AI is off) plus local tags."""
+    if ai_enabled:
+        res = ai_analyze(build_prompt(ANALYSIS_INSTRUCTION, text))
+    else:
+        res = {
+            "summary": "AI Disabled",
+            "details": "Enable AI in sidebar for full analysis.\n\nExtracted Text Sample:\n" + text[:500] + "..."
+        }
+    res["tags"] = ai_generate_tags(res['details'])
+    return res
+
+
+def handle_scrape_analyze(payload, report):
+    """
+    Scrape a model page and analyze it; the result matches the UI's last_scan
+    record. With payload "save" (bulk imports) it is also added to the KB.
+    """
+    url = payload["url"]
+    if SAFE_MODE:
+        raise PermanentJobError("Scraper disabled in production safe mode")
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise PermanentJobError(f"Invalid URL: {url}")
+    if DEFAULT_POLICY.should_block("document", url):
+        raise PermanentJobError(f"Host is on the scraper block list: {parsed.hostname}")
+
+    data = scrape_model_page(url, status_callback=report, refresh=payload.get("refresh", False))
+    if "error" in data:
+        raise RetryableJobError(f"Scrape failed: {data['error']}")
+    stats = data.get("stats", {})
+    status = stats.get("http_status") or 0
+    if 400 <= status < 500 and status not in RETRYABLE_HTTP_STATUSES:
+        raise PermanentJobError(f"Scrape failed: HTTP {status}")
+    if status >= 400 or stats.get("navigation_error"):
+        raise RetryableJobError(f"Scrape failed: {stats.get('navigation_error') or f'HTTP {status}'}")
+
+    report("🧠 Reading geometry...")
+    res = analyze_scraped_text(data["text"], payload.get("ai_enabled", True))
+    if res["summary"] == "AI Error":
+        raise RetryableJobError(f"AI analysis failed: {res['details']}")
+    result = {
+        "url": url,
+        "summary": res["summary"],
+        "details": res["details"],
+        "tags": res["tags"],
+        "images": data.get("images", [])
+    }
+    if payload.get("save"):
+        report("💾 Saving to knowledge base...")
+        if not add_entry("Web Scrape", url, result["details"], 0, result["summary"], result["tags"], result["images"]):
+            raise RetryableJobError("Saving to the knowledge base failed")
+        result["saved"] = True
+    return result
+
+
+HANDLERS = {
+    "scrape_analyze": handle_scrape_analyze,
+}
+
+
+class Worker:
+    """Claims and runs jobs from a JobQueue until stopped."""
+
+    def __init__(self, queue: JobQueue = None, name: str = None, poll_interval: float = JOB_POLL_INTERVAL_SECONDS):
+        self.queue = queue or get_job_queue()
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+
+    def run_once(self) -> bool:
+        """Run one job if any is due; returns whether a job was claimed."""
+        job = self.queue.claim(self.name, list(HANDLERS))
+        if job is None:
+            return False
+
+        job_id, claimed_by = job["id"], job["claimed_by"]
+        logger.info(f"[{self.name}] Running job {job_id} ({job['kind']}, attempt {job['attempts']})")
+        try:
+            result = HANDLERS[job["kind"]](job["payload"], lambda msg: self.queue.progress(job_id, claimed_by, msg))
+            self.queue.complete(job_id, claimed_by, result)
+        except RetryableJobError as e:
+            self.queue.fail(job_id, claimed_by, str(e))
+        except PermanentJobError as e:
+            self.queue.fail(job_id, claimed_by, str(e), retry=False)
+        except Exception as e:
+            logger.error(f"Job {job_id} crashed: {traceback.format_exc()}")
+            self.queue.fail(job_id, claimed_by, f"{type(e).__name__}: {str(e)}")
+        return True
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            if not self.run_once():
+                self._stop.wait(self.poll_interval)
+
+    def stop(self):
+        self._stop.set()
+
+
+def start_embedded_workers(count: int):
+    """Start `count` daemon worker threads in this process."""
+    workers = []
+    for i in range(count):
+        worker = Worker(name=f"{socket.gethostname()}:{os.getpid()}:embedded-{i}")
+        threading.Thread(target=worker.run_forever, name=f"job-worker-{i}", daemon=True).start()
+        workers.append(worker)
+    logger.info(f"Started {count} embedded job worker(s)")
+    return workers
+
+
+def _run_process(poll_interval):
+    Worker(poll_interval=poll_interval).run_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run job queue workers")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes to start")
+    parser.add_argument("--poll", type=float, default=JOB_POLL_INTERVAL_SECONDS, help="Idle poll interval (s)")
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        _run_process(args.poll)
+        return
+
+    procs = [multiprocessing.Process(target=_run_process, args=(args.poll,), daemon=True) for _ in range(args.workers)]
+    for p in procs:
+        p.start()
+    logger.info(f"Started {len(procs)} worker processes")
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+
+
+if __name__ == "__main__":
+    main()